@@ -18,7 +18,7 @@ def get_D2_tridiag(N, h):
 def mul_tridiag_and_diag(T, D, dtype=None):
     """TD:tridiag / D;tridiag"""
     assert T.shape == (3,D.size) and D.shape == (T.shape[1],)
-    if dtype is None: dtype = D.dtype
+    if dtype is None: dtype = np.result_type(T, D)
     _TD = np.empty(T.shape, dtype=dtype)
     _TD[0,1:],_TD[1,:],_TD[2,:-1] = T[0,1:]*D[:-1],T[1,:]*D[:],T[2,:-1]*D[1:]
     _TD[0,0], _TD[2,-1] = 0.0, 0.0
@@ -43,3 +43,129 @@ def get_D1_tridiag(N, h):
 
 
 
+
+
+## Compact finite difference on a nonuniform grid
+def _get_compact_FD_coefs(x_arr, order):
+    """
+    Return the coefficients `(m_-, m_0, m_+, d_-, d_0, d_+)` of shape (N, 6)
+    of the three-point compact scheme 
+    `m_- f^(order)_{i-1} + m_0 f^(order)_i + m_+ f^(order)_{i+1} 
+    = d_- f_{i-1} + d_0 f_i + d_+ f_{i+1}` at each interior point 
+    of the given (possibly nonuniform) grid
+
+    At each interior point, the six coefficients are determined by 
+    the normalization `m_- + m_0 + m_+ = 1` and the exactness for 
+    the polynomials of degree up to four, which yields the Numerov scheme
+    (`order=2`) and the fourth-order Pade scheme (`order=1`)
+    on a uniform grid.
+
+    Parameters
+    ----------
+    x_arr : (N+2,) array-like
+        strictly increasing grid points including the two boundary points.
+        A complex grid, e.g. of exterior complex scaling, is also accepted
+        if its real part is strictly increasing.
+    order : 1 or 2
+        order of the derivative
+    """
+    _dtype = complex if np.iscomplexobj(x_arr) else float
+    _x = np.asarray(x_arr, dtype=_dtype)
+    if _x.ndim != 1 or _x.size < 3 or np.any(np.diff(_x.real) <= 0):
+        _msg = "`x_arr` should be a strictly increasing 1D array of size >= 3"
+        raise ValueError(_msg)
+    _N = _x.size - 2
+    _h = 0.5 * (_x[2:] - _x[:-2])  # local length scale for conditioning
+    _s = np.stack((_x[:-2] - _x[1:-1], np.zeros(_N), _x[2:] - _x[1:-1]), 
+            axis=-1) / _h[:,np.newaxis]
+
+    # Unknowns: (m_-, m_0, m_+, d_-, d_0, d_+) at each point
+    _A = np.zeros((_N, 6, 6), dtype=_dtype)
+    _A[:,0,:3] = 1.0
+    for _k in range(5):
+        if _k >= order:
+            _fac = np.prod(np.arange(_k-order+1, _k+1))
+            _A[:,1+_k,:3] = _fac * _s**(_k-order)
+        _A[:,1+_k,3:] = - _s**_k
+    _b = np.zeros((_N, 6), dtype=_dtype)
+    _b[:,0] = 1.0
+    _coefs = np.linalg.solve(_A, _b[...,np.newaxis])[...,0]
+    _coefs[:,3:] /= _h[:,np.newaxis]**order
+    return _coefs
+
+def _get_compact_FD_tridiags(x_arr, order):
+    """
+    Return the tridiagonals `(M, D)` of the three-point compact scheme
+    `M * f^(order) = D * f` on the given (possibly nonuniform) grid
+    for functions vanishing at the two boundary points of `x_arr`
+
+    See `_get_compact_FD_coefs()` for the coefficients.
+    """
+    if np.size(x_arr) < 4:
+        raise ValueError("`x_arr` should have at least four points")
+    _coefs = _get_compact_FD_coefs(x_arr, order)
+    _N = _coefs.shape[0]
+    _M, _D = (np.empty((3,_N), dtype=_coefs.dtype) for _ in range(2))
+    for _T, _c in ((_M, _coefs[:,:3]), (_D, _coefs[:,3:])):
+        _T[0,1:], _T[1,:], _T[2,:-1] = _c[1:,0], _c[:,1], _c[:-1,2]
+        _T[0,0], _T[2,-1] = 0.0, 0.0
+    return _M, _D
+
+def get_M2_D2_tridiag_nonuniform(x_arr):
+    """
+    Return `M2` and `D2` of the Numerov scheme on a nonuniform grid
+    `x_arr` of shape (N+2,), including the two boundary points
+
+    Reduces to `get_M2_tridiag(N)` and `get_D2_tridiag(N, h)` 
+    on a uniform grid of spacing `h`.
+    """
+    return _get_compact_FD_tridiags(x_arr, 2)
+
+def get_M1_D1_tridiag_nonuniform(x_arr):
+    """
+    Return `M1` and `D1` of the compact first-derivative scheme 
+    on a nonuniform grid `x_arr` of shape (N+2,), 
+    including the two boundary points
+
+    Reduces to `get_M1_tridiag(N)` and `get_D1_tridiag(N, h)` 
+    on a uniform grid of spacing `h`.
+    """
+    return _get_compact_FD_tridiags(x_arr, 1)
+
+def get_coulomb_corrected_M2_D2_first_diag(r_bound_arr, Z):
+    """
+    Return the first diagonal elements `(M2[1,0], D2[1,0])` of the Numerov 
+    scheme for the `l=0` radial function with the Coulomb potential `-Z/r`
+    near the origin
+
+    The Numerov scheme drops the term of `u''(0)` at the origin,
+    which vanishes for `l > 0` potential-free but equals `-2*Z*u'(0)` 
+    for `l = 0` with the Coulomb potential, causing an error of `O(h^2)`.
+    The corrected elements make the first row exact for 
+    `u(r) = r - Z*r^2`, the leading terms of the regular solution,
+    with the change of `M2[1,0]` equal to `m_-/d_-` (the ratio of 
+    the dropped coefficients of the origin) times that of `D2[1,0]`.
+    On a uniform grid of spacing `h`, it reduces to:
+
+    .. math::
+
+        D2_{11} = -\\frac{2}{h^2}\\left(1 - \\frac{Zh}{12 - 10Zh}\\right),
+        \\quad M2_{11} = 1 + \\frac{h^2}{12}D2_{11}
+
+    Parameters
+    ----------
+    r_bound_arr : (Nr+2,) array-like
+        the radial grid including `r=0` and `r=r_max`, 
+        of which only the first three points are used
+    Z : float
+        the charge of the Coulomb singularity at the origin
+    """
+    _r = np.asarray(r_bound_arr, dtype=float)[:3]
+    if _r[0] != 0.0: raise ValueError("`r_bound_arr` should start from zero")
+    _m_minus, _m0, _m_plus, _d_minus, _d0, _d_plus = \
+            _get_compact_FD_coefs(_r, 2)[0]
+    _kappa = _m_minus / _d_minus
+    _u1, _u2 = _r[1:] - Z * np.square(_r[1:])
+    _dd = - (_d0 * _u1 + _d_plus * _u2 + 2.*Z*(_m0 + _m_plus)) \
+            / (_u1 + 2.*Z*_kappa)
+    return _m0 + _kappa * _dd, _d0 + _dd
@@ -1,4 +1,5 @@
 from numbers import Integral, Real
+import copy
 
 import numpy as np
 
@@ -7,6 +8,10 @@ from ..integral import normalize_trapezoid, numerical_integral_trapezoidal
 from ..integral import eval_norm_trapezoid
 from ..evol import get_M2_tridiag,get_D2_tridiag,get_M1_tridiag,get_D1_tridiag
 from ..evol import mul_tridiag_and_diag
+from ..tridiag import tridiag_factorize, tridiag_backward_factorized
+from ..propagator.krylov import krylov_propagate
+from ..propagator.absorber import Polynomial_CAP, Absorbing_Layer
+from ..propagator.splitting import composition_coefficients
 
 
 def construct_spatial_array(delta_x, R_in):
@@ -32,6 +37,9 @@ class LinearPolariVelocityGaugeSystem(System):
     _imag_prop_diff_thres = 1e-13
     _max_imag_prop_time_steps = 5000
     imag_pot_ampl = 100.0
+
+    # The maximum number of timesteps whose operators are kept factorized
+    _max_cached_operators = 32
     
     def __init__(self, 
                  R_in, delta_x, delta_t_real, 
@@ -110,11 +118,20 @@ class LinearPolariVelocityGaugeSystem(System):
         self.V_x_arr = np.empty_like(self.x_arr, dtype=complex)
         self.V_x_arr[:] = self.V_x_func(self.x_arr)
         
-        # Add imaginary potential for norm absorption
-        _absorb_x_mask_arr = ~self.inner_x_mask_arr
-        _absorb_x_arr = self.x_arr[_absorb_x_mask_arr]
-        self.V_x_arr[_absorb_x_mask_arr] = -1.0j * self.imag_pot_ampl \
-            * ((_absorb_x_arr - np.sign(_absorb_x_arr) * self.R_inner) / imag_pot_width)**16
+        # Add imaginary potential for norm absorption, growing as 
+        # `((|x| - R_inner) / imag_pot_width)**16` outside the inner region.
+        # The layers span from `R_inner` to the boundaries of the box
+        # next to the outermost grid points.
+        _x_bound_arr = np.concatenate(([-self.R_total - self.delta_x], 
+                self.x_arr, [self.R_total + self.delta_x]))
+        _absorber = None
+        if self.N_absorb_width > 0:
+            _width = self.R_absorb + self.delta_x
+            _amplitude = self.imag_pot_ampl * (_width / imag_pot_width)**16
+            _absorber = Polynomial_CAP(_width, _amplitude, order=16)
+        self.absorbing_layer = Absorbing_Layer(_absorber, _x_bound_arr, 
+                two_sided=True)
+        self.V_x_arr[:] = self.absorbing_layer.add_potential(self.V_x_arr)
         
         ## Evaluate static parts of matrices
         self._M2 = get_M2_tridiag(self.N_x)
@@ -194,7 +211,18 @@ class LinearPolariVelocityGaugeSystem(System):
                 num_timestep=self._max_imag_prop_time_steps, imag_prop=True)
 
     
-    def propagate_field_present(self,num_time_step=None,start_time_index=None):
+    def propagate_field_present(self,num_time_step=None,start_time_index=None,
+                                order=2):
+        """
+        Propagate the state function in the presence of the field
+
+        # Arguments
+        - `order`: 2, 4 or 6
+            order of the time splitting of H0 and the A*p term.
+            For 4 and 6, the second-order step is composed by 
+            the Yoshida (Suzuki) scheme. 
+            See `tdse.propagator.splitting.composition_coefficients()`
+        """
 
         ## Process arguments
         if num_time_step is None: num_time_step = 1
@@ -214,6 +242,10 @@ class LinearPolariVelocityGaugeSystem(System):
             raise DeprecationWarning(
                     "The use of `start_time_index` is deprecieated")
         #assert _time_index is not None
+
+        if order != 2:
+            self._propagate_field_present_composed(num_time_step, order)
+            return
         
         ## Allocation
         _sf_arr_mid = np.empty_like(self.sf_arr, dtype=complex)
@@ -259,3 +291,126 @@ class LinearPolariVelocityGaugeSystem(System):
         self.t_index += num_time_step
 
 
+    def propagate_with_field(self, sf_arr, dt, t_start, Nt=1, order=2):
+        """
+        Propagate the given state function in-place in the presence of 
+        the field by `Nt` timesteps of `dt` starting from `t_start`,
+        leaving the state of this system untouched
+
+        This has the same interface with 
+        `tdse.propagator.box1d.Propagator_on_1D_Box_with_field`, 
+        e.g. for `tdse.propagator.parareal.propagate_parareal()`.
+
+        Returns
+        -------
+        t_final : float
+            time after the propagation ends
+        """
+        _sys = copy.copy(self)
+        _sys.sf_arr = sf_arr
+        _sys.delta_t_real, _sys.t0, _sys.t_index = float(dt), float(t_start), 0
+        for _name in ('_UA', '_UA_conj', '_U0_half', '_U0_half_conj', 
+                      '_U0', '_U0_conj'):
+            setattr(_sys, _name, np.empty_like(getattr(self, _name)))
+        _sys.propagate_field_present(Nt, order=order)
+        return float(t_start) + Nt * float(dt)
+
+
+    def _get_U0_half_factorized(self, delta_t):
+        """
+        Return the forward half-timestep propagator of H0 and 
+        the factorized backward one for the given timestep `delta_t`,
+        cached per timestep (up to `_max_cached_operators` timesteps)
+        """
+        if not hasattr(self, '_U0_half_cache'): self._U0_half_cache = {}
+        if delta_t not in self._U0_half_cache:
+            if len(self._U0_half_cache) >= self._max_cached_operators:
+                self._U0_half_cache.pop(next(iter(self._U0_half_cache)))
+            _U0_half = self._M2 - 1.0j * delta_t * 0.25 * self._M2H0
+            _U0_half_conj = self._M2 + 1.0j * delta_t * 0.25 * self._M2H0
+            self._U0_half_cache[delta_t] = (
+                    _U0_half, tridiag_factorize(_U0_half_conj))
+        return self._U0_half_cache[delta_t]
+
+
+    def _propagate_field_present_composed(self, num_time_step, order):
+        """Propagate by the composition of second-order split steps"""
+        _sf_arr_mid = np.empty_like(self.sf_arr, dtype=complex)
+        _substeps = []
+        for _c in composition_coefficients(order):
+            _tau = _c * self.delta_t_real
+            _substeps.append((_tau,) + self._get_U0_half_factorized(_tau))
+
+        for _time_index in range(self.t_index, self.t_index+num_time_step):
+            _t_sub = self.t0 + self.delta_t_real * _time_index
+            for _tau, _U0_half, _U0_half_conj_factor in _substeps:
+                _A_t = self.A_t_func(_t_sub + 0.5 * _tau)
+                self._UA[:] = self._M1 - _tau * 0.5 * _A_t * self._D1
+                self._UA_conj[:] = self._M1 + _tau * 0.5 * _A_t * self._D1
+
+                tridiag_forward(_U0_half, self.sf_arr, _sf_arr_mid)
+                tridiag_backward_factorized(
+                        _U0_half_conj_factor, self.sf_arr, _sf_arr_mid)
+                tridiag_forward(self._UA, self.sf_arr, _sf_arr_mid)
+                tridiag_backward(self._UA_conj, self.sf_arr, _sf_arr_mid)
+                tridiag_forward(_U0_half, self.sf_arr, _sf_arr_mid)
+                tridiag_backward_factorized(
+                        _U0_half_conj_factor, self.sf_arr, _sf_arr_mid)
+                _t_sub += _tau
+
+        self.t_index += num_time_step
+
+
+    def _apply_hamiltonian_with_field(self, sf_arr, t):
+        """Evaluate `H(t) * sf_arr` with `H(t) = H0 + A(t)*p`"""
+        if not hasattr(self, '_M2_factor'):
+            self._M2_factor = tridiag_factorize(self._M2, dtype=complex)
+            self._M1_factor = tridiag_factorize(self._M1, dtype=complex)
+            self._M2H0_complex = np.asarray(self._M2H0, dtype=complex)
+            self._D1_complex = np.asarray(self._D1, dtype=complex)
+        _mid = np.empty_like(sf_arr, dtype=complex)
+        _H_sf_arr = np.empty_like(sf_arr, dtype=complex)
+        tridiag_forward(self._M2H0_complex, sf_arr, _mid)
+        tridiag_backward_factorized(self._M2_factor, _H_sf_arr, _mid)
+        _A_t = self.A_t_func(t)
+        if _A_t != 0:
+            _p_sf_arr = np.empty_like(sf_arr, dtype=complex)
+            tridiag_forward(self._D1_complex, sf_arr, _mid)
+            tridiag_backward_factorized(self._M1_factor, _p_sf_arr, _mid)
+            _H_sf_arr += (-1.0j * _A_t) * _p_sf_arr
+        return _H_sf_arr
+
+
+    def propagate_field_present_krylov(self, num_time_step=None, 
+            krylov_tol=1e-12, max_krylov_dim=30):
+        """
+        Propagate the state function in the presence of the field
+        by the short-iterative Arnoldi (Krylov subspace) method,
+        as an alternative to `propagate_field_present()`
+
+        The Arnoldi process is used instead of the Lanczos process 
+        since the imaginary absorbing potential makes the Hamiltonian
+        non-Hermitian. See `tdse.propagator.krylov.krylov_propagate()`.
+
+        Returns
+        -------
+        num_of_matvec : int
+            the number of matrix-vector products spent
+        """
+        if num_time_step is None: num_time_step = 1
+        elif not int(num_time_step) == num_time_step:
+            raise TypeError(
+                    "The `num_time_step` should be an integer." \
+                    + "Given value: {}".format(num_time_step))
+        _tau, _num_of_matvec = None, 0
+        for _time_index in range(self.t_index, self.t_index+int(num_time_step)):
+            _t = self.t0 + self.delta_t_real * _time_index
+            _tau, _n = krylov_propagate(
+                    self._apply_hamiltonian_with_field, self.sf_arr, 
+                    _t, self.delta_t_real, tol=krylov_tol, 
+                    max_dim=max_krylov_dim, hermitian=False, tau=_tau)
+            _num_of_matvec += _n
+        self.t_index += int(num_time_step)
+        return _num_of_matvec
+
+
@@ -1,109 +1,237 @@
 import numpy as np
 from numpy import pi
 
-from tdse.integral import numerical_integral_trapezoidal as int_trapz
 
-from numpy.fft import fft, ifft
+from numbers import Integral
 
-def transform_x_to_k_space_fft(psi_x_arr, delta_x, axis=-1):
+from scipy.fft import fft as _fft, ifft as _ifft, fftn, ifftn, next_fast_len
+
+
+def _pow_of_imag_unit(n, sign=1):
+    """Return `(sign*i)^n` exactly, for an integer `n`"""
+    return (1, sign*1.j, -1, -sign*1.j)[int(n) % 4]
+
+
+class FFT_Plan(object):
+    """
+    Plan of the discrete Fourier transforms between the position space 
+    `x_n = (n - N/2)*dx` and the wave-vector space `k_m = (m - N/2)*dk` 
+    with `dk = 2*pi/(N*dx)`, along the given axes, e.g.
+
+    .. math::
+
+        \\psi(k_m) = \\frac{\\Delta x}{\\sqrt{2\\pi}} 
+            \\sum_{n} \\psi(x_n) e^{-ik_m x_n}
+            = \\frac{\\Delta x}{\\sqrt{2\\pi}} (-i)^N (-1)^m 
+            \\mathrm{FFT}[(-1)^n \\psi(x_n)]_m
+
+    for each axis. The sign vectors `(-1)^n` of each axis, with the 
+    constant factor folded into one of them, are computed once and 
+    broadcast along their axes, rather than materialized on the full 
+    grid. The FFT runs in-place on a single working copy of the input 
+    by `scipy.fft` with `workers` threads.
+
+    Use `get_fft_plan()` to reuse a plan of the same (shape, spacings).
+    """
+
+    def __init__(self, shape, deltas, axes=None, workers=-1):
+        """
+        Parameters
+        ----------
+        shape : tuple of int
+            the number of grid points along each of the `axes`
+        deltas : tuple of float
+            the grid spacings along each of the `axes`
+            in the position space, for `forward()`
+        axes : tuple of negative int or None
+            the axes to be transformed, counted from the last one.
+            If None, the last `len(shape)` axes.
+        workers : int
+            the number of threads of the FFT. If -1, all CPUs.
+        """
+        self.shape = tuple(int(_N) for _N in shape)
+        self.deltas = tuple(float(_d) for _d in deltas)
+        if len(self.deltas) != len(self.shape):
+            _msg = "`deltas` should be of length {}. Given: {}"
+            raise ValueError(_msg.format(len(self.shape), deltas))
+        for _d in self.deltas:
+            if not (_d > 0):
+                _msg = "The grid spacings should be positive. Given: {}"
+                raise ValueError(_msg.format(deltas))
+        if axes is None: axes = tuple(range(-len(self.shape), 0))
+        self.axes = tuple(int(_a) for _a in axes)
+        if len(self.axes) != len(self.shape) \
+                or any(_a >= 0 for _a in self.axes) \
+                or len(set(self.axes)) != len(self.axes):
+            _msg = ("`axes` should be {} distinct negative integers. "
+                    "Given: {}")
+            raise ValueError(_msg.format(len(self.shape), axes))
+        self.workers = workers
+
+        self._signs = [self._along_axis(1 - 2*(np.arange(_N) % 2), _a) 
+                for _N, _a in zip(self.shape, self.axes)]
+        _ndim, _sum_of_N = len(self.shape), sum(self.shape)
+        _coef = np.prod(self.deltas) / pow(np.sqrt(2*pi), _ndim)
+        self._forward_factors = list(self._signs)
+        self._forward_factors[0] = self._signs[0] \
+                * (_coef * _pow_of_imag_unit(_sum_of_N, -1))
+        # with the grid spacings `dk = 2*pi/(N*dx)` of the wave-vector space
+        _deltas_k = [2*pi/(_N*_d) for _N, _d in zip(self.shape, self.deltas)]
+        _coef_k = np.prod(_deltas_k) / pow(np.sqrt(2*pi), _ndim) \
+                * np.prod(self.shape)
+        self._backward_factors = list(self._signs)
+        self._backward_factors[0] = self._signs[0] \
+                * (_coef_k * _pow_of_imag_unit(_sum_of_N, 1))
+
+    @staticmethod
+    def _along_axis(v, axis):
+        """Reshape the vector `v` to be broadcast along the negative `axis`"""
+        return v.reshape((v.size,) + (1,)*(-axis-1))
+
+    def _check_shape(self, psi):
+        _shape = tuple(psi.shape[_a] if -_a <= psi.ndim else None 
+                for _a in self.axes)
+        if _shape != self.shape:
+            _msg = "The array should be of shape {} along the axes {}. Given: {}"
+            raise ValueError(_msg.format(self.shape, self.axes, psi.shape))
+
+    def _execute(self, psi, fft_func, factors, out=None):
+        _psi = np.asarray(psi)
+        self._check_shape(_psi)
+        if out is None: _work = np.multiply(_psi, self._signs[0], dtype=complex)
+        else:
+            if out.shape != _psi.shape or out.dtype != complex:
+                _msg = "`out` should be a complex array of shape {}. Given: {}"
+                raise ValueError(_msg.format(_psi.shape, out.shape))
+            _work = np.multiply(_psi, self._signs[0], out=out)
+        for _sign in self._signs[1:]: _work *= _sign
+        _result = fft_func(_work, axes=self.axes, overwrite_x=True, 
+                workers=self.workers)
+        if out is None: _work = _result
+        elif _result is not _work: _work[...] = _result
+        for _factor in factors: _work *= _factor
+        return _work
+
+    def forward(self, psi_x, out=None):
+        """Transform the given array from the position space 
+        to the wave-vector space, into `out` if given (which may be 
+        `psi_x` itself) or into a new array"""
+        return self._execute(psi_x, fftn, self._forward_factors, out=out)
+
+    def backward(self, psi_k, out=None):
+        """Transform the given array from the wave-vector space 
+        to the position space, into `out` if given (which may be 
+        `psi_k` itself) or into a new array"""
+        return self._execute(psi_k, ifftn, self._backward_factors, out=out)
+
+
+
+_fft_plans = {}
+_max_cached_fft_plans = 32
+
+def get_fft_plan(shape, deltas, axes=None, workers=-1):
+    """
+    Return the cached `FFT_Plan` of the given parameters, 
+    constructed at the first request
+
+    Up to `_max_cached_fft_plans` plans are kept, 
+    the oldest of which is dropped first.
+    """
+    _key = (tuple(int(_N) for _N in shape), tuple(float(_d) for _d in deltas),
+            None if axes is None else tuple(int(_a) for _a in axes), workers)
+    if _key not in _fft_plans:
+        if len(_fft_plans) >= _max_cached_fft_plans:
+            _fft_plans.pop(next(iter(_fft_plans)))
+        _fft_plans[_key] = FFT_Plan(shape, deltas, axes=axes, workers=workers)
+    return _fft_plans[_key]
+
+
+def _normalize_axes(axes, ndim):
+    """Return the given axes of an array of `ndim` as negative integers"""
+    _axes = []
+    for _a in axes:
+        if not isinstance(_a, Integral) or not (-ndim <= _a < ndim):
+            _msg = "The axis {} is out of range for an array of dimension {}"
+            raise ValueError(_msg.format(_a, ndim))
+        _axes.append(_a - ndim if _a >= 0 else _a)
+    return tuple(_axes)
+
+
+def transform_x_to_k_space_fft(psi_x_arr, delta_x, axis=-1, workers=-1):
     """ Transforms the given state function in x-space (position) 
     to that of k-space (wave vector)
     
     'psi_x_arr': state function in x-space (position)
     'delta_x': grid spacing of x-array (equidistant)
+    'axis': axis of `psi_x_arr` along which the transform is done
+    'workers': number of threads of the FFT. See `FFT_Plan`.
     """
-    
-    if axis != -1: raise NotImplementedError()
-
-    _N = psi_x_arr.shape[axis]
-    _minus_1_power_n = 1 - 2*(np.arange(_N, dtype=int) % 2)  # i.e. (-1)^n
-    _coef_arr = delta_x * 1.0 / np.sqrt(2*pi) * (-1.0j)**_N * _minus_1_power_n
-    _psi_k_arr = _coef_arr * fft(_minus_1_power_n * psi_x_arr, _N, axis)
-    return _psi_k_arr
+    _psi_x_arr = np.asarray(psi_x_arr)
+    _axes = _normalize_axes((axis,), _psi_x_arr.ndim)
+    _plan = get_fft_plan((_psi_x_arr.shape[axis],), (delta_x,), 
+            axes=_axes, workers=workers)
+    return _plan.forward(_psi_x_arr)
 
-def transform_k_to_x_space_ifft(psi_k_arr, delta_k):
+def transform_k_to_x_space_ifft(psi_k_arr, delta_k, axis=-1, workers=-1):
     """ Transforms the given state function in k-space (wave vector) 
     that of x-space (position)
     
     'psi_k_arr': state function in k-space (wave vector)
         The wave vector represents momentum in orthodox quantum mechanics.
     'delta_k': grid spacing of k-array (equidistant)
+    'axis': axis of `psi_k_arr` along which the transform is done
+    'workers': number of threads of the FFT. See `FFT_Plan`.
     """
-    _N = psi_k_arr.size
-    _minus_1_power_n = 1 - 2*(np.arange(_N, dtype=int) % 2) # i.e. (-1)^n
-    _coef_arr = delta_k / np.sqrt(2*pi) * (1.0j)**_N * _minus_1_power_n * _N
-    _psi_x_arr = _coef_arr * ifft(_minus_1_power_n * psi_k_arr, _N)
-    return _psi_x_arr
-
+    _psi_k_arr = np.asarray(psi_k_arr)
+    _axes = _normalize_axes((axis,), _psi_k_arr.ndim)
+    _N = _psi_k_arr.shape[axis]
+    _plan = get_fft_plan((_N,), (2*pi/(_N*delta_k),), 
+            axes=_axes, workers=workers)
+    return _plan.backward(_psi_k_arr)
 
 
-## To Improve:
-## ```
-## pow(-1.j, _sum_of_N)
-## ```
-## fix this with a bit more efficient way 
-## possibly using modular operation
 
-## [TODO] consider combining the following two routines for code reusing
-
-from numpy.fft import fftn, ifftn
-
-def transform_x_to_k_space_fft_Ndim(psi_q, *dqargs):
+def transform_x_to_k_space_fft_Ndim(psi_q, *dqargs, axes=None, workers=-1):
+    """
+    Transforms the given state function in position space along all of 
+    its axes, or along `axes` in the same order as `dqargs` if given
+    """
     
     ## Check arguments
     assert isinstance(psi_q, np.ndarray)
-    assert len(dqargs) == psi_q.ndim
+    if axes is None: axes = tuple(range(psi_q.ndim))
+    assert len(dqargs) == len(axes)
     for dq in dqargs: assert dq > 0
-    
-    _shape = psi_q.shape
-    _sum_of_N = np.sum(_shape)
-    
-    _m_meshes = np.indices(_shape)
-    _minus_1_pow_m_sum = 1 - 2*((_m_meshes.sum(axis=0))%2)
-    _minus_1_pow_n_sum = _minus_1_pow_m_sum # both meshes are same in values
-    
-    _fft_in = _minus_1_pow_m_sum * psi_q
-    _fft_out = fftn(_fft_in)
-    _const = np.prod(dqargs)/pow(np.sqrt(2*pi),psi_q.ndim)*pow(-1.j,_sum_of_N)
-    _psi_k = _const * _minus_1_pow_n_sum * _fft_out
-    
-    return _psi_k
 
+    _axes = _normalize_axes(axes, psi_q.ndim)
+    _shape = tuple(psi_q.shape[_a] for _a in _axes)
+    _plan = get_fft_plan(_shape, dqargs, axes=_axes, workers=workers)
+    return _plan.forward(psi_q)
 
-def transform_k_to_x_space_ifft_Ndim(psi_k, *dkargs):
+
+def transform_k_to_x_space_ifft_Ndim(psi_k, *dkargs, axes=None, workers=-1):
     """
     
     Parameters
     ----------
     psi_k : (...,N1,N2,...,Ndim) numpy.ndarray
+    axes : tuple of int or None
+        the axes to be transformed in the same order as `dkargs`. 
+        If None, the last `len(dkargs)` axes.
     """
 
     ## Check arguments
     assert isinstance(psi_k, np.ndarray)
     assert (len(dkargs) <= psi_k.ndim) and (len(dkargs) > 0)
     for dk in dkargs: assert dk > 0
+    if axes is None: axes = tuple(range(-len(dkargs), 0))
+    assert len(axes) == len(dkargs)
     
-    _ndim = len(dkargs)
-    _shape = psi_k.shape[-_ndim:]
-    _sum_of_N = np.sum(_shape)
-
-#    print("_shape: ",_shape)
-#    print("_sum_of_N: ",_sum_of_N)
-    
-    _m_meshes = np.indices(_shape)
-    _minus_1_pow_m_sum = 1 - 2*((_m_meshes.sum(axis=0))%2)
-    _minus_1_pow_n_sum = _minus_1_pow_m_sum # both meshes are same in values
-    
-#    print("_m_meshes.shape: ", _m_meshes.shape)
-#    print("_minus_1_pow_m_sum.shape: ", _minus_1_pow_m_sum.shape)
-
-    _ifft_in = _minus_1_pow_m_sum * psi_k
-    _ifft_out = ifftn(_ifft_in, axes=tuple(range(-_ndim,0)))
-    _const = np.prod(dkargs)/pow(np.sqrt(2*pi),_ndim)*pow(-1.j,_sum_of_N)
-    _const *= np.prod(_shape)
-    _psi_q = _const * _minus_1_pow_n_sum * _ifft_out
-
-    return _psi_q
+    _axes = _normalize_axes(axes, psi_k.ndim)
+    _shape = tuple(psi_k.shape[_a] for _a in _axes)
+    _deltas_x = [2*pi/(_N*_dk) for _N, _dk in zip(_shape, dkargs)]
+    _plan = get_fft_plan(_shape, _deltas_x, axes=_axes, workers=workers)
+    return _plan.backward(psi_k)
 
 
 
@@ -136,19 +264,81 @@ def construct_x_and_k_arr_from_constraint(
 
 
 
-def gradient_x_from_k_space(fk, *karr_args):
-    
+def _get_k_plan(fk, karr_args):
+    """Return the plan of the inverse transform along the last axes of `fk`
+    and the wave vectors broadcast along each of them"""
     assert isinstance(fk, np.ndarray)
-    assert fk.ndim == len(karr_args)
-    
+    assert fk.ndim >= len(karr_args) > 0
+    _ndim = len(karr_args)
     _dk_list = [_karr[1]-_karr[0] for _karr in karr_args]
-    _k_meshes = np.array(np.meshgrid(*karr_args, indexing='ij'))
+    _shape = fk.shape[-_ndim:]
+    _deltas_x = [2*pi/(_N*_dk) for _N, _dk in zip(_shape, _dk_list)]
+    _plan = get_fft_plan(_shape, _deltas_x)
+    _k_vectors = [FFT_Plan._along_axis(np.asarray(_karr), _axis) 
+            for _karr, _axis in zip(karr_args, _plan.axes)]
+    return _plan, _k_vectors
+
+
+def iter_gradient_x_from_k_space(fk, *karr_args, out=None):
+    """
+    Yield the components of the gradient in the position space, 
+    one at a time, given the function `fk` in the wave-vector space
+
+    Each component is `i*k_j*fk` with the wave vectors `k_j` of the axis 
+    broadcast along it, transformed back into a buffer of the shape of `fk`.
+    Thus, the memory is that of a single component, 
+    unless the components are kept by the consumer.
+
+    Parameters
+    ----------
+    fk : (..., N1, ..., Nd) numpy.ndarray
+        the function on the grid of `karr_args` along the last `d` axes
+    karr_args : d arrays of shape (N1,), ..., (Nd,)
+        the equidistanced wave-vector grids at the Nyquist limit
+    out : sequence of d complex arrays of the shape of `fk`, or None
+        the buffers of the components. If None, a single buffer is 
+        allocated and reused, i.e. a yielded component is overwritten 
+        by the next one.
+
+    Yields
+    ------
+    gradient_j : numpy.ndarray
+        the `j`-th component, in the order of `karr_args`
+    """
+    _plan, _k_vectors = _get_k_plan(fk, karr_args)
+    if out is not None and len(out) != len(karr_args):
+        _msg = "`out` should have {} buffers. Given: {}"
+        raise ValueError(_msg.format(len(karr_args), len(out)))
+    _buf = None
+    for _j, _k in enumerate(_k_vectors):
+        if out is not None: _buf = out[_j]
+        elif _buf is None: _buf = np.empty(fk.shape, dtype=complex)
+        np.multiply(fk, 1.j*_k, out=_buf)
+        yield _plan.backward(_buf, out=_buf)
+
+
+def gradient_x_from_k_space(fk, *karr_args):
     
-    _gradient = transform_k_to_x_space_ifft_Ndim(1.j*_k_meshes*fk, *_dk_list)
+    _gradient = np.empty((len(karr_args),) + fk.shape, dtype=complex)
+    for _ in iter_gradient_x_from_k_space(fk, *karr_args, out=_gradient): pass
     
     return _gradient
 
 
+def laplacian_x_from_k_space(fk, *karr_args, out=None):
+    """
+    Evaluate the Laplacian in the position space into `out` if given,
+    given the function `fk` in the wave-vector space
+
+    See `iter_gradient_x_from_k_space()` for the parameters.
+    """
+    _plan, _k_vectors = _get_k_plan(fk, karr_args)
+    _minus_k_sq = - sum(np.square(_k) for _k in _k_vectors)
+    if out is None: out = np.empty(fk.shape, dtype=complex)
+    np.multiply(fk, _minus_k_sq, out=out)
+    return _plan.backward(out, out=out)
+
+
 def k_arr_at_Nyquist_limit(x_arr):
     
     assert isinstance(x_arr, np.ndarray)
@@ -162,40 +352,168 @@ def k_arr_at_Nyquist_limit(x_arr):
     return _k_arr
 
 
-def gradient_fourier(fx, *xarr_args):
-    
+def _transform_to_k_space(fx, xarr_args):
     assert isinstance(fx, np.ndarray)
-    assert fx.ndim == len(xarr_args)
-    
+    assert fx.ndim >= len(xarr_args) > 0
+    _ndim = len(xarr_args)
     _dx_list = [_xarr[1] - _xarr[0] for _xarr in xarr_args]
-    _fk = transform_x_to_k_space_fft_Ndim(fx, *_dx_list)
+    _fk = transform_x_to_k_space_fft_Ndim(fx, *_dx_list, 
+            axes=tuple(range(-_ndim, 0)))
     _k_arrays = [k_arr_at_Nyquist_limit(_xarr) for _xarr in xarr_args]
+    return _fk, _k_arrays
+
+
+def iter_gradient_fourier(fx, *xarr_args, out=None):
+    """
+    Yield the components of the spectral gradient of `fx` 
+    on the grids `xarr_args` along its last axes, one at a time
+
+    See `iter_gradient_x_from_k_space()` for `out`.
+    """
+    _fk, _k_arrays = _transform_to_k_space(fx, xarr_args)
+    for _gradient_j in iter_gradient_x_from_k_space(_fk, *_k_arrays, out=out):
+        yield _gradient_j
+
+
+def gradient_fourier(fx, *xarr_args):
+    
+    _fk, _k_arrays = _transform_to_k_space(fx, xarr_args)
     _gradient = gradient_x_from_k_space(_fk, *_k_arrays)
     
     return _gradient
 
 
+def laplacian_fourier(fx, *xarr_args, out=None):
+    """Evaluate the spectral Laplacian of `fx` on the grids `xarr_args` 
+    along its last axes, into `out` if given"""
+    _fk, _k_arrays = _transform_to_k_space(fx, xarr_args)
+    if out is None: out = _fk  # transformed in-place
+    return laplacian_x_from_k_space(_fk, *_k_arrays, out=out)
 
 
 
 
 
 
+def _is_equidistanced(a, rtol=1e-8):
+    """Whether the points of `a` deviate from the equidistanced ones
+    by less than `rtol` times the spacing, up to the rounding errors"""
+    _a = np.asarray(a, dtype=float)
+    if _a.size < 3: return True
+    _a_uniform = np.linspace(_a[0], _a[-1], _a.size)
+    _delta_a = (_a[-1] - _a[0]) / (_a.size - 1)
+    _atol = max(rtol * abs(_delta_a), 16 * np.finfo(float).eps * np.abs(_a).max())
+    return bool(np.all(np.abs(_a - _a_uniform) <= _atol))
 
 
+def _get_trapezoid_weights(x_arr):
+    """Return the weights `w` such that `sum(w * f)` is the trapezoidal
+    integral of `f` on the (possibly nonequidistanced) grid `x_arr`"""
+    _delta_x_arr = np.diff(x_arr)
+    _weights = np.zeros(np.shape(x_arr), dtype=float)
+    _weights[:-1] += 0.5 * _delta_x_arr
+    _weights[1:] += 0.5 * _delta_x_arr
+    return _weights
 
 
-def fourier_forward(f_x_arr, x_arr, k_arr):
-    _f_k_arr = np.empty_like(k_arr, dtype=complex)
+_max_direct_block_size = 1 << 22  # elements of `exp(i*k*x)` per block
 
-    _integrand = np.empty_like(_f_k_arr, dtype=complex)
-    for _k_idx, _k in enumerate(k_arr):
-        _integrand[:] = f_x_arr * np.exp(-1.0j * _k * x_arr)
-        _f_k_arr[_k_idx] = 1.0 / np.sqrt(2.0*np.pi) * int_trapz(x_arr, _integrand)
-    
+def _chirp_z_sum(g_arr, x0, dx, k0, dk, M, sign=-1):
+    """
+    Evaluate `sum_n g_n exp(sign*i*k_m*x_n)` for `x_n = x0 + n*dx` and 
+    `k_m = k0 + m*dk` (m = 0, ..., M-1) along the last axis of `g_arr`
+    by the chirp-z transform (Bluestein's algorithm), 
+    i.e. `n*m = (n^2 + m^2 - (m-n)^2)/2` turns the sum into a convolution
+
+    The chirps are evaluated from their phases, rather than as powers of 
+    `exp(i*dk*dx)` whose rounding error grows with the power.
+    """
+    _N = g_arr.shape[-1]
+    _theta = sign * dk * dx
+    _n = np.arange(_N, dtype=float)
+    _m = np.arange(M, dtype=float)
+    _L = next_fast_len(_N + M - 1)
+    _j = np.concatenate((_m, -np.arange(_L - M, 0, -1, dtype=float)))
+    _v_fft = _fft(np.exp(-0.5j * _theta * _j * _j))
+    _u = g_arr * np.exp(1.j * (sign * k0 * dx * _n + 0.5 * _theta * _n * _n))
+    _y = _ifft(_fft(_u, _L, axis=-1) * _v_fft, axis=-1)[...,:M]
+    _y *= np.exp(1.j * (0.5 * _theta * _m * _m + sign * (k0 + dk * _m) * x0))
+    return _y
+
+
+def _fourier_trapezoid(f_arr, x_arr, k_arr, sign=-1):
+    """
+    Evaluate the trapezoidal integral of `f(x) * exp(sign*i*k*x) / sqrt(2*pi)`
+    over `x_arr` for each `k` in `k_arr`, along the last axis of `f_arr`
+
+    The trapezoidal weights are absorbed into `f`, so that the result 
+    is the weighted sum `sum_j w_j f_j exp(sign*i*k*x_j)`. If both of the 
+    grids are equidistanced, the sum is evaluated for all `k` at once by 
+    the chirp-z transform in `O((N+M) log(N+M))` operations, for any `k` 
+    range and spacing, not restricted to the Nyquist grid of the FFT. 
+    Otherwise, it is evaluated as matrix products in blocks of `k`, 
+    which is still `O(N*M)` but without the loop over `k` in Python.
+
+    Parameters
+    ----------
+    f_arr : (..., N) array-like
+    x_arr : (N,) array-like
+    k_arr : (M,) array-like
+
+    Returns
+    -------
+    f_k_arr : (..., M) numpy.ndarray
+    """
+    _x_arr, _k_arr = np.asarray(x_arr, dtype=float), np.asarray(k_arr, dtype=float)
+    _f_arr = np.asarray(f_arr)
+    if _f_arr.shape[-1:] != _x_arr.shape:
+        _msg = "The last axis of `f_arr` should be of size {}. Given shape: {}"
+        raise ValueError(_msg.format(_x_arr.size, _f_arr.shape))
+    _g_arr = _f_arr * _get_trapezoid_weights(_x_arr)
+    _N, _M = _x_arr.size, _k_arr.size
+    _f_k_arr = np.empty(_f_arr.shape[:-1] + (_M,), dtype=complex)
+    if _N < 2 or _M == 0:
+        _f_k_arr[:] = 0.0
+        return _f_k_arr
+
+    if _is_equidistanced(_x_arr) and _is_equidistanced(_k_arr):
+        _dx = (_x_arr[-1] - _x_arr[0]) / (_N - 1)
+        _dk = (_k_arr[-1] - _k_arr[0]) / (_M - 1) if _M > 1 else 0.0
+        _f_k_arr[:] = _chirp_z_sum(_g_arr, _x_arr[0], _dx, _k_arr[0], _dk, 
+                _M, sign=sign)
+    else:
+        _block_size = max(_max_direct_block_size // _N, 1)
+        for _k0 in range(0, _M, _block_size):
+            _k_block = _k_arr[_k0:_k0+_block_size]
+            _f_k_arr[...,_k0:_k0+_block_size] = np.dot(
+                    _g_arr, np.exp(sign * 1.j * np.outer(_x_arr, _k_block)))
+    _f_k_arr *= 1.0 / np.sqrt(2.0*np.pi)
     return _f_k_arr
 
 
+def fourier_forward(f_x_arr, x_arr, k_arr):
+    """
+    Evaluate the Fourier transform 
+    `f(k) = (2*pi)^{-1/2} int f(x) exp(-i*k*x) dx` by the trapezoidal rule
+    on `x_arr`, for each `k` in `k_arr`
+
+    See `_fourier_trapezoid()` for the evaluation. 
+    The values of `f_x_arr` are along its last axis.
+    """
+    return _fourier_trapezoid(f_x_arr, x_arr, k_arr, sign=-1)
+
+
+def fourier_backward(f_k_arr, k_arr, x_arr):
+    """
+    Evaluate the inverse Fourier transform 
+    `f(x) = (2*pi)^{-1/2} int f(k) exp(i*k*x) dk` by the trapezoidal rule
+    on `k_arr`, for each `x` in `x_arr`
+
+    See `fourier_forward()`.
+    """
+    return _fourier_trapezoid(f_k_arr, k_arr, x_arr, sign=1)
+
+
 def get_k_arr_at_Nyquist_limit(x_arr):
     _delta_x = None
     if np.diff(x_arr).std() < 1e-13: _delta_x = x_arr[1] - x_arr[0]
@@ -240,7 +558,7 @@ def construct_k_arr(x_arr):
     
     return _k_arr
 
-from numpy import exp, pi
+from numpy import pi
 
 def ft(fx_arr, x_arr, k_arr=None):
     
@@ -250,14 +568,9 @@ def ft(fx_arr, x_arr, k_arr=None):
     if _k_arr is None: _k_arr = construct_k_arr(x_arr)
     else: assert isinstance(_k_arr, np.ndarray) \
         and nyquist_condition_satisfied(x_arr, _k_arr)
-    _k_mesh, _x_mesh = np.meshgrid(_k_arr, x_arr, indexing='ij')
 
-    _integrand = exp(-1.0j*_k_mesh *_x_mesh) * fx_arr
-    _fk_arr = pow(2*pi,-0.5)*(
-        0.5*(_integrand[:,:-1]+_integrand[:,1:])*_dx_arr).sum(axis=-1)
+    _fk_arr = fourier_forward(fx_arr, x_arr, _k_arr)
     
     if k_arr is None:
         return _fk_arr, _k_arr
     else: return _fk_arr
-
-
@@ -0,0 +1,15 @@
+"""Utilities for the process-parallel evaluations"""
+
+import multiprocessing
+
+
+def get_mp_context():
+    """
+    Return the multiprocessing context for the worker processes
+
+    Prefer 'fork' so that the objects of the workers (e.g. a propagator,
+    which often holds an unpicklable vector potential such as a lambda)
+    are inherited by the workers instead of being pickled
+    """
+    try: return multiprocessing.get_context('fork')
+    except ValueError: return multiprocessing.get_context()
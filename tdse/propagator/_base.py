@@ -3,6 +3,8 @@
 import numpy as np
 from numpy import pi, sqrt
 
+from .cache import as_state_cache
+
 class Wavefunction(object):
     """Base class for wavefunction objects"""
     
@@ -68,8 +70,150 @@ class Propagator(object):
         else: print("iteration count at end: {}".format(_i*Nt_per_iter))
 
 
+    def _state_cache_key_params(self):
+        """Return parameters that determine stationary states of the system"""
+        raise NotImplementedError()
+
+    @staticmethod
+    def _convergence_key_params(dt, max_Nt, Nt_per_iter, norm_thres, 
+                                adaptive, var_thres, dt_max, multigrid_levels):
+        """
+        Return the settings of `propagate_to_ground_state()` determining
+        how far the state is converged, as a part of the cache key, 
+        so that a loosely converged state isn't used for a stricter one
+        """
+        if adaptive: 
+            return ("adaptive", float(dt), max_Nt, Nt_per_iter, var_thres, 
+                    dt_max, multigrid_levels)
+        return ("fixed", float(dt), max_Nt, Nt_per_iter, norm_thres, 
+                multigrid_levels)
+
+    def _solve_with_state_cache(self, cache, wf, solve, *extra_key_params):
+        """
+        Fill `wf` with the state stored in `cache` if present,
+        otherwise run `solve()`, which should update `wf` in-place,
+        and store the result in `cache`
+
+        Parameters
+        ----------
+        cache : State_Cache or str or None
+            If None, `solve()` is simply called.
+        extra_key_params : 
+            parameters distinguishing the state from other states 
+            of the same system, e.g. the states to be orthogonal to
+        """
+        _cache = as_state_cache(cache)
+        if _cache is None: 
+            solve()
+            return
+        _key = _cache.key(type(self).__name__, 
+                *self._state_cache_key_params(), *extra_key_params)
+        with _cache.lock(_key):
+            _wf_cached = _cache.load(_key)
+            if _wf_cached is not None and _wf_cached.shape == wf.shape:
+                wf[:] = _wf_cached
+            else:
+                solve()
+                _cache.store(_key, wf)
+
+    def eval_energy_and_variance(self, wf):
+        """
+        Evaluate the energy expectation value `<H>` and the energy variance
+        `<H^2> - <H>^2` of the given wavefunction
+        """
+        raise NotImplementedError()
+
+    def propagate_to_ground_state_adaptive(
+            self, wf, dt, max_Nt, normalizer_args, Nt_per_iter=10,
+            var_thres=1e-10, dt_max=None, dt_growth=2.0, 
+            settle_thres=1e-3, wfs_to_substract=()):
+        """
+        Propagate the given wavefunction by the imaginary timestep
+        to get the lowest energy possible from the given initial wavefunction,
+        growing the timestep as the energy estimate settles
+
+        The convergence is judged by the energy variance `<H^2> - <H>^2`,
+        which vanishes only for an eigenstate.
+
+        Parameters
+        ----------
+        dt : float
+            initial (imaginary) timestep, which is also the smallest one
+        dt_max : float or None
+            upper bound of the timestep. If None, `64 * dt` is used.
+            For a negative energy estimate `E`, the timestep is further
+            limited below `1/|E|`, since the Crank-Nicolson factor of the 
+            imaginary time propagation has a pole at `dt = 2/|E|`.
+        dt_growth : float
+            factor by which the timestep grows (or shrinks) at a time
+        settle_thres : float
+            the timestep grows when the relative change of the energy estimate
+            over `Nt_per_iter` steps gets smaller than this value
+
+        Returns
+        -------
+        dt_arr : (Nt,) numpy.ndarray
+            timesteps actually used, one per `Nt_per_iter` steps
+        """
+        _dt = float(dt)
+        if not (_dt > 0): 
+            _msg = "`dt` should be a positive real number. Given: {}"
+            raise ValueError(_msg.format(_dt))
+        _dt_max = 64. * _dt if dt_max is None else float(dt_max)
+        if not (_dt_max >= _dt):
+            _msg = "`dt_max` should not be smaller than `dt`. Given: {}"
+            raise ValueError(_msg.format(_dt_max))
+        if not (dt_growth > 1.0):
+            _msg = "`dt_growth` should be larger than 1. Given: {}"
+            raise ValueError(_msg.format(dt_growth))
+        assert type(wfs_to_substract) in (list, tuple, np.ndarray)
+
+        self.wf_class.normalize(wf, *normalizer_args)
+        _E_prev, _ = self.eval_energy_and_variance(wf)
+        _wf_prev = wf.copy()
+        
+        _dt_list = []
+        _max_iter = int(max_Nt / Nt_per_iter) + 1
+        for _i in range(_max_iter):
+            self.propagate(wf, -1.0j * _dt, Nt=Nt_per_iter)
+
+            for _wf_sub in wfs_to_substract:
+                wf -= _wf_sub * self.wf_class.inner(wf, _wf_sub, self.dx)
+            self.wf_class.normalize(wf, *normalizer_args)
+
+            _E, _var = self.eval_energy_and_variance(wf)
+            if not (_i % 100):
+                _msg = "[_i={:05d}] dt = {:.3e}, E = {:.16e}, var = {:.3e}"
+                print(_msg.format(_i, _dt, _E, _var))
+            if _var < var_thres: 
+                _dt_list.append(_dt)
+                break
+
+            # Adjust the timestep for the next iteration
+            _dE = _E - _E_prev
+            if _dE > abs(_E) * settle_thres and _dt > float(dt):
+                # The energy went up: the last timestep was too large.
+                # At the initial (smallest) timestep, the step is accepted
+                # instead of being retried with the same timestep.
+                wf[:] = _wf_prev
+                _dt = max(_dt / dt_growth, float(dt))
+                continue
+            _dt_list.append(_dt)
+            _dt_bound = _dt_max if _E >= 0 else min(_dt_max, 1.0 / abs(_E))
+            if abs(_dE) < abs(_E) * settle_thres:
+                _dt = min(_dt * dt_growth, _dt_bound)
+            else: _dt = min(_dt, _dt_bound)
+            _E_prev = _E
+            _wf_prev[:] = wf
+        if _i >= _max_iter-1: raise Exception("Maximum iteration exceeded")
+        else: print("iteration count at end: {}".format((_i+1)*Nt_per_iter))
+
+        return np.array(_dt_list, dtype=float)
+
+
 
-def _eval_f_and_derivs_by_FD(_r, _Rm, _dr, _r0=0.0, _with_fd_rlim=False):
+def _eval_f_and_derivs_by_FD(_r, _Rm, _dr, _r0=0.0, _with_fd_rlim=False,
+                             _r_arr=None):
     """
     Evaluate values of a function and its derivatives
     from the function values on a regular (i.e. uniform) one dimensional grid
@@ -77,19 +221,25 @@ def _eval_f_and_derivs_by_FD(_r, _Rm, _dr, _r0=0.0, _with_fd_rlim=False):
     Parameters
     ----------
     Rm : (Nm, Nr) or (Nr,) array-like
+    r_arr : (Nr,) array-like or None
+        If given, the grid points of a nonuniform grid,
+        in which case `dr` and `r0` are ignored.
         
     """
     _Nr = _Rm.shape[-1]
-    _rmin, _rmax = _r0, _r0 + (_Nr - 1) * _dr
+    if _r_arr is None: _rmin, _rmax = _r0, _r0 + (_Nr - 1) * _dr
+    else: _rmin, _rmax = _r_arr[0], _r_arr[-1]
     assert _rmin <= _r and _r < _rmax
 
     _Ns = 4
-    _il = int((_r - _rmin) // _dr)
+    if _r_arr is None: _il = int((_r - _rmin) // _dr)
+    else: _il = int(np.searchsorted(_r_arr, _r, side='right')) - 1
     _is0 = (_il-1) \
             + (_il < 1) * (1 - _il) \
             + (_il > _Nr-3) * (_Nr-3 - _il)
 #    _r_arr = np.arange(_Nr) * _dr
-    _r_arr_slice = _rmin + np.arange(_is0,_is0+_Ns) * _dr
+    if _r_arr is None: _r_arr_slice = _rmin + np.arange(_is0,_is0+_Ns) * _dr
+    else: _r_arr_slice = np.asarray(_r_arr[_is0:_is0+_Ns], dtype=float)
 #    _rn_minus_r = _r_arr[_is0:_is0+_Ns] - _r
     _rn_minus_r = _r_arr_slice - _r
     _A = np.empty((_Ns, _Ns), dtype=float)
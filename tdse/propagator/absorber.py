@@ -0,0 +1,261 @@
+"""Absorbing boundaries shared by the box propagators"""
+
+from numbers import Integral, Real
+
+import numpy as np
+
+
+class Absorber(object):
+    """
+    Base class of the absorbing boundaries of a box
+
+    An absorber acts in the layer of the given `width` at the outer
+    boundary of a radial box, i.e. `[r_max - width, r_max]`, or at both ends
+    of a one-dimensional box. A propagator constructed with an `absorber`
+    sets it up on its grid as an `Absorbing_Layer`, which asks for:
+
+    - `get_potential()`: the imaginary potential added to the potential
+    - `get_scaled_grid()`: the (complex) grid on which the operators are built
+    - `get_mask()`: the mask multiplied to the wavefunction
+      after every `every` timesteps
+
+    Each of which is a no-op in this base class.
+    """
+
+    def __init__(self, width):
+        if not isinstance(width, Real) or not (width > 0):
+            _msg = "`width` should be a positive real number. Given: {}"
+            raise ValueError(_msg.format(width))
+        self.width = float(width)
+
+    def get_depth(self, x_bound_arr, two_sided=False):
+        """
+        Return the depth into the layer relative to `width`,
+        i.e. 0 at the inner edge of the layer (and inside)
+        and 1 at the boundary, at each of the inner grid points
+
+        Parameters
+        ----------
+        x_bound_arr : (N+2,) array-like
+            the grid points including the two boundary points
+        two_sided : bool
+            If True, the layers are at both ends of the grid.
+            Otherwise, at the last end only.
+        """
+        _x = np.asarray(x_bound_arr, dtype=float)
+        _extent = (_x[-1] - _x[0]) / (2 if two_sided else 1)
+        if not (self.width < _extent):
+            _msg = ("The absorber (width={}) doesn't fit in the box "
+                    "spanning [{},{}]")
+            raise ValueError(_msg.format(self.width, _x[0], _x[-1]))
+        _depth = _x[1:-1] - (_x[-1] - self.width)
+        if two_sided: _depth = np.maximum(_depth, (_x[0] + self.width) - _x[1:-1])
+        return np.clip(_depth / self.width, 0.0, 1.0)
+
+    def get_potential(self, x_bound_arr, two_sided=False): return None
+
+    def get_scaled_grid(self, x_bound_arr, two_sided=False): return None
+
+    def get_mask(self, x_bound_arr, two_sided=False): return None
+
+    def _key_params(self):
+        """Parameters identifying the absorber, e.g. for the state cache"""
+        return (type(self).__name__, self.width)
+
+
+
+class Polynomial_CAP(Absorber):
+    """
+    Complex absorbing potential growing as a power of the depth
+    into the layer:
+
+    .. math::
+
+        V_{CAP}(x) = -i A \\left(\\frac{d(x)}{w}\\right)^{n}
+
+    where `d(x)` is the distance into the layer of width `w`,
+    `A` is `amplitude` and `n` is `order`.
+    The Hamiltonian stays tridiagonal and the propagation costs nothing more,
+    but the potential reflects the slow components whose wavelength is
+    longer than the layer, and the fast ones which pass through the layer
+    and reflect at the boundary. The reflection is low for
+    `amplitude*width/(hbar*v) ~ 1` at the velocity `v` of interest.
+    """
+
+    def __init__(self, width, amplitude, order=2):
+        super().__init__(width)
+        if not isinstance(amplitude, Real) or not (amplitude > 0):
+            _msg = "`amplitude` should be a positive real number. Given: {}"
+            raise ValueError(_msg.format(amplitude))
+        self.amplitude = float(amplitude)
+        if not isinstance(order, Real) or not (order > 0):
+            _msg = "`order` should be a positive real number. Given: {}"
+            raise ValueError(_msg.format(order))
+        self.order = order
+
+    def get_potential(self, x_bound_arr, two_sided=False):
+        _depth = self.get_depth(x_bound_arr, two_sided)
+        return -1.j * self.amplitude * _depth**self.order
+
+    def _key_params(self):
+        return super()._key_params() + (self.amplitude, self.order)
+
+
+
+class Mask_Absorber(Absorber):
+    """
+    Mask multiplied to the wavefunction after every `every` timesteps
+
+    .. math::
+
+        M(x) = \\cos^{p}\\left(\\frac{\\pi}{2}\\frac{d(x)}{w}\\right)
+
+    where `d(x)` is the distance into the layer of width `w`
+    and `p` is `exponent`. The default `p = 1/8` removes a small fraction
+    at each application, thus the reflection from the edge of the layer
+    is low if the mask is applied often enough compared with the time
+    taken to cross the layer.
+    """
+
+    def __init__(self, width, every=1, exponent=0.125):
+        super().__init__(width)
+        if not isinstance(every, Integral) or not (every > 0):
+            _msg = "`every` should be a positive integer. Given: {}"
+            raise ValueError(_msg.format(every))
+        self.every = every
+        if not isinstance(exponent, Real) or not (exponent > 0):
+            _msg = "`exponent` should be a positive real number. Given: {}"
+            raise ValueError(_msg.format(exponent))
+        self.exponent = float(exponent)
+
+    def get_mask(self, x_bound_arr, two_sided=False):
+        _depth = self.get_depth(x_bound_arr, two_sided)
+        return np.cos(0.5*np.pi*_depth)**self.exponent
+
+    def _key_params(self):
+        return super()._key_params() + (self.every, self.exponent)
+
+
+
+class Exterior_Complex_Scaling(Absorber):
+    """
+    Exterior complex scaling of the coordinate in the layer:
+
+    .. math::
+
+        x \\rightarrow x_{0} + (x - x_{0}) e^{i\\theta}
+
+    beyond the inner edge `x0` of the layer and `theta` is `angle`.
+
+    The operators are built on the scaled (complex) grid by the Numerov
+    scheme generalized to nonuniform grids
+    (see `tdse.evol.get_M2_D2_tridiag_nonuniform()`), on which the outgoing
+    waves decay exponentially while the Hamiltonian is untouched inside.
+    Thus, the absorption doesn't depend much on the energy,
+    as long as the waves are resolved on the scaled grid.
+    The potential in the layer is taken at the real grid points, which is
+    exact for a potential constant there, e.g. one cut off beyond `x0`.
+    The wavefunction in the layer is that of the scaled coordinate,
+    which has no physical meaning.
+    """
+
+    def __init__(self, width, angle=0.5):
+        super().__init__(width)
+        if not isinstance(angle, Real) or not (0 < angle < 0.5*np.pi):
+            _msg = "`angle` should be a real number in (0, pi/2). Given: {}"
+            raise ValueError(_msg.format(angle))
+        self.angle = float(angle)
+
+    def get_scaled_grid(self, x_bound_arr, two_sided=False):
+        _x = np.asarray(x_bound_arr, dtype=float)
+        _depth = np.zeros(_x.shape, dtype=float)
+        _depth[1:-1] = self.get_depth(_x, two_sided)
+        _depth[-1] = 1.0
+        if two_sided: _depth[0] = 1.0
+        # The distance into the layer, with the sign of its direction
+        _sign = np.where(_x > 0.5*(_x[0] + _x[-1]), 1.0, -1.0) \
+                if two_sided else 1.0
+        _dx = _sign * self.width * _depth
+        return _x + (np.exp(1.j*self.angle) - 1.0) * _dx
+
+    def _key_params(self):
+        return super()._key_params() + (self.angle,)
+
+
+
+class Absorbing_Layer(object):
+    """
+    An absorber set up on the grid of a propagator
+
+    Attributes
+    ----------
+    potential : (N,) numpy.ndarray or None
+        the imaginary potential to be added to the potential
+    scaled_bound_arr : (N+2,) numpy.ndarray
+        the grid, including the two boundary points, on which the operators
+        are built. It is complex for the exterior complex scaling
+        and the given grid itself otherwise.
+    scaled : bool
+        whether `scaled_bound_arr` differs from the given grid
+    mask : (N,) numpy.ndarray or None
+        the mask multiplied after every `every` timesteps
+    """
+
+    def __init__(self, absorber, x_bound_arr, two_sided=False):
+        """
+        Parameters
+        ----------
+        absorber : Absorber or None
+            If None, the layer does nothing.
+        x_bound_arr : (N+2,) array-like
+            the grid points including the two boundary points
+        two_sided : bool
+            See `Absorber.get_depth()`
+        """
+        if absorber is not None and not isinstance(absorber, Absorber):
+            _msg = "`absorber` should be an `Absorber` or None. Given: {}"
+            raise ValueError(_msg.format(absorber))
+        self.absorber = absorber
+        self.potential, self.mask, self.every = None, None, 1
+        _scaled_bound_arr = None
+        if absorber is not None:
+            _args = (x_bound_arr, two_sided)
+            self.potential = absorber.get_potential(*_args)
+            _scaled_bound_arr = absorber.get_scaled_grid(*_args)
+            self.mask = absorber.get_mask(*_args)
+            self.every = getattr(absorber, 'every', 1)
+        self.scaled = _scaled_bound_arr is not None
+        if not self.scaled: _scaled_bound_arr = np.asarray(x_bound_arr)
+        self.scaled_bound_arr = _scaled_bound_arr
+
+        # The number of timesteps propagated so far, for the mask
+        self.num_steps = 0
+
+    @property
+    def hermitian(self):
+        """Whether the Hamiltonian stays Hermitian, i.e. only masked if any"""
+        return self.potential is None and not self.scaled
+
+    def add_potential(self, V_arr):
+        """Return the given potential values with the imaginary potential"""
+        if self.potential is None: return V_arr
+        return V_arr + self.potential
+
+    def count_mask_steps(self, Nt):
+        """
+        Count the next `Nt` timesteps and return the boolean array
+        of shape (Nt,) telling whether to apply the mask after each of them
+        """
+        _steps = self.num_steps + np.arange(1, Nt+1)
+        self.num_steps += Nt
+        if self.mask is None: return np.zeros((Nt,), dtype=bool)
+        return _steps % self.every == 0
+
+    def apply_mask(self, wf):
+        """Count a timestep and apply the mask to `wf` in-place if it is due"""
+        if self.count_mask_steps(1)[0]: wf *= self.mask
+
+    def _key_params(self):
+        if self.absorber is None: return ()
+        return ("absorber",) + self.absorber._key_params()
+
@@ -5,6 +5,7 @@ from numbers import Integral
 from numpy import asarray
 
 from ._base import Wavefunction, Propagator, _eval_f_and_derivs_by_FD
+from .absorber import Absorbing_Layer
 
 
 class Wavefunction_Uniform_1D_Box(Wavefunction):
@@ -66,6 +67,31 @@ class Wavefunction_Uniform_1D_Box(Wavefunction):
         return dx * np.sum(np.conj(_wf1) * _wf2, axis=-1)
 
 
+    def interpolate_from(self, wf_spec, wf):
+        """
+        Interpolate the given wavefunction onto the grid of this object
+
+        Parameters
+        ----------
+        wf_spec : Wavefunction_Uniform_1D_Box
+            specification object of the grid on which `wf` is defined
+        wf : (wf_spec.N,) array-like
+            wavefunction values on the grid of `wf_spec`, 
+            excluding the both ends where the wavefunction values are zero
+        """
+        _wf = asarray(wf)
+        if _wf.shape != wf_spec.shape:
+            _msg = "`wf` should be of shape {}. Given shape: {}"
+            raise ValueError(_msg.format(wf_spec.shape, _wf.shape))
+        _wf_tot = np.zeros((1+wf_spec.N+1,), dtype=_wf.dtype)
+        _wf_tot[1:-1] = _wf
+        _interp = lambda _f: np.interp(
+                self.x, wf_spec.x_tot, _f, left=0.0, right=0.0)
+        if np.iscomplexobj(_wf_tot):
+            return _interp(_wf_tot.real) + 1.j * _interp(_wf_tot.imag)
+        else: return _interp(_wf_tot)
+
+
     def eval_wf_with_wf_deriv_at_x(self, x, wf, with_fd_xlim=False):
         """
         Evaluate wavefunction and its derivative at given coordinate `x`
@@ -104,16 +130,26 @@ from numbers import Integral, Real
 
 import numpy as np
 
-from tdse.evol import get_D2_tridiag, get_M2_tridiag, mul_tridiag_and_diag
-from tdse.tridiag import tridiag_forward, tridiag_backward
+from tdse.evol import (get_D2_tridiag, get_M2_tridiag, mul_tridiag_and_diag,
+        get_M2_D2_tridiag_nonuniform)
+from tdse.tridiag import (tridiag_forward, tridiag_backward, 
+        tridiag_factorize, tridiag_backward_factorized)
 
 
 class Propagator_on_1D_Box(Propagator):
-    """A Propagator for a time-independent Hamiltonian"""
+    """
+    A Propagator for a time-independent Hamiltonian
+
+    If an `absorber` (see `tdse.propagator.absorber`) is given, 
+    its layers are placed at both ends of the box.
+    """
 
     wf_class = Wavefunction_Uniform_1D_Box
+
+    # The maximum number of timesteps whose operators are kept factorized
+    _max_cached_operators = 32
     
-    def __init__(self, N, dx, Vx, x0=0.0, hbar=1.0, mass=1.0):
+    def __init__(self, N, dx, Vx, x0=0.0, hbar=1.0, mass=1.0, absorber=None):
 
         self.wf = self.wf_class(N, dx, x0=x0)
         for _attr in ("N","dx"):
@@ -133,27 +169,85 @@ class Propagator_on_1D_Box(Propagator):
                     "Given hbar = {}, m = {}")
             raise TypeError(_msg.format(hbar, m))
         self.hbar, self.mass = hbar, mass
+
+        self.absorbing_layer = Absorbing_Layer(
+                absorber, self.wf.x_tot, two_sided=True)
         
         # Construct tridiagonals for propagation
-        self.M2 = get_M2_tridiag(self.N)
-        self.D2 = get_D2_tridiag(self.N, self.dx)
-        _M2V = mul_tridiag_and_diag(self.M2, self.Vx)
+        if self.absorbing_layer.scaled:
+            self.M2, self.D2 = get_M2_D2_tridiag_nonuniform(
+                    self.absorbing_layer.scaled_bound_arr)
+        else:
+            self.M2 = get_M2_tridiag(self.N)
+            self.D2 = get_D2_tridiag(self.N, self.dx)
+        _M2V = mul_tridiag_and_diag(self.M2, 
+                self.absorbing_layer.add_potential(self.Vx))
         self.M2H = -0.5*self.hbar**2/self.mass * self.D2 + _M2V
+        self._M2_factor = tridiag_factorize(self.M2, dtype=complex)
+
+        # Crank-Nicolson operators for each timestep used so far
+        self._cn_operators = {}
+
+        # Eigenpairs of the Hamiltonian, evaluated on demand
+        self._eigvals, self._eigvecs, self._eigvecs_inv = None, None, None
+
+
+    def _get_cn_operators(self, dt):
+        """
+        Return the forward Crank-Nicolson operator and the factorized
+        backward operator for the given timestep `dt`
+
+        The operators are cached per timestep so that repeated calls
+        with the same `dt` don't redo the construction and factorization.
+        """
+        _key = complex(dt)
+        if _key not in self._cn_operators:
+            if len(self._cn_operators) >= self._max_cached_operators:
+                self._cn_operators.pop(next(iter(self._cn_operators)))
+            _U = self.M2 - 0.5j*dt*self.M2H
+            _U_adj = self.M2 + 0.5j*dt*self.M2H
+            self._cn_operators[_key] = (_U, tridiag_factorize(_U_adj))
+        return self._cn_operators[_key]
         
         
     def propagate(self, sf_arr, dt, Nt=1):
         """Propagate the given state function by the given time interval"""
-        assert isinstance(sf_arr, np.ndarray) and sf_arr.dtype == np.complex
+        assert isinstance(sf_arr, np.ndarray) and sf_arr.dtype == complex
         _sf_at_mid_time = np.empty_like(sf_arr)
-        _U = self.M2 - 0.5j*dt*self.M2H
-        _U_adj = self.M2 + 0.5j*dt*self.M2H
+        _U, _U_adj_factor = self._get_cn_operators(dt)
         for _ in range(Nt):
             tridiag_forward(_U, sf_arr, _sf_at_mid_time)
-            tridiag_backward(_U_adj, sf_arr, _sf_at_mid_time)   
+            tridiag_backward_factorized(_U_adj_factor, sf_arr, _sf_at_mid_time)
+            self.absorbing_layer.apply_mask(sf_arr)
 
     def propagate_to_ground_state(self, wf=None, dt=None, max_Nt=5000, 
                                   Nt_per_iter=10, norm_thres=1e-13, 
-                                  wfs_to_substract=()):
+                                  wfs_to_substract=(), adaptive=False,
+                                  var_thres=1e-10, dt_max=None, cache=None,
+                                  multigrid_levels=0):
+        """
+        Propagate the given wavefunction by the imaginary timestep
+        to get the lowest energy state
+
+        If `adaptive` is True, the timestep grows as the energy settles
+        and the convergence is judged by the energy variance below 
+        `var_thres` instead of `norm_thres`.
+        See `Propagator.propagate_to_ground_state_adaptive()` for details.
+
+        If `cache` (a `State_Cache` or a directory path) is given,
+        the state stored there for the same grid, potential, hbar and mass
+        (and `wfs_to_substract`) and the same convergence settings,
+        i.e. `dt`, `max_Nt`, `Nt_per_iter`, the threshold, `adaptive`,
+        `dt_max` and `multigrid_levels`, is used instead of propagation, 
+        if any.
+        Otherwise, the resulting state is stored to the cache.
+
+        If `multigrid_levels` is positive, the ground state is first obtained
+        on a grid coarser by a factor of 2 (recursively, 
+        down to a factor of `2**multigrid_levels`) and interpolated onto 
+        this grid as the initial state. This removes the high-frequency 
+        components of a random initial state at the cost of coarse grids.
+        """
         # Determine the timestep
         _dt = dt
         if dt is None: _dt = self.dx / 4.
@@ -166,12 +260,79 @@ class Propagator_on_1D_Box(Propagator):
 
         # Propagate to the ground state
         _normalizer_args = (self.dx,)
-        super().propagate_to_ground_state(_wf, _dt, max_Nt, _normalizer_args, 
-                Nt_per_iter, norm_thres, wfs_to_substract)
+        def _solve():
+            if multigrid_levels > 0:
+                _coarse = self.coarsened(2)
+                _wf_coarse = _coarse.wf.interpolate_from(self.wf, _wf)
+                _wfs_to_substract_coarse = [_coarse.wf.interpolate_from(
+                    self.wf, _wf_sub) for _wf_sub in wfs_to_substract]
+                _coarse.propagate_to_ground_state(_wf_coarse, 
+                        None if dt is None else 2*dt, max_Nt, Nt_per_iter, 
+                        norm_thres, _wfs_to_substract_coarse, adaptive, 
+                        var_thres, dt_max, multigrid_levels=multigrid_levels-1)
+                _wf[:] = self.wf.interpolate_from(_coarse.wf, _wf_coarse)
+            if adaptive:
+                self.propagate_to_ground_state_adaptive(
+                        _wf, _dt, max_Nt, _normalizer_args, Nt_per_iter, 
+                        var_thres=var_thres, dt_max=dt_max, 
+                        wfs_to_substract=wfs_to_substract)
+            else:
+                super(Propagator_on_1D_Box, self).propagate_to_ground_state(
+                        _wf, _dt, max_Nt, _normalizer_args, Nt_per_iter, 
+                        norm_thres, wfs_to_substract)
+        _convergence_params = self._convergence_key_params(_dt, max_Nt, 
+                Nt_per_iter, norm_thres, adaptive, var_thres, dt_max, 
+                multigrid_levels)
+        self._solve_with_state_cache(cache, _wf, _solve, 
+                "ground_state", *_convergence_params, *wfs_to_substract)
 
         if wf is None: return _wf
     
 
+    def coarsened(self, factor=2):
+        """
+        Return a field-free propagator of the same system on a grid
+        coarser by the given integer `factor`, spanning the same box
+
+        The grid points of the coarse grid are a subset of the fine grid,
+        from which the potential values are taken.
+        """
+        if not isinstance(factor, Integral) or not (factor > 1):
+            _msg = "`factor` should be an integer larger than 1. Given: {}"
+            raise ValueError(_msg.format(factor))
+        _N = (self.N + 1) // factor - 1
+        if _N < 4:
+            _msg = "The grid with N={} is too small to be coarsened by {}"
+            raise ValueError(_msg.format(self.N, factor))
+        _Vx = self.Vx[factor-1::factor][:_N]
+        return Propagator_on_1D_Box(_N, self.dx * factor, _Vx, 
+                x0=self.wf.x0, hbar=self.hbar, mass=self.mass,
+                absorber=self.absorbing_layer.absorber)
+
+
+    def _state_cache_key_params(self):
+        return (self.N, self.dx, self.wf.x0, self.Vx, self.hbar, self.mass) \
+                + self.absorbing_layer._key_params()
+
+
+    def apply_hamiltonian(self, wf):
+        """Evaluate `H * wf`, i.e. `M2^{-1} * M2H * wf`"""
+        _wf = asarray(wf, dtype=complex)
+        _M2H_wf = np.empty_like(_wf)
+        tridiag_forward(self.M2H.astype(complex), _wf, _M2H_wf)
+        _H_wf = np.empty_like(_wf)
+        tridiag_backward_factorized(self._M2_factor, _H_wf, _M2H_wf)
+        return _H_wf
+
+
+    def eval_energy_and_variance(self, wf):
+        _H_wf = self.apply_hamiltonian(wf)
+        _norm_sq = self.wf_class.norm_sq(wf, self.dx)
+        _E = self.wf_class.inner(wf, _H_wf, self.dx).real / _norm_sq
+        _H_sq = self.wf_class.norm_sq(_H_wf, self.dx) / _norm_sq
+        return _E, _H_sq - _E * _E
+
+
     def evaluate_energy_expectation_value(self, wf):
         _wf = asarray(wf)
         assert _wf.shape == (self.N,)
@@ -184,6 +345,80 @@ class Propagator_on_1D_Box(Propagator):
         return _energy_expect_val.real
 
 
+    def eigen_decompose(self):
+        """
+        Evaluate and cache all eigenpairs of the Numerov Hamiltonian
+
+        The Hamiltonian `M2^{-1}*M2H = M2^{-1}*K + V` is real symmetric
+        for a real potential, since `M2` and the kinetic part `K` commute.
+        Then, its eigenvectors are orthonormal and `V^{-1} = V^H`.
+        For a complex potential, the general eigendecomposition is used.
+        The cost is `O(N^3)`, thus it is meant for small systems.
+
+        Returns
+        -------
+        eigvals : (N,) numpy.ndarray
+        eigvecs : (N,N) numpy.ndarray
+            eigenvectors as columns
+        """
+        if self._eigvals is None:
+            _M2_full = np.diag(self.M2[1]) + np.diag(self.M2[0,1:], -1) \
+                    + np.diag(self.M2[2,:-1], 1)
+            _M2H_full = np.diag(self.M2H[1]) + np.diag(self.M2H[0,1:], -1) \
+                    + np.diag(self.M2H[2,:-1], 1)
+            _H = np.linalg.solve(_M2_full, _M2H_full)
+            if np.isrealobj(_H) or np.all(_H.imag == 0):
+                _H = np.real(_H)
+                _H = 0.5 * (_H + _H.T)  # remove the round-off asymmetry
+                self._eigvals, self._eigvecs = np.linalg.eigh(_H)
+                self._eigvecs_inv = self._eigvecs.T
+            else:
+                self._eigvals, self._eigvecs = np.linalg.eig(_H)
+                self._eigvecs_inv = np.linalg.inv(self._eigvecs)
+        return self._eigvals, self._eigvecs
+
+
+    def propagate_in_eigenbasis(self, wf, t_arr, t0=0.0, batch_size=64):
+        """
+        Generate the wavefunction propagated from `t0` to each time
+        in `t_arr` by the exact evolution in the eigenbasis:
+
+        .. math::
+
+            \\psi(t_j) = V e^{-iE(t_j-t_0)/\\hbar} V^{-1} \\psi(t_0)
+
+        No time stepping is involved. The times are processed in batches
+        of `batch_size` with one matrix product per batch.
+
+        Parameters
+        ----------
+        wf : (N,) array-like
+            the wavefunction at `t0`. It isn't modified.
+        t_arr : (Nt,) array-like
+            times in arbitrary order
+
+        Yields
+        ------
+        wf_t : (N,) numpy.ndarray
+            the wavefunction at each time in `t_arr`
+        """
+        _wf = asarray(wf)
+        if _wf.shape != self.wf.shape:
+            _msg = "`wf` should be of shape {}. Given shape: {}"
+            raise ValueError(_msg.format(self.wf.shape, _wf.shape))
+        if not isinstance(batch_size, Integral) or batch_size < 1:
+            _msg = "`batch_size` should be a positive integer. Given: {}"
+            raise ValueError(_msg.format(batch_size))
+        _E, _V = self.eigen_decompose()
+        _coef = self._eigvecs_inv.dot(_wf)
+        _t_arr = np.atleast_1d(asarray(t_arr, dtype=float)) - t0
+        for _i0 in range(0, _t_arr.size, batch_size):
+            _t_batch = _t_arr[_i0:_i0+batch_size]
+            _phases = np.exp((-1.j / self.hbar) * np.outer(_t_batch, _E))
+            _wf_batch = (_phases * _coef).dot(_V.T)
+            for _wf_t in _wf_batch: yield _wf_t
+
+
 
 # Aliasing
 Time_Indep_Hamil_Propagator = Propagator_on_1D_Box 
@@ -193,11 +428,14 @@ Time_Indep_Hamil_Propagator = Propagator_on_1D_Box
 from numbers import Real, Integral
 
 from tdse.propagator.box1d import Propagator_on_1D_Box
-from tdse.evol import get_D1_tridiag, get_M1_tridiag
+from tdse.evol import (get_D1_tridiag, get_M1_tridiag, 
+        get_M1_D1_tridiag_nonuniform)
 from tdse.tridiag import tridiag_forward, tridiag_backward
+from tdse.propagator.splitting import composition_coefficients
 
 class Propagator_on_1D_Box_with_field(Propagator_on_1D_Box):
-    def __init__(self, N, dx, Vx, At, q=-1.0, x0=0.0, hbar=1.0, mass=1.0):
+    def __init__(self, N, dx, Vx, At, q=-1.0, x0=0.0, hbar=1.0, mass=1.0,
+                 absorber=None):
         """
         Initalize
         
@@ -221,17 +459,35 @@ class Propagator_on_1D_Box_with_field(Propagator_on_1D_Box):
         
         # Process arguments that is common with parent propagator
         # and construct matrices that is common with field-absent case
-        super().__init__(N, dx, Vx, x0=x0, hbar=hbar, mass=mass)
+        super().__init__(N, dx, Vx, x0=x0, hbar=hbar, mass=mass, 
+                absorber=absorber)
         
         # Construct matrices for field-present case
-        self.M1 = get_M1_tridiag(self.N)
-        _D1 = get_D1_tridiag(self.N, self.dx)
+        if self.absorbing_layer.scaled:
+            self.M1, _D1 = get_M1_D1_tridiag_nonuniform(
+                    self.absorbing_layer.scaled_bound_arr)
+        else:
+            self.M1 = get_M1_tridiag(self.N)
+            _D1 = get_D1_tridiag(self.N, self.dx)
         self.M1HA_over_ihbar_At = (self.q / self.mass) * _D1
         
         
-    def propagate_with_field(self, wf, dt, t_start, Nt=1):
+    def propagate_with_field(self, wf, dt, t_start, Nt=1, order=2, mask=True):
         """Propagate the wavefunction in the presence of the field
         
+        Parameters
+        ----------
+        order : 2, 4 or 6
+            order of the time splitting of H0 and the A*p term.
+            The second-order (Strang) step `U0(dt/2) UA(dt) U0(dt/2)`
+            is composed into a fourth- or sixth-order step
+            by the Yoshida (Suzuki) triple-jump scheme,
+            which costs 3 or 9 second-order steps per timestep.
+            See `tdse.propagator.splitting.composition_coefficients()`.
+        mask : bool
+            If False, the mask of the absorber, if any, is neither applied
+            nor counted, e.g. for trial steps which may be rejected.
+
         Notes
         -----
         When the field strength is zero,
@@ -242,7 +498,7 @@ class Propagator_on_1D_Box_with_field(Propagator_on_1D_Box):
         t_final : float
             time after the propagation ends
         """
-        if not isinstance(wf, np.ndarray) or wf.dtype != np.complex:
+        if not isinstance(wf, np.ndarray) or wf.dtype != complex:
             raise ValueError("The wavefunction should be a complex type numpy array")
         _wf = wf
         
@@ -258,28 +514,124 @@ class Propagator_on_1D_Box_with_field(Propagator_on_1D_Box):
             raise ValueError("`Nt` should be a positive integer. Given: {}".format(Nt))
         _Nt = Nt
         
-        _quarter_dt_M2H0_over_ihbar = (-0.25j * dt / self.hbar) * self.M2H
-        _M2U0_forward_quarter = self.M2 + _quarter_dt_M2H0_over_ihbar
-        _M2U0_backward_quarter = self.M2 - _quarter_dt_M2H0_over_ihbar
+        # The half-step propagators of H0 are factorized once 
+        # for each substep coefficient and reused over the timesteps
+        _substeps = []
+        for _c in composition_coefficients(order):
+            _tau = _c * _dt
+            _M2U0_forward_half, _M2U0_backward_half_factor = \
+                    self._get_cn_operators(0.5 * _tau / self.hbar)
+            _substeps.append(
+                    (_tau, _M2U0_forward_half, _M2U0_backward_half_factor))
         
         _wf_mid = np.empty_like(_wf, dtype=_wf.dtype)
         _t = _t_start
         for _it in range(_Nt):
             
-            tridiag_forward(_M2U0_forward_quarter, _wf, _wf_mid)
-            tridiag_backward(_M2U0_backward_quarter, _wf, _wf_mid)
+            _t_sub = _t
+            for _tau, _M2U0_forward_half, _M2U0_backward_half_factor \
+                    in _substeps:
+
+                tridiag_forward(_M2U0_forward_half, _wf, _wf_mid)
+                tridiag_backward_factorized(
+                        _M2U0_backward_half_factor, _wf, _wf_mid)
             
-            _half_dt_M1HA_over_ihbar = (0.5*dt * self.A(_t+0.5*_dt)) * self.M1HA_over_ihbar_At
-            _M1UA_forward_half = (self.M1 + _half_dt_M1HA_over_ihbar).astype(np.complex)
-            _M1UA_backward_half = (self.M1 - _half_dt_M1HA_over_ihbar).astype(np.complex)
+                _half_tau_M1HA_over_ihbar = (0.5*_tau * self.A(_t_sub+0.5*_tau)) \
+                        * self.M1HA_over_ihbar_At
+                _M1UA_forward = (self.M1 + _half_tau_M1HA_over_ihbar).astype(complex)
+                _M1UA_backward = (self.M1 - _half_tau_M1HA_over_ihbar).astype(complex)
 
-            tridiag_forward(_M1UA_forward_half, _wf, _wf_mid)
-            tridiag_backward(_M1UA_backward_half, _wf, _wf_mid)
+                tridiag_forward(_M1UA_forward, _wf, _wf_mid)
+                tridiag_backward(_M1UA_backward, _wf, _wf_mid)
             
-            tridiag_forward(_M2U0_forward_quarter, _wf, _wf_mid)
-            tridiag_backward(_M2U0_backward_quarter, _wf, _wf_mid)
+                tridiag_forward(_M2U0_forward_half, _wf, _wf_mid)
+                tridiag_backward_factorized(
+                        _M2U0_backward_half_factor, _wf, _wf_mid)
 
+                _t_sub += _tau
+
+            if mask: self.absorbing_layer.apply_mask(_wf)
             _t += _dt
             
         return _t
 
+
+    def propagate_with_field_adaptive(self, wf, t_start, t_end, dt_max, 
+                                      tol=1e-8, order=2, max_level=20):
+        """
+        Propagate the wavefunction in the presence of the field
+        from `t_start` to `t_end` with a timestep adapted to the local error
+
+        The local error of each step is estimated by step doubling:
+        a step of `dt` is compared with two steps of `dt/2`
+        and the latter is accepted if the difference (in L2 norm), 
+        divided by `2**order - 1`, is below `tol`. 
+        Otherwise, the step is retried with `dt/2`.
+        The timestep grows again when the error is small enough
+        to be expected to stay below `tol` for a doubled timestep.
+
+        The timesteps are restricted to `dt_max / 2**level` 
+        for integer `level` in `[0, max_level]`, so that the factorized
+        operators are reused across steps of equal timesteps.
+        Typically, large timesteps are taken where the field is weak
+        and small ones around the peaks of the field.
+        The trial steps are propagated without the mask of the absorber, 
+        if any, which is applied and counted once per accepted step.
+
+        Parameters
+        ----------
+        dt_max : float
+            the largest timestep allowed
+        tol : float
+            tolerance of the local error per step
+        order : 2, 4 or 6
+            order of the time splitting. See `propagate_with_field()`
+
+        Returns
+        -------
+        t_arr : (Nt+1,) numpy.ndarray
+            accepted time grid, from `t_start` to `t_end`
+        """
+        if not isinstance(wf, np.ndarray) or wf.dtype != complex:
+            raise ValueError("The wavefunction should be a complex type numpy array")
+        _t, _t_end = float(t_start), float(t_end)
+        if not (_t_end > _t):
+            _msg = "`t_end` should be larger than `t_start`. Given: {}, {}"
+            raise ValueError(_msg.format(t_end, t_start))
+        _dt_max = float(dt_max)
+        if not (_dt_max > 0):
+            _msg = "`dt_max` should be a positive real number. Given: {}"
+            raise ValueError(_msg.format(dt_max))
+        if not (float(tol) > 0):
+            _msg = "`tol` should be a positive real number. Given: {}"
+            raise ValueError(_msg.format(tol))
+
+        _err_factor = 1.0 / (2**order - 1)
+        _wf_full, _wf_half = np.empty_like(wf), np.empty_like(wf)
+        _t_list = [_t]
+        _level = 0
+        while _t_end - _t > 1e-13 * abs(_t_end):
+            _dt = min(_dt_max / 2**_level, _t_end - _t)
+
+            _wf_full[:] = wf
+            self.propagate_with_field(_wf_full, _dt, _t, Nt=1, order=order,
+                    mask=False)
+            _wf_half[:] = wf
+            self.propagate_with_field(_wf_half, 0.5*_dt, _t, Nt=2, order=order,
+                    mask=False)
+            _err = _err_factor * np.sqrt(
+                    self.wf_class.norm_sq(_wf_half - _wf_full, self.dx))
+
+            if _err > tol and _level < max_level:
+                _level += 1
+                continue
+
+            wf[:] = _wf_half
+            self.absorbing_layer.apply_mask(wf)
+            _t += _dt
+            _t_list.append(_t)
+
+            # The local error scales with dt**(order+1)
+            if _err < tol / 2**(order+1) and _level > 0: _level -= 1
+
+        return np.array(_t_list, dtype=float)
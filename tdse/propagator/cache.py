@@ -0,0 +1,116 @@
+"""Persistent on-disk cache of stationary states"""
+
+import os
+from os import path
+import hashlib
+import tempfile
+from contextlib import contextmanager
+from numbers import Number
+
+import numpy as np
+
+try: import fcntl
+except ImportError: fcntl = None
+
+
+class State_Cache(object):
+    """
+    A content-addressed cache of wavefunction arrays stored on disk
+
+    Each state is stored in its own `.npy` file named after the hash of 
+    the parameters that determine it, e.g. (N, dx, x0, Vx, hbar, mass).
+    The files can be loaded as memory maps.
+
+    Notes
+    -----
+    A state is written to a temporary file first and then renamed,
+    so that other processes never read a partially written state.
+    While a state is being computed under `lock()`, 
+    other processes asking for the same state wait for it 
+    instead of computing it again. 
+    The locking relies on `fcntl` and is skipped where it is unavailable.
+    """
+
+    suffix = '.npy'
+
+    def __init__(self, directory):
+        self.directory = path.abspath(str(directory))
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(*params):
+        """
+        Evaluate a hash string from the given parameters
+
+        Parameters
+        ----------
+        params : numbers, strings or array-likes
+            Arrays are hashed by their dtype, shape and contents
+        """
+        _hash = hashlib.sha256()
+        for _param in params:
+            if isinstance(_param, (str, Number)) or _param is None:
+                _hash.update(repr(_param).encode())
+            else:
+                _arr = np.ascontiguousarray(_param)
+                _hash.update(repr((_arr.dtype.str, _arr.shape)).encode())
+                _hash.update(_arr.tobytes())
+            _hash.update(b'\0')
+        return _hash.hexdigest()
+
+    def filepath(self, key):
+        return path.join(self.directory, key + self.suffix)
+
+    def load(self, key, mmap_mode='r'):
+        """
+        Load the state stored for `key`
+
+        Returns
+        -------
+        wf : numpy.ndarray or numpy.memmap or None
+            None if no state is stored for `key`
+        """
+        _filepath = self.filepath(key)
+        if not path.isfile(_filepath): return None
+        return np.load(_filepath, mmap_mode=mmap_mode)
+
+    def store(self, key, wf):
+        """Store the given state for `key` atomically"""
+        _fd, _tmp_filepath = tempfile.mkstemp(
+                dir=self.directory, prefix='.'+key, suffix=self.suffix)
+        try:
+            with os.fdopen(_fd, 'wb') as _f:
+                np.save(_f, np.asarray(wf))
+                _f.flush()
+                os.fsync(_f.fileno())
+            os.replace(_tmp_filepath, self.filepath(key))
+        except:
+            if path.exists(_tmp_filepath): os.remove(_tmp_filepath)
+            raise
+
+    @contextmanager
+    def lock(self, key):
+        """Hold an exclusive inter-process lock for `key`"""
+        if fcntl is None: 
+            yield
+            return
+        _lock_filepath = path.join(self.directory, '.' + key + '.lock')
+        with open(_lock_filepath, 'a') as _f:
+            fcntl.flock(_f.fileno(), fcntl.LOCK_EX)
+            try: yield
+            finally: fcntl.flock(_f.fileno(), fcntl.LOCK_UN)
+
+
+def as_state_cache(cache):
+    """
+    Return a `State_Cache` from the given object
+
+    Parameters
+    ----------
+    cache : State_Cache or str or None
+        A directory path is converted to a `State_Cache` for that directory
+    """
+    if cache is None or isinstance(cache, State_Cache): return cache
+    if isinstance(cache, (str, os.PathLike)): return State_Cache(cache)
+    _msg = "`cache` should be a `State_Cache` or a directory path. Given: {}"
+    raise TypeError(_msg.format(cache))
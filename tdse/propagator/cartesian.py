@@ -0,0 +1,321 @@
+"""Propagator for wavefunction on a Cartesian grid by split-operator method"""
+
+from numbers import Integral, Real
+
+import numpy as np
+from numpy import asarray, pi
+from scipy.fft import fftn, ifftn, fftfreq
+
+from ._base import Wavefunction, Propagator
+from ..fourier import construct_x_and_k_arr_from_constraint
+
+
+class Wavefunction_on_Cartesian_Grid(Wavefunction):
+    """
+    An object for specifying the wavefunction on a uniform Cartesian grid
+    in one, two or three dimensions with periodic boundary condition
+    """
+
+    def __init__(self, *x_arrs):
+        """
+        Initialize the wavefunction
+
+        Parameters
+        ----------
+        x_arrs : (N_i,) array-like, one for each dimension
+            Equidistanced grid along each axis.
+        """
+        if not (1 <= len(x_arrs) <= 3):
+            _msg = "The number of dimension should be 1, 2 or 3. Given: {}"
+            raise ValueError(_msg.format(len(x_arrs)))
+        self.dim = len(x_arrs)
+
+        self.x_arrs, _dx_list = [], []
+        for _x_arr in x_arrs:
+            _x = asarray(_x_arr, dtype=float)
+            if _x.ndim != 1 or _x.size < 2:
+                raise ValueError("Each grid should be a 1D array of size > 1")
+            _dx = _x[1] - _x[0]
+            if not (_dx > 0) or np.any(np.abs(np.diff(_x) - _dx) > 1e-10*_dx):
+                raise ValueError("Each grid should be increasing and uniform")
+            self.x_arrs.append(_x)
+            _dx_list.append(_dx)
+        self.dx = tuple(_dx_list)
+        self.shape = tuple(_x.size for _x in self.x_arrs)
+
+    def meshgrid(self):
+        return np.meshgrid(*self.x_arrs, indexing='ij')
+
+    @staticmethod
+    def norm_sq(wf, dx):
+        """
+        Evaluate norm square of the given wavefunction
+
+        Parameters
+        ----------
+        dx : float or sequence of float
+            grid spacing(s) along each axis
+        """
+        _wf = asarray(wf)
+        _dx = np.atleast_1d(dx)
+        _axes = tuple(range(-_dx.size, 0))
+        return np.prod(_dx) * np.sum(np.real(_wf.conj() * _wf), axis=_axes)
+
+    @staticmethod
+    def inner(wf1, wf2, dx):
+        """Evaluate an inner product of given wavefunctions"""
+        _wf1, _wf2 = (asarray(_wf) for _wf in (wf1, wf2))
+        assert _wf1.shape == _wf2.shape and _wf1.ndim > 0
+        _dx = np.atleast_1d(dx)
+        _axes = tuple(range(-_dx.size, 0))
+        return np.prod(_dx) * np.sum(_wf1.conj() * _wf2, axis=_axes)
+
+
+
+class Split_Operator_Propagator_on_Cartesian_Grid(Propagator):
+    """
+    A propagator on a uniform Cartesian grid in 1D, 2D or 3D
+    using the second-order split-operator Fourier method:
+
+    .. math::
+
+        U(dt) = e^{-iVdt/2\\hbar} \\mathcal{F}^{-1} e^{-iT(k)dt/\\hbar}
+        \\mathcal{F} e^{-iVdt/2\\hbar}
+
+    The kinetic energy is exact for all Fourier modes on the grid,
+    so that smooth potentials are resolved with spectral accuracy.
+    The grid is periodic, thus the box should be large enough
+    or be combined with an absorber.
+
+    Notes
+    -----
+    The phase factors are cached per timestep.
+    The kinetic phase factor is kept as one 1D array per axis
+    since the kinetic energy is separable.
+    """
+
+    wf_class = Wavefunction_on_Cartesian_Grid
+
+    # The maximum number of timesteps whose phase factors are cached
+    _max_cached_operators = 16
+
+    def __init__(self, x_arrs, Vx=0.0, At=None, q=-1.0, polarization=0,
+                 hbar=1.0, mass=1.0, workers=-1):
+        """
+        Initialize
+
+        Parameters
+        ----------
+        x_arrs : (N,) array-like or sequence of them
+            Equidistanced grid along each axis
+        Vx : float, array-like of the grid shape, or callable
+            Potential. A callable is called with meshgrids of coordinates,
+            e.g. `Vx(x, y)` in 2D.
+        At : callable or None
+            Vector potential as a function of time `t`. It may return
+            a real number (the component along the axis `polarization`)
+            or a sequence of components for each axis.
+            Used by `propagate_with_field()` in the velocity gauge.
+        q : float
+            Charge of a particle described by the wavefunction
+        polarization : int
+            Axis of polarization when `At` returns a real number
+        workers : int
+            The number of threads for FFT. -1 means all available cores.
+        """
+        if np.ndim(x_arrs[0]) == 0: x_arrs = (x_arrs,)
+        self.wf = self.wf_class(*x_arrs)
+        for _attr in ("dim", "dx", "shape", "x_arrs"):
+            setattr(self, _attr, getattr(self.wf, _attr))
+        self.axes = tuple(range(-self.dim, 0))
+
+        if callable(Vx): _Vx = asarray(Vx(*self.wf.meshgrid()))
+        else: _Vx = np.broadcast_to(asarray(Vx), self.shape)
+        if _Vx.shape != self.shape:
+            _msg = "`Vx` should be of shape {}. Given shape: {}"
+            raise ValueError(_msg.format(self.shape, _Vx.shape))
+        self.Vx = np.array(_Vx)
+
+        if not (hbar > 0.0) or not (mass > 0.0):
+            _msg = ("hbar and m (mass) should be positive\n"
+                    "Given hbar = {}, m = {}")
+            raise ValueError(_msg.format(hbar, mass))
+        self.hbar, self.mass = hbar, mass
+
+        if At is not None and not callable(At):
+            _msg = "`At` should be a callable. Given: {}"
+            raise ValueError(_msg.format(At))
+        self.A = At
+        if not isinstance(float(q), Real):
+            _msg = "`q` should be real number. Given: {}"
+            raise ValueError(_msg.format(q))
+        self.q = float(q)
+        if not isinstance(polarization, Integral) \
+                or not (0 <= polarization < self.dim):
+            _msg = "`polarization` should be an axis index. Given: {}"
+            raise ValueError(_msg.format(polarization))
+        self.polarization = polarization
+
+        self.workers = workers
+
+        # Wave vectors along each axis, in the order of FFT output
+        self.k_arrs = [2*pi*fftfreq(_N, _dx)
+                for _N, _dx in zip(self.shape, self.dx)]
+
+        self._phase_factors = {}
+
+
+    @classmethod
+    def from_constraint(cls, max_delta_x, max_delta_k,
+                        min_x_radius, min_k_radius, dim=1, **kwargs):
+        """
+        Construct the propagator on a grid at the Nyquist limit
+        satisfying the given constraints along every axis
+
+        See `tdse.fourier.construct_x_and_k_arr_from_constraint()`
+        """
+        _x_arr, _ = construct_x_and_k_arr_from_constraint(
+                max_delta_x, max_delta_k, min_x_radius, min_k_radius)
+        return cls((_x_arr,)*dim, **kwargs)
+
+
+    def _broadcast_along(self, arr, axis):
+        _shape = [1] * self.dim
+        _shape[axis] = arr.size
+        return arr.reshape(_shape)
+
+
+    def _get_phase_factors(self, dt):
+        """
+        Return the potential phase factor for a half timestep
+        and the kinetic phase factor for each axis for the given `dt`
+        """
+        _key = complex(dt)
+        if _key not in self._phase_factors:
+            if len(self._phase_factors) >= self._max_cached_operators:
+                self._phase_factors.pop(next(iter(self._phase_factors)))
+            _V_half = np.exp((-0.5j * dt / self.hbar) * self.Vx)
+            _c = -0.5j * dt * self.hbar / self.mass
+            _T_axes = [self._broadcast_along(np.exp(_c * np.square(_k)), _ax)
+                    for _ax, _k in enumerate(self.k_arrs)]
+            self._phase_factors[_key] = (_V_half, _T_axes)
+        return self._phase_factors[_key]
+
+
+    def _A_components(self, t):
+        _A = np.atleast_1d(np.asarray(self.A(t), dtype=float))
+        if _A.size == 1:
+            _A_vec = np.zeros((self.dim,), dtype=float)
+            _A_vec[self.polarization] = _A[0]
+            _A = _A_vec
+        if _A.shape != (self.dim,):
+            _msg = "`At` should return a real number or {} components"
+            raise ValueError(_msg.format(self.dim))
+        return _A
+
+
+    def _kinetic_step(self, wf, dt, T_axes, A=None):
+        """
+        Apply the kinetic propagator in momentum space, in-place
+
+        The FFTs overwrite the buffer of `wf`, which is copied back only if 
+        `scipy.fft` returns the result in another buffer. The wave vectors
+        are in the order of `fftfreq` rather than centered as in 
+        `tdse.fourier.FFT_Plan`, whose modulation by `(-1)^n` would make 
+        the grid antiperiodic for an odd number of grid points.
+        """
+        _wf_k = fftn(wf, axes=self.axes, overwrite_x=True,
+                workers=self.workers)
+        for _T in T_axes: _wf_k *= _T
+        if A is not None:
+            # Cross term -q*A*p/m of (p - q*A)^2/(2m) in the velocity gauge.
+            # The spatially uniform A^2 term only yields a global phase.
+            for _ax, (_k, _A_ax) in enumerate(zip(self.k_arrs, A)):
+                if _A_ax == 0: continue
+                _phase = np.exp((1.j*dt*self.q*_A_ax/self.mass) * _k)
+                _wf_k *= self._broadcast_along(_phase, _ax)
+        _wf_x = ifftn(_wf_k, axes=self.axes, overwrite_x=True,
+                workers=self.workers)
+        if _wf_x.ctypes.data != wf.ctypes.data or _wf_x.strides != wf.strides:
+            wf[...] = _wf_x
+
+
+    def _check_wf(self, wf):
+        if not isinstance(wf, np.ndarray) or wf.dtype != complex:
+            _msg = "The wavefunction should be a complex type numpy array"
+            raise ValueError(_msg)
+        if wf.shape != self.shape:
+            _msg = "The wavefunction should be of shape {}. Given: {}"
+            raise ValueError(_msg.format(self.shape, wf.shape))
+
+
+    def propagate(self, wf, dt, Nt=1):
+        """
+        Propagate the given wavefunction in-place without field
+
+        `dt` may be imaginary for imaginary time propagation.
+        """
+        self._check_wf(wf)
+        if not isinstance(Nt, Integral) or Nt < 0:
+            _msg = "`Nt` should be a nonnegative integer. Given: {}"
+            raise ValueError(_msg.format(Nt))
+        if Nt == 0: return
+        _V_half, _T_axes = self._get_phase_factors(dt)
+        wf *= _V_half
+        for _it in range(Nt):
+            self._kinetic_step(wf, dt, _T_axes)
+            if _it < Nt-1: wf *= np.square(_V_half)
+        wf *= _V_half
+
+
+    def propagate_with_field(self, wf, dt, t_start, Nt=1):
+        """
+        Propagate the wavefunction in the presence of the field
+        in the velocity gauge, with the vector potential
+        evaluated at the middle of each timestep
+
+        Returns
+        -------
+        t_final : float
+            time after the propagation ends
+        """
+        if self.A is None:
+            raise ValueError("The vector potential `At` was not given")
+        self._check_wf(wf)
+        if not isinstance(Nt, Integral) or Nt <= 0:
+            _msg = "`Nt` should be a positive integer. Given: {}"
+            raise ValueError(_msg.format(Nt))
+        _dt, _t = float(dt), float(t_start)
+
+        _V_half, _T_axes = self._get_phase_factors(_dt)
+        _V_full = np.square(_V_half)
+        wf *= _V_half
+        for _it in range(Nt):
+            _A = self._A_components(_t + 0.5*_dt)
+            self._kinetic_step(wf, _dt, _T_axes, A=_A)
+            if _it < Nt-1: wf *= _V_full
+            _t += _dt
+        wf *= _V_half
+        return _t
+
+
+    def propagate_to_ground_state(self, wf=None, dt=None, max_Nt=5000,
+                                  Nt_per_iter=10, norm_thres=1e-13,
+                                  wfs_to_substract=()):
+        """
+        Propagate the given wavefunction by the imaginary timestep
+        to get the lowest energy state
+        """
+        _dt = dt
+        if dt is None: _dt = min(self.dx) / 4.
+
+        if wf is None:
+            _wf = np.empty(self.shape, dtype=complex)
+            _wf[:] = np.random.rand(*_wf.shape)
+        else: _wf = np.asarray(wf)
+
+        _normalizer_args = (self.dx,)
+        super().propagate_to_ground_state(_wf, _dt, max_Nt, _normalizer_args,
+                Nt_per_iter, norm_thres, wfs_to_substract)
+
+        if wf is None: return _wf
@@ -0,0 +1,112 @@
+"""Chebyshev polynomial propagator for time-independent Hamiltonians"""
+
+from numbers import Integral
+
+import numpy as np
+from scipy.special import jv
+
+from .box1d import Propagator_on_1D_Box
+
+
+class Chebyshev_Propagator_on_1D_Box(Propagator_on_1D_Box):
+    """
+    A propagator for a time-independent Hamiltonian on a one-dimensional box
+    by the Chebyshev expansion of the time evolution operator:
+
+    .. math::
+
+        e^{-iHdt/\\hbar} = e^{-i\\bar{E}dt/\\hbar} \\sum_{k}
+        (2-\\delta_{k0})(-i)^{k} J_{k}(\\alpha) T_{k}(H_{n})
+
+    where :math:`H_n = (H-\\bar{E})/\\Delta E` has its spectrum in [-1,1],
+    with :math:`\\bar{E}` and :math:`\\Delta E` the center and the half-width
+    of the spectral range of H, and :math:`\\alpha = \\Delta E dt/\\hbar`.
+
+    The matrix-vector product `H*wf` is the Numerov Hamiltonian
+    `M2^{-1}*M2H` used by the Crank-Nicolson propagator.
+    Since the Bessel function `J_k(alpha)` decays faster than exponentially
+    for `k > alpha`, any timestep `dt` is propagated at machine precision
+    with about `alpha` matrix-vector products, i.e. at cost `O(N*dE*dt)`.
+
+    Notes
+    -----
+    The expansion requires a Hermitian Hamiltonian, i.e. a real potential.
+    Imaginary timesteps (e.g. for `propagate_to_ground_state()`)
+    are propagated by the Crank-Nicolson scheme of the parent class.
+    """
+
+    # Relative tolerance at which the expansion is truncated
+    cheb_tol = 1e-16
+
+    # Relative margin added to the estimated spectral range
+    spectral_margin = 0.01
+
+    def __init__(self, N, dx, Vx, x0=0.0, hbar=1.0, mass=1.0):
+        super().__init__(N, dx, Vx, x0=x0, hbar=hbar, mass=mass)
+        if np.iscomplexobj(self.Vx) and np.any(self.Vx.imag != 0):
+            raise ValueError("The potential `Vx` should be real")
+        self.E_min, self.E_max = self.get_spectral_bounds()
+        self._cheb_coefs = {}
+
+
+    def get_spectral_bounds(self):
+        """
+        Estimate lower and upper bounds of the spectrum of the Hamiltonian
+
+        The Numerov Hamiltonian is `M2^{-1}*K + V` where the kinetic part
+        `M2^{-1}*K` has its eigenvalues in `(0, 6*hbar^2/(2*m*dx^2))`.
+        Thus, the spectrum lies within `[min(V), max(V) + 6*hbar^2/(2*m*dx^2)]`
+        which is widened by `spectral_margin` for safety.
+        """
+        _Vx = np.real(self.Vx)
+        _K_max = 6. * 0.5 * self.hbar**2 / self.mass / self.dx**2
+        _E_min, _E_max = _Vx.min(), _Vx.max() + _K_max
+        _margin = self.spectral_margin * (_E_max - _E_min)
+        return _E_min - _margin, _E_max + _margin
+
+
+    def _get_cheb_coefs(self, dt):
+        """Return the coefficients of the Chebyshev expansion for `dt`"""
+        _dt = float(dt)
+        if _dt not in self._cheb_coefs:
+            _alpha = 0.5 * (self.E_max - self.E_min) * abs(_dt) / self.hbar
+            _k_max = int(_alpha + 10. * _alpha**(1./3.) + 30)
+            _J = jv(np.arange(_k_max+1), _alpha)
+            _significant = np.abs(_J) > self.cheb_tol * np.abs(_J).max()
+            _significant[:int(_alpha)+1] = True
+            _Nk = np.nonzero(_significant)[0][-1] + 1
+            _coefs = 2. * (-1.j * np.sign(_dt))**np.arange(_Nk) * _J[:_Nk]
+            _coefs[0] *= 0.5
+            self._cheb_coefs[_dt] = _coefs
+        return self._cheb_coefs[_dt]
+
+
+    def propagate(self, sf_arr, dt, Nt=1):
+        """Propagate the given state function by the given time interval"""
+        if np.iscomplexobj(dt) and np.imag(dt) != 0:
+            return super().propagate(sf_arr, dt, Nt=Nt)
+        assert isinstance(sf_arr, np.ndarray) and sf_arr.dtype == complex
+        if not isinstance(Nt, Integral) or Nt < 0:
+            _msg = "`Nt` should be a nonnegative integer. Given: {}"
+            raise ValueError(_msg.format(Nt))
+
+        _dt = float(np.real(dt))
+        _coefs = self._get_cheb_coefs(_dt)
+        _E_mid = 0.5 * (self.E_max + self.E_min)
+        _E_half_width = 0.5 * (self.E_max - self.E_min)
+        _global_phase = np.exp(-1.j * _E_mid * _dt / self.hbar)
+
+        # Normalized Hamiltonian: (H - E_mid) / E_half_width
+        _Hn = lambda _v: (self.apply_hamiltonian(_v) - _E_mid * _v) \
+                / _E_half_width
+
+        for _ in range(Nt):
+            _phi_prev = sf_arr.copy()
+            _phi = _Hn(_phi_prev)
+            _result = _coefs[0] * _phi_prev
+            if _coefs.size > 1: _result += _coefs[1] * _phi
+            for _c in _coefs[2:]:
+                _phi_next = 2. * _Hn(_phi) - _phi_prev
+                _result += _c * _phi_next
+                _phi_prev, _phi = _phi, _phi_next
+            sf_arr[:] = _global_phase * _result
@@ -0,0 +1,259 @@
+"""Spherical propagation distributed over l-channels across processes"""
+
+import os
+from numbers import Integral
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .spherical import (Wavefunction_on_Spherical_Box_with_single_m,
+        Propagator_on_Spherical_Box_with_single_m,
+        Propagator_on_Spherical_Box_with_single_m_and_field)
+from ..parallel import get_mp_context
+
+
+def _channel_worker(conn, shm_name, shape, channels, prop_args, prop_kwargs):
+    """
+    Serve the propagation commands for the channels `channels`
+    of the wavefunction in the shared memory block `shm_name`
+    """
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        _wf = np.ndarray(shape, dtype=complex, buffer=_shm.buf)
+        if 'field' in prop_kwargs:
+            _prop = Propagator_on_Spherical_Box_with_single_m_and_field(
+                    *prop_args, channels=channels, **prop_kwargs)
+            # Pairs (ilm, ilm+1) whose lower channel belongs to this worker
+            _pair_sets = tuple(_ilm_arr[(_ilm_arr >= channels.start)
+                    & (_ilm_arr < channels.stop)]
+                    for _ilm_arr in _prop._pair_sets)
+        else:
+            _prop = Propagator_on_Spherical_Box_with_single_m(
+                    *prop_args, channels=channels, **prop_kwargs)
+        conn.send(None)
+    except Exception as e:
+        conn.send(e)
+        _shm.close()
+        return
+
+    try:
+        while True:
+            _cmd = conn.recv()
+            if _cmd[0] == 'close': break
+            try:
+                if _cmd[0] == 'propagate':
+                    _dt, _Nt = _cmd[1:]
+                    _prop.propagate(_wf[channels], _dt, _Nt)
+                elif _cmd[0] == 'pairs':
+                    _tau, _field_t, _parity = _cmd[1:]
+                    _prop._propagate_pairs(_wf, _tau, _field_t,
+                            _pair_sets[_parity])
+                else: raise ValueError("Unknown command: {}".format(_cmd[0]))
+                conn.send(None)
+            except Exception as e: conn.send(e)
+    finally:
+        del _wf
+        _shm.close()
+
+
+
+class Channel_Distributed_Propagator_on_Spherical_Box(object):
+    """
+    Propagator for a wavefunction on a spherical box with single `m`
+    whose l-channels are partitioned into contiguous slabs,
+    each of which is propagated by a worker process
+
+    The wavefunction `wf_arr` of shape (Nlm, Nr) lives in shared memory.
+    Each worker constructs and factorizes the operators of its own slab only,
+    so that the operator memory and the work of the field-free propagation
+    are divided among the workers without any communication.
+
+    If `field` is given, the channels are coupled by the dipole interaction
+    as in `Propagator_on_Spherical_Box_with_single_m_and_field`.
+    Each worker propagates the pairs `(l,l+1)` whose lower channel is in
+    its slab, thus only the first channel of the next slab is touched
+    across a slab boundary. Since the pairs with even and odd `l-m` are
+    propagated in separate phases separated by a barrier, the pairs within
+    a phase are disjoint and the workers never write the same channel
+    at the same time.
+
+    The workers are forked where possible, thus inherit `field`
+    without pickling. Call `close()` (or use the `with` statement) to stop
+    the workers and release the shared memory.
+    """
+
+    def __init__(self, Nr, dr, m, lmax, Vr=0.0, hbar=1.0, mass=1.0,
+                 field=None, gauge='length', q=-1.0, num_workers=None,
+                 cache_factorization=False, r_arr=None, coulomb_Z=None,
+                 absorber=None):
+        """
+        Initialize
+
+        Parameters
+        ----------
+        field : callable or None
+            the electric field `E(t)` or the vector potential `A(t)`
+            depending on `gauge`. See
+            `Propagator_on_Spherical_Box_with_single_m_and_field`.
+        num_workers : int or None
+            the number of worker processes. If None, the number of CPUs.
+            It is capped by the number of channels.
+        cache_factorization : bool
+            See `Propagator_on_Spherical_Box_with_single_m`.
+        r_arr : (Nr,) array-like or None
+            the nonuniform radial grid, if given.
+            See `Wavefunction_on_Spherical_Box_with_single_m`.
+        coulomb_Z : float or None
+            See `Propagator_on_Spherical_Box_with_single_m`.
+        absorber : tdse.propagator.absorber.Absorber or None
+            See `Propagator_on_Spherical_Box_with_single_m`.
+            Each worker counts the timesteps for a mask on its own,
+            which stay in step since all workers propagate together.
+        """
+        self.wf = Wavefunction_on_Spherical_Box_with_single_m(
+                Nr, dr, m, lmax, r_arr=r_arr)
+        for _attr in ("Nr","dr","m","lmax","l","Nlm","lm","r_max","r_arr"):
+            setattr(self, _attr, getattr(self.wf, _attr))
+        self.hbar, self.mass = hbar, mass
+
+        if num_workers is None: num_workers = os.cpu_count() or 1
+        if not isinstance(num_workers, Integral) or num_workers < 1:
+            _msg = "`num_workers` should be a positive integer. Given: {}"
+            raise ValueError(_msg.format(num_workers))
+        self.num_workers = min(num_workers, self.Nlm)
+
+        _bounds = np.linspace(0, self.Nlm, self.num_workers+1).round()
+        self.channel_slices = [slice(int(_start), int(_stop))
+                for _start, _stop in zip(_bounds[:-1], _bounds[1:])]
+
+        self.field = field
+        _prop_args = (self.Nr, self.dr, self.m, self.lmax)
+        _prop_kwargs = {'Vr': Vr, 'hbar': hbar, 'mass': mass,
+                'cache_factorization': cache_factorization, 'r_arr': r_arr,
+                'coulomb_Z': coulomb_Z, 'absorber': absorber}
+        if field is not None:
+            if not callable(field):
+                _msg = "`field` should be a callable. Given: {}"
+                raise ValueError(_msg.format(field))
+            _prop_kwargs.update({'field': field, 'gauge': gauge, 'q': q})
+
+        _shape = (self.Nlm, self.Nr)
+        _nbytes = int(np.prod(_shape)) * np.dtype(complex).itemsize
+        self._shm = shared_memory.SharedMemory(create=True, size=_nbytes)
+        self.wf_arr = np.ndarray(_shape, dtype=complex, buffer=self._shm.buf)
+        self.wf_arr[:] = 0.0
+
+        _ctx = get_mp_context()
+        self._conns, self._workers = [], []
+        try:
+            for _channels in self.channel_slices:
+                _conn, _worker_conn = _ctx.Pipe()
+                _worker = _ctx.Process(target=_channel_worker, daemon=True,
+                        args=(_worker_conn, self._shm.name, _shape, _channels,
+                              _prop_args, _prop_kwargs))
+                _worker.start()
+                self._conns.append(_conn)
+                self._workers.append(_worker)
+            self._collect()
+        except BaseException:
+            self.close()
+            raise
+
+
+    def _collect(self):
+        """Wait for all workers to finish and reraise an error if any"""
+        _errors = [_conn.recv() for _conn in self._conns]
+        for _error in _errors:
+            if _error is not None: raise _error
+
+
+    def _run(self, *cmd):
+        """Send the command to all workers and wait for them to finish"""
+        for _conn in self._conns: _conn.send(cmd)
+        self._collect()
+
+
+    def _check_wf(self, wf):
+        if wf is None: return self.wf_arr
+        if not isinstance(wf, np.ndarray) or wf.dtype != complex:
+            raise ValueError("The wavefunction should be a complex type numpy array")
+        if wf.shape != self.wf_arr.shape:
+            _msg = "The wavefunction should be of shape {}. Given: {}"
+            raise ValueError(_msg.format(self.wf_arr.shape, wf.shape))
+        return wf
+
+
+    def propagate(self, wf=None, dt=None, Nt=1):
+        """
+        Propagate the wavefunction without field, in-place
+
+        Parameters
+        ----------
+        wf : (Nlm, Nr) numpy.ndarray of complex type or None
+            If None or `wf_arr` itself, the shared wavefunction `wf_arr` is
+            propagated without copying. Otherwise, `wf` is copied into
+            and back from `wf_arr`.
+        """
+        _wf = self._check_wf(wf)
+        if not isinstance(Nt, Integral) or Nt < 0:
+            _msg = "`Nt` should be a nonnegative integer. Given: {}"
+            raise ValueError(_msg.format(Nt))
+        if _wf is not self.wf_arr: self.wf_arr[:] = _wf
+        self._run('propagate', dt, Nt)
+        if _wf is not self.wf_arr: _wf[:] = self.wf_arr
+
+
+    def _propagate_interaction(self, tau, field_t):
+        self._run('pairs', 0.5*tau, field_t, 0)
+        self._run('pairs', tau, field_t, 1)
+        self._run('pairs', 0.5*tau, field_t, 0)
+
+
+    def propagate_with_field(self, wf, dt, t_start, Nt=1):
+        """
+        Propagate the wavefunction in the presence of the field
+
+        See `propagate()` for `wf`.
+
+        Returns
+        -------
+        t_final : float
+            time after the propagation ends
+        """
+        if self.field is None:
+            raise ValueError("The `field` was not given")
+        _wf = self._check_wf(wf)
+        if not isinstance(Nt, Integral) or Nt <= 0:
+            raise ValueError("`Nt` should be a positive integer. Given: {}".format(Nt))
+        _dt, _t = float(dt), float(t_start)
+
+        if _wf is not self.wf_arr: self.wf_arr[:] = _wf
+        for _it in range(Nt):
+            _field_t = self.field(_t + 0.5*_dt)
+            self._propagate_interaction(0.5*_dt, _field_t)
+            self._run('propagate', _dt, 1)
+            self._propagate_interaction(0.5*_dt, _field_t)
+            _t += _dt
+        if _wf is not self.wf_arr: _wf[:] = self.wf_arr
+
+        return _t
+
+
+    def close(self):
+        """Stop the workers and release the shared memory"""
+        for _conn, _worker in zip(self._conns, self._workers):
+            try: _conn.send(('close',))
+            except (BrokenPipeError, OSError): pass
+        for _worker in self._workers: _worker.join()
+        for _conn in self._conns: _conn.close()
+        self._conns, self._workers = [], []
+        if self._shm is not None:
+            del self.wf_arr
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self): return self
+
+    def __exit__(self, *exc_info): self.close()
+
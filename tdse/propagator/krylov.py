@@ -0,0 +1,275 @@
+"""Short-iterative Lanczos (Krylov subspace) propagator"""
+
+from numbers import Integral, Real
+
+import numpy as np
+from scipy.linalg import expm
+
+from .box1d import Propagator_on_1D_Box_with_field
+from ..tridiag import (tridiag_forward, tridiag_factorize,
+        tridiag_backward_factorized)
+
+
+def krylov_step(apply_H, wf, tau, hbar=1.0, tol=1e-12, max_dim=30,
+                hermitian=True):
+    """
+    Evaluate `exp(-i*H*tau/hbar) * wf` in a Krylov subspace of `H`
+    whose dimension grows until the estimated error gets below `tol`
+
+    The error is estimated by the standard a-posteriori estimate
+    `beta_m * |[exp(-i*T_m*tau/hbar)]_{m,1}|` (relative to the norm of `wf`)
+    where `T_m` is the projection of `H` onto the subspace
+    and `beta_m` is the norm of the next (unnormalized) basis vector.
+
+    Parameters
+    ----------
+    apply_H : callable
+        returns `H * v` for a given vector `v`
+    hermitian : bool
+        If True, the Lanczos (three-term) recurrence is used.
+        Otherwise, the Arnoldi process with full orthogonalization is used,
+        e.g. for a Hamiltonian with a complex absorbing potential.
+
+    Returns
+    -------
+    wf_tau : numpy.ndarray or None
+        propagated wavefunction, or None if the tolerance could not be
+        reached within `max_dim` dimensions
+    err : float
+        estimated relative error
+    dim : int
+        dimension of the Krylov subspace used
+    """
+    _wf = np.asarray(wf, dtype=complex)
+    _norm = np.linalg.norm(_wf)
+    if _norm == 0: return _wf.copy(), 0.0, 0
+
+    _V = np.empty((max_dim+1,) + _wf.shape, dtype=complex)
+    _T = np.zeros((max_dim+1, max_dim), dtype=complex)
+    _V[0] = _wf / _norm
+    _coef = -1.j * tau / hbar
+    _err = np.inf
+    for _j in range(max_dim):
+        _w = apply_H(_V[_j])
+        if hermitian:
+            _alpha = np.vdot(_V[_j], _w).real
+            _w -= _alpha * _V[_j]
+            if _j > 0: _w -= _T[_j,_j-1] * _V[_j-1]
+            _T[_j,_j] = _alpha
+        else:
+            for _i in range(_j+1):
+                _h = np.vdot(_V[_i], _w)
+                _w -= _h * _V[_i]
+                _T[_i,_j] = _h
+        _beta = np.linalg.norm(_w)
+        _T[_j+1,_j] = _beta
+        if hermitian and _j+1 < max_dim: _T[_j,_j+1] = _beta
+
+        _m = _j + 1
+        _c = expm(_coef * _T[:_m,:_m])[:,0]
+        _err = _beta * abs(_c[-1])
+        if _err < tol or _beta < 1e-14:
+            _wf_tau = _norm * np.tensordot(_c, _V[:_m], axes=(0,0))
+            return _wf_tau, _err, _m
+        _V[_m] = _w / _beta
+    return None, _err, max_dim
+
+
+# Coefficients of the fourth-order commutator-free Magnus integrator
+# with two exponentials at the Gauss-Legendre nodes
+_cfm4_nodes = (0.5 - np.sqrt(3.)/6., 0.5 + np.sqrt(3.)/6.)
+_cfm4_weights = ((3. + 2.*np.sqrt(3.))/12., (3. - 2.*np.sqrt(3.))/12.)
+
+
+def _magnus_exponents(apply_H_t, t, tau, order):
+    """
+    Return the list of (duration, operator) whose exponentials,
+    applied in order, approximate the propagator from `t` to `t + tau`
+    """
+    if order == 2:
+        _t_mid = t + 0.5 * tau
+        return [(tau, lambda _v: apply_H_t(_v, _t_mid))]
+    elif order == 4:
+        _t1, _t2 = (t + _c * tau for _c in _cfm4_nodes)
+        _exponents = []
+        for _w1, _w2 in (_cfm4_weights, _cfm4_weights[::-1]):
+            # exp(-i*tau*(w1*H1 + w2*H2)) with w1 + w2 = 1/2
+            _apply = lambda _v, _w1=_w1, _w2=_w2: \
+                    2. * (_w1 * apply_H_t(_v, _t1) + _w2 * apply_H_t(_v, _t2))
+            _exponents.append((0.5 * tau, _apply))
+        return _exponents
+    else: raise ValueError("`order` should be 2 or 4. Given: {}".format(order))
+
+
+def krylov_propagate(apply_H_t, wf, t_start, dt, hbar=1.0, tol=1e-12,
+                     max_dim=30, hermitian=True, tau=None, order=2):
+    """
+    Propagate `wf` in-place from `t_start` to `t_start + dt`
+    by substeps whose length is controlled by the Krylov error estimate
+
+    For `order=2`, each substep `tau` is propagated by
+    `exp(-i*H(t+tau/2)*tau/hbar)`, i.e. the exponential midpoint rule.
+    For `order=4`, the fourth-order commutator-free Magnus integrator
+    with two exponentials is used, each of which costs twice the
+    matrix-vector products since `H` is evaluated at two times.
+    When the tolerance can't be reached within `max_dim` dimensions,
+    the substep is shrunk according to the estimated error and retried.
+
+    Parameters
+    ----------
+    apply_H_t : callable
+        returns `H(t) * v` for given `v` and `t`
+    tau : float or None
+        initial trial substep. If None, `dt` is tried first.
+    order : 2 or 4
+        order of accuracy with respect to the time-dependence of `H`
+
+    Returns
+    -------
+    tau : float
+        the last accepted substep, to be used as a trial for the next call
+    num_of_matvec : int
+        the number of matrix-vector products spent
+    """
+    _t, _t_end = float(t_start), float(t_start) + float(dt)
+    _tau = float(dt) if tau is None else min(float(tau), float(dt))
+    _num_of_matvec = 0
+    while _t_end - _t > 1e-14 * abs(dt):
+        _tau = min(_tau, _t_end - _t)
+        _exponents = _magnus_exponents(apply_H_t, _t, _tau, order)
+        _wf_tau, _dim_max = wf, 0
+        for _duration, _apply_H in _exponents:
+            _wf_tau, _err, _dim = krylov_step(_apply_H, _wf_tau, _duration,
+                    hbar=hbar, tol=tol, max_dim=max_dim, hermitian=hermitian)
+            _num_of_matvec += _dim * (1 if order == 2 else 2)
+            _dim_max = max(_dim, _dim_max)
+            if _wf_tau is None: break
+        if _wf_tau is None:
+            _tau *= max(0.1, 0.9 * (tol / _err)**(1./max_dim))
+            continue
+        wf[:] = _wf_tau
+        _t += _tau
+        # Let the substep grow back if the subspace was small enough
+        if _dim_max < max_dim // 2: _tau *= 1.5
+    return _tau, _num_of_matvec
+
+
+
+class Lanczos_Propagator_on_1D_Box_with_field(Propagator_on_1D_Box_with_field):
+    """
+    A propagator for a one-dimensional box with a field in velocity gauge
+    by the short-iterative Lanczos method
+
+    The Hamiltonian `H(t) = H0 - q*A(t)*p/m` is applied with the same
+    tridiagonal matrices as the Crank-Nicolson propagator:
+    `H0 = M2^{-1}*M2H` and `p = -i*hbar*M1^{-1}*D1`.
+    Each timestep is propagated by a commutator-free Magnus integrator
+    of order `magnus_order` (2: exponential midpoint rule, 4: two 
+    exponentials at the Gauss nodes) with each exponential evaluated in
+    a Krylov subspace of adaptive dimension. Timesteps are substepped
+    where needed to keep the Krylov error estimate below `krylov_tol`.
+
+    The number of matrix-vector products spent so far is counted
+    in `num_of_matvec` for comparing the cost with other propagators.
+    With an absorbing potential or complex scaling (see `absorber`), 
+    the Hamiltonian isn't Hermitian and the Arnoldi process is used
+    instead of the Lanczos recurrence.
+    """
+
+    def __init__(self, N, dx, Vx, At, q=-1.0, x0=0.0, hbar=1.0, mass=1.0,
+                 krylov_tol=1e-12, max_krylov_dim=30, magnus_order=4,
+                 absorber=None):
+        super().__init__(N, dx, Vx, At, q=q, x0=x0, hbar=hbar, mass=mass,
+                absorber=absorber)
+
+        if not (float(krylov_tol) > 0):
+            _msg = "`krylov_tol` should be a positive real number. Given: {}"
+            raise ValueError(_msg.format(krylov_tol))
+        self.krylov_tol = float(krylov_tol)
+        if not isinstance(max_krylov_dim, Integral) or max_krylov_dim < 2:
+            _msg = "`max_krylov_dim` should be an integer >= 2. Given: {}"
+            raise ValueError(_msg.format(max_krylov_dim))
+        self.max_krylov_dim = max_krylov_dim
+        if magnus_order not in (2, 4):
+            _msg = "`magnus_order` should be 2 or 4. Given: {}"
+            raise ValueError(_msg.format(magnus_order))
+        self.magnus_order = magnus_order
+
+        self._M1_factor = tridiag_factorize(self.M1, dtype=complex)
+        self._M1HA_over_ihbar_At = self.M1HA_over_ihbar_At.astype(complex)
+        self._tau = None
+        self.num_of_matvec = 0
+
+
+    def apply_hamiltonian_with_field(self, wf, t):
+        """Evaluate `H(t) * wf`"""
+        _H_wf = self.apply_hamiltonian(wf)
+        _A_t = self.A(t)
+        if _A_t != 0:
+            _M1HA_wf = np.empty_like(_H_wf)
+            tridiag_forward(self._M1HA_over_ihbar_At,
+                    np.asarray(wf, dtype=complex), _M1HA_wf)
+            _HA_wf = np.empty_like(_H_wf)
+            tridiag_backward_factorized(self._M1_factor, _HA_wf, _M1HA_wf)
+            _H_wf += (1.j * self.hbar * _A_t) * _HA_wf
+        return _H_wf
+
+
+    def propagate_with_field(self, wf, dt, t_start, Nt=1, order=None, 
+                             mask=True):
+        """Propagate the wavefunction in the presence of the field
+
+        Parameters
+        ----------
+        order : 2, 4 or None
+            order of the Magnus integrator. If None, `magnus_order`.
+        mask : bool
+            If False, the mask of the absorber, if any, is neither applied
+            nor counted, e.g. for trial steps which may be rejected.
+
+        Returns
+        -------
+        t_final : float
+            time after the propagation ends
+        """
+        if not isinstance(wf, np.ndarray) or wf.dtype != complex:
+            raise ValueError("The wavefunction should be a complex type numpy array")
+        if not isinstance(float(t_start), Real):
+            raise ValueError("`t_start` should be a real number. Given: {}".format(t_start))
+        if not isinstance(float(dt), Real):
+            raise ValueError("`dt` should be a real number. Given: {}".format(dt))
+        if not isinstance(Nt, Integral) or Nt <= 0:
+            raise ValueError("`Nt` should be a positive integer. Given: {}".format(Nt))
+        _order = self.magnus_order if order is None else order
+        if _order not in (2, 4):
+            _msg = "`order` should be 2, 4 or None. Given: {}"
+            raise ValueError(_msg.format(order))
+        _dt, _t = float(dt), float(t_start)
+
+        for _it in range(Nt):
+            self._tau, _num_of_matvec = krylov_propagate(
+                    self.apply_hamiltonian_with_field, wf, _t, _dt,
+                    hbar=self.hbar, tol=self.krylov_tol,
+                    max_dim=self.max_krylov_dim, tau=self._tau,
+                    order=_order, 
+                    hermitian=self.absorbing_layer.hermitian)
+            self.num_of_matvec += _num_of_matvec
+            if mask: self.absorbing_layer.apply_mask(wf)
+            _t += _dt
+
+        return _t
+
+
+    def propagate_with_field_adaptive(self, wf, t_start, t_end, dt_max, 
+                                      tol=1e-8, order=None, max_level=20):
+        """
+        Propagate the wavefunction in the presence of the field
+        from `t_start` to `t_end` with a timestep adapted to the local error
+
+        See `Propagator_on_1D_Box_with_field.propagate_with_field_adaptive()`
+        with `order` the order of the Magnus integrator, 2 or 4.
+        If None, `magnus_order`.
+        """
+        if order is None: order = self.magnus_order
+        return super().propagate_with_field_adaptive(wf, t_start, t_end, 
+                dt_max, tol=tol, order=order, max_level=max_level)
@@ -0,0 +1,157 @@
+"""Parareal parallel-in-time driver for field propagation"""
+
+from numbers import Integral
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ..parallel import get_mp_context
+
+
+# Propagation function of each worker process, set by `_init_worker()`
+_worker_propagate = None
+
+def _init_worker(propagate):
+    global _worker_propagate
+    _worker_propagate = propagate
+
+def _get_absorbing_layer(propagate_with_field):
+    """Return the absorbing layer of the propagator of the method, if any"""
+    return getattr(getattr(propagate_with_field, '__self__', None), 
+            'absorbing_layer', None)
+
+def _propagate_slice_in_worker(wf, dt, t_start, Nt, num_steps=None):
+    return _fine_in_place(_worker_propagate, wf, dt, t_start, Nt, num_steps)
+
+
+def propagate_parareal(propagate_with_field, wf, t_start, t_end, num_slices,
+                       dt_fine, dt_coarse, tol=1e-10, max_iter=None,
+                       num_workers=None, executor=None):
+    """
+    Propagate `wf` in-place from `t_start` to `t_end`
+    by the Parareal algorithm
+
+    The time interval is divided into `num_slices` slices.
+    A cheap coarse propagation (timestep about `dt_coarse`) sweeps
+    over the slices serially, while the fine propagations
+    (timestep about `dt_fine`) of all slices run in parallel.
+    The slice boundary states are corrected iteratively by
+
+    .. math::
+
+        U_{n+1}^{k+1} = G(U_n^{k+1}) + F(U_n^{k}) - G(U_n^{k})
+
+    until the largest relative change of the boundary states falls below
+    `tol`. After `k` iterations the first `k` slices are exact (i.e.
+    equal to the serial fine propagation), so the iteration ends
+    after at most `num_slices` iterations.
+
+    Parameters
+    ----------
+    propagate_with_field : callable
+        with the signature `(wf, dt, t_start, Nt)`, propagating `wf`
+        in-place by `Nt` timesteps of `dt` from `t_start`, e.g.
+        `Propagator_on_1D_Box_with_field.propagate_with_field` or
+        `LinearPolariVelocityGaugeSystem.propagate_with_field`
+    num_workers : int or None
+        the number of worker processes. If None, the number of CPUs.
+    executor : concurrent.futures.Executor or None
+        If given, it is used for the fine propagations instead of
+        a new process pool and `propagate_with_field` should be picklable
+        (or shared, for a thread pool).
+        Workers of a new process pool are forked where possible,
+        thus inherit `propagate_with_field` without pickling.
+
+    If `propagate_with_field` is a method of a propagator with 
+    an `absorbing_layer`, the steps counted for its mask are kept 
+    as those of the serial propagation: the fine (coarse) propagation 
+    of the `n`-th slice counts from the `n*Nt_fine`-th (`n*Nt_coarse`-th)
+    step, and the count ends at `num_slices*Nt_fine` steps after 
+    the initial one. With a thread pool as `executor`, the slices share
+    the count, thus a single thread should be used for the mask.
+
+    Returns
+    -------
+    num_iter : int
+        the number of Parareal iterations done
+    """
+    if not isinstance(num_slices, Integral) or num_slices < 1:
+        _msg = "`num_slices` should be a positive integer. Given: {}"
+        raise ValueError(_msg.format(num_slices))
+    _t_start, _t_end = float(t_start), float(t_end)
+    if not (_t_end > _t_start):
+        _msg = "`t_end` should be larger than `t_start`. Given: {}, {}"
+        raise ValueError(_msg.format(t_end, t_start))
+    if not (0 < dt_fine <= dt_coarse):
+        _msg = "It should be `0 < dt_fine <= dt_coarse`. Given: {}, {}"
+        raise ValueError(_msg.format(dt_fine, dt_coarse))
+    _max_iter = num_slices if max_iter is None else int(max_iter)
+
+    _t_slices = np.linspace(_t_start, _t_end, num_slices+1)
+    _slice_len = (_t_end - _t_start) / num_slices
+    _Nt_fine = max(1, int(round(_slice_len / dt_fine)))
+    _Nt_coarse = max(1, int(round(_slice_len / dt_coarse)))
+    _dt_fine, _dt_coarse = _slice_len / _Nt_fine, _slice_len / _Nt_coarse
+
+    # The absorbing layer counting the timesteps for its mask, if any
+    _layer = _get_absorbing_layer(propagate_with_field)
+    _num_steps_start = None if _layer is None else _layer.num_steps
+
+    def _coarse(_wf, _n):
+        _wf_next = np.array(_wf, dtype=complex, copy=True)
+        if _layer is not None:
+            _layer.num_steps = _num_steps_start + _n * _Nt_coarse
+        propagate_with_field(_wf_next, _dt_coarse, _t_slices[_n], _Nt_coarse)
+        return _wf_next
+
+    # Initial serial coarse sweep
+    _U = [np.array(wf, dtype=complex, copy=True)]
+    _G = []
+    for _n in range(num_slices):
+        _G.append(_coarse(_U[_n], _n))
+        _U.append(_G[_n].copy())
+
+    _own_executor = executor is None
+    if _own_executor:
+        executor = ProcessPoolExecutor(max_workers=num_workers,
+                mp_context=get_mp_context(), initializer=_init_worker,
+                initargs=(propagate_with_field,))
+        _fine_job = _propagate_slice_in_worker
+    else: _fine_job = partial(_fine_in_place, propagate_with_field)
+
+    _num_iter = 0
+    try:
+        for _k in range(_max_iter):
+            _futures = [executor.submit(_fine_job, _U[_n], _dt_fine,
+                _t_slices[_n], _Nt_fine, 
+                None if _layer is None else _num_steps_start + _n * _Nt_fine)
+                for _n in range(_k, num_slices)]
+            _F = [_future.result() for _future in _futures]
+            _num_iter += 1
+
+            _max_rel_change = 0.0
+            for _n in range(_k, num_slices):
+                _G_new = _coarse(_U[_n], _n)
+                _U_new = _G_new + _F[_n-_k] - _G[_n]
+                _G[_n] = _G_new
+                _rel_change = np.linalg.norm(_U_new - _U[_n+1]) \
+                        / np.linalg.norm(_U_new)
+                _max_rel_change = max(_max_rel_change, _rel_change)
+                _U[_n+1] = _U_new
+            if _max_rel_change < tol: break
+    finally:
+        if _own_executor: executor.shutdown()
+        if _layer is not None:
+            _layer.num_steps = _num_steps_start + num_slices * _Nt_fine
+
+    wf[:] = _U[-1]
+    return _num_iter
+
+
+def _fine_in_place(propagate_with_field, wf, dt, t_start, Nt, num_steps=None):
+    _wf = wf.copy()
+    if num_steps is not None:
+        _get_absorbing_layer(propagate_with_field).num_steps = num_steps
+    propagate_with_field(_wf, dt, t_start, Nt)
+    return _wf
@@ -5,18 +5,24 @@ from math import pi
 import numpy as np
 from numpy import asarray, sum
 
-from ._base import Wavefunction
+from ._base import Wavefunction, _eval_f_and_derivs_by_FD
+from .radial_grid import check_r_arr, get_r_weights
+from .absorber import Absorbing_Layer
 
 class Wavefunction_on_Uniform_Grid_Polar_Box_Over_r(Wavefunction):
     """
     A support class for managing specification of wavefunction
     defined on a uniform radial grid in a polar box
+
+    The methods also accept a nonuniform radial grid `r_arr`,
+    in which case `dr` is the quadrature weights `r_weights` of the grid
+    for `norm_sq()` and is ignored otherwise.
     """
 
     dim = 2
 
     @staticmethod
-    def eval_at_real_space(wf, dr, phi):
+    def eval_at_real_space(wf, dr, phi, r_arr=None):
         _phi = asarray(phi)
         if _phi.ndim == 0 and int(_phi) == _phi:
             _phi = np.linspace(0, 2.*pi, int(_phi))
@@ -34,7 +40,8 @@ class Wavefunction_on_Uniform_Grid_Polar_Box_Over_r(Wavefunction):
         _m_arr = np.arange(-_max_m, _max_m+1, dtype=int)
         _exp_imphi = np.exp(1.j*np.outer(_m_arr, _phi))
         
-        _r_arr = dr * np.arange(1, _Nr+1)
+        if r_arr is None: _r_arr = dr * np.arange(1, _Nr+1)
+        else: _r_arr = asarray(r_arr)
         
         _wf_real_space = 1./ _r_arr \
                 * np.einsum(_wf, [0, 1], _exp_imphi, [0, 2],[2, 1]) 
@@ -42,7 +49,7 @@ class Wavefunction_on_Uniform_Grid_Polar_Box_Over_r(Wavefunction):
 
 
     @staticmethod
-    def norm_sq(wf, dr):
+    def norm_sq(wf, dr, r_arr=None):
         """Evalaute the norm square of the given wavefunction array
         
         Parameters
@@ -50,13 +57,19 @@ class Wavefunction_on_Uniform_Grid_Polar_Box_Over_r(Wavefunction):
         wf : (..., Nm, Nr) array-like
             a single or an array of wavefunction arrays
             with each wavefunction of shape (Nm, Nr)
-        dr : float
-            a grid spacing of the radial grid
+        dr : float or (Nr,) array-like
+            a grid spacing of the uniform radial grid,
+            or the quadrature weights of the nonuniform grid `r_arr`
+        r_arr : (Nr,) array-like or None
+            the nonuniform radial grid, if any
         """
         _wf = asarray(wf)
         _Nr = _wf.shape[-1]
-        _r_arr = dr * np.arange(1,_Nr+1)
+        if r_arr is None: _r_arr = dr * np.arange(1,_Nr+1)
+        else: _r_arr = asarray(r_arr)
         _wf_abs_sq = np.real(_wf.conj() * _wf)
+        if np.ndim(dr) > 0: 
+            return 2.* pi * sum(sum(_wf_abs_sq / _r_arr * dr, axis=-1), axis=-1)
         return 2.* pi * dr * sum(sum(_wf_abs_sq / _r_arr, axis=-1), axis=-1)
 
 
@@ -70,22 +83,27 @@ class Wavefunction_on_Uniform_Grid_Polar_Box_Over_r(Wavefunction):
 
 
     @classmethod
-    def wf2Rm(cls, wf, dr):
+    def wf2Rm(cls, wf, dr, r_arr=None):
         _wf = asarray(wf)
         _Nm, _Nr = cls.get_each_dimension_of_wf_array(_wf)
         
-        _grid_dr = float(dr)
-        if not (_grid_dr > 0): 
-            _msg = "A grid spacing should be a positive real number. Given: {}"
-            raise ValueError(_msg.format(grid_dr))
-        _r_arr = _grid_dr * np.arange(1, _Nr+1)
+        if r_arr is None:
+            _grid_dr = float(dr)
+            if not (_grid_dr > 0): 
+                _msg = "A grid spacing should be a positive real number. Given: {}"
+                raise ValueError(_msg.format(dr))
+            _r_arr = _grid_dr * np.arange(1, _Nr+1)
+        else: _r_arr = check_r_arr(r_arr, _Nr)
 
         _Rm_rn_shape = (_Nm, 1+_Nr+1)
         _Rm_rn = np.empty(_Rm_rn_shape, dtype=_wf.dtype)
         _Rm_rn[:,[0,-1]] = 0.0
         _Rm_rn[:,1:-1] = _wf / _r_arr
         # 2nd order finite difference approximation
-        _Rm_rn[0,0] = 2.*_Rm_rn[0,1] - _Rm_rn[0,2] 
+        if r_arr is None: _Rm_rn[0,0] = 2.*_Rm_rn[0,1] - _Rm_rn[0,2] 
+        else:
+            _r1, _r2 = _r_arr[:2]
+            _Rm_rn[0,0] = (_r2*_Rm_rn[0,1] - _r1*_Rm_rn[0,2]) / (_r2 - _r1)
         return _Rm_rn
 
 
@@ -101,9 +119,13 @@ class Wavefunction_on_Uniform_Grid_Polar_Box_Over_r(Wavefunction):
             raise ValueError(_msg.format(_Rm.shape, _Rm_shape_expected))
 
     @classmethod
-    def eval_wf_with_wf_deriv_at_q(cls, q, Rm_rn, grid_dr):
+    def eval_wf_with_wf_deriv_at_q(cls, q, Rm_rn, grid_dr, r_arr=None):
         """
         Evaluate wavefunction and its partial derivatives at given coordinate
+
+        For a nonuniform grid, `r_arr` should be the grid points
+        including the boundaries `r=0` and `r=r_max`, 
+        i.e. of shape (Nr+2,), as `Rm_rn` is.
         """
         _r, _phi = q
         if _r < 0: _r, _phi = -_r, _phi+pi
@@ -113,6 +135,12 @@ class Wavefunction_on_Uniform_Grid_Polar_Box_Over_r(Wavefunction):
         assert (_Nm % 2) == 1
         _m_max = _Nm // 2
 
+        if r_arr is not None:
+            _Rm_derivs = _eval_f_and_derivs_by_FD(_r, _Rm_rn, None,
+                    _r_arr=asarray(r_arr))
+            return cls._eval_wf_with_wf_deriv_from_Rm_derivs(
+                    _Rm_derivs, _m_max, _phi)
+
         _grid_dr = float(grid_dr)
         if not (_grid_dr > 0): 
             _msg = "A grid spacing should be a positive real number. Given: {}"
@@ -141,6 +169,11 @@ class Wavefunction_on_Uniform_Grid_Polar_Box_Over_r(Wavefunction):
             raise RuntimeError("Failed to get Rm deriv at q={}".format(q))
         except: raise Exception("Unexpected error")
 
+        return cls._eval_wf_with_wf_deriv_from_Rm_derivs(
+                _Rm_derivs, _m_max, _phi)
+
+    @staticmethod
+    def _eval_wf_with_wf_deriv_from_Rm_derivs(_Rm_derivs, _m_max, _phi):
         # Evaluate exp(i*m*phi)
         _im_arr = 1.j * np.arange(-_m_max, _m_max+1, dtype=np.int)
         _exp_imphi = np.exp(_im_arr * _phi)
@@ -156,15 +189,20 @@ class Wavefunction_on_Uniform_Grid_Polar_Box_Over_r(Wavefunction):
 
 
 from ..evol import (get_M2_tridiag, get_D2_tridiag, mul_tridiag_and_diag, 
-                       get_M1_tridiag, get_D1_tridiag)
-from ..tridiag import tridiag_forward, tridiag_backward, get_tridiag_shape
+                       get_M1_tridiag, get_D1_tridiag, 
+                       get_M2_D2_tridiag_nonuniform, 
+                       get_M1_D1_tridiag_nonuniform)
+from ..tridiag import (get_tridiag_shape, tridiag_factorize, 
+        tridiag_factorize_inplace, tridiag_backward_factorized,
+        tridiag_forward_batch)
 
 class Propagator_on_Uniform_Grid_Polar_Box_Over_r(object):
     """Propagator object defined on a polar box with uniform grid"""
 
     wf_class = Wavefunction_on_Uniform_Grid_Polar_Box_Over_r
     
-    def __init__(self, Nr, dr, m_max, Vr=0.0, hbar=1.0, mass=1.0):
+    def __init__(self, Nr, dr, m_max, Vr=0.0, hbar=1.0, mass=1.0, 
+                 r_arr=None, absorber=None):
         """Initialize
         
         Parameters
@@ -177,6 +215,17 @@ class Propagator_on_Uniform_Grid_Polar_Box_Over_r(object):
             maximum azimuthal quantum number 'm'
         Vr : (Nr,) array-like
             radially symmetric potential values
+        r_arr : (Nr,) array-like or None
+            strictly increasing positive radial grid points of 
+            a nonuniform grid, discretized by the Numerov scheme 
+            generalized to nonuniform grids. If given, `dr` is the spacing
+            between the last grid point and the boundary of the box.
+            On a nonuniform grid, the norm is conserved only up to
+            the discretization error.
+        absorber : tdse.propagator.absorber.Absorber or None
+            If given, the absorbing layer at the outer boundary of the box,
+            e.g. `Polynomial_CAP`, `Mask_Absorber` or 
+            `Exterior_Complex_Scaling`.
             
         Notes
         -----
@@ -211,7 +260,7 @@ class Propagator_on_Uniform_Grid_Polar_Box_Over_r(object):
 
         self.wf_shape = (self.Nm, self.Nr)
         
-        if Vr == 0.0: self.Vr = np.zeros((self.Nr,), dtype=np.float)
+        if np.all(Vr == 0.0): self.Vr = np.zeros((self.Nr,), dtype=np.float)
         else:
             _Vr = asarray(Vr)
             if _Vr.shape != (self.Nr,):
@@ -223,34 +272,55 @@ class Propagator_on_Uniform_Grid_Polar_Box_Over_r(object):
         
         
         # Evaluate matrices for constructing propagator
-        self.r_arr = self.dr * np.arange(1, self.Nr+1)
+        self.uniform = r_arr is None
+        if self.uniform: self.r_arr = self.dr * np.arange(1, self.Nr+1)
+        else: self.r_arr = check_r_arr(r_arr, self.Nr)
         self.r_max = self.r_arr[-1] + dr
-        self.M2 = get_M2_tridiag(self.Nr)
+        self.r_bound_arr = np.concatenate(([0.0], self.r_arr, [self.r_max]))
+        self.r_weights = self.dr if self.uniform \
+                else get_r_weights(self.r_bound_arr)
+
+        # The operators are built on the complex-scaled radial grid, if any
+        self.absorbing_layer = Absorbing_Layer(absorber, self.r_bound_arr)
+        _r_bound_arr = self.absorbing_layer.scaled_bound_arr
+        if self.uniform and not self.absorbing_layer.scaled:
+            self.M2 = get_M2_tridiag(self.Nr)
+            _D2 = get_D2_tridiag(self.Nr, self.dr)
+            _M1 = get_M1_tridiag(self.Nr)
+            _D1 = get_D1_tridiag(self.Nr, self.dr)
+        else:
+            self.M2, _D2 = get_M2_D2_tridiag_nonuniform(_r_bound_arr)
+            _M1, _D1 = get_M1_D1_tridiag_nonuniform(_r_bound_arr)
         
         if self.M2.shape != get_tridiag_shape(self.Nr):
             raise Exception("Unexpected inner inconsistency on tridiag shape")
         
-        _M2Hm_shape = (self.Nm,) + get_tridiag_shape(self.Nr)
-        self.M2Hm = np.empty(_M2Hm_shape, dtype=self.Vr.dtype) 
-        
-        _D2 = get_D2_tridiag(self.Nr, self.dr)
         
         _hbar2m = 0.5 * self.hbar**2 / self.mass
         _Kr = - _hbar2m * _D2  # something like radial kinetic energy
         
         _alpha = 1  # exponent of r such that gm = r^alpha * Rm
 
-        _r_sq_arr = np.square(self.r_arr)
-        for _im, _m in enumerate(self.m_iter):
-            _Vm = self.Vr - _hbar2m * (_alpha*_alpha - _m*_m) / _r_sq_arr
-            _M2Vm = mul_tridiag_and_diag(self.M2, _Vm)
-            self.M2Hm[_im,:,:] = _Kr + _M2Vm
+        # M2*H_m = M2H0 + centrifugal_coefs[im] * M2_over_r_sq
+        # where the shift depends only on |m|
+        self.M2H0 = _Kr + mul_tridiag_and_diag(
+                self.M2, self.absorbing_layer.add_potential(self.Vr))
+        self.M2_over_r_sq = mul_tridiag_and_diag(
+                self.M2, 1.0 / np.square(_r_bound_arr[1:-1]))
+        _m_arr = np.arange(-self.m_max, self.m_max+1)
+        self.centrifugal_coefs = - _hbar2m * (_alpha*_alpha - _m_arr*_m_arr)
         
-        _D1 = get_D1_tridiag(self.Nr, self.dr)
         self.M1rH1 = (- _hbar2m * (1-2*_alpha)) * _D1
-        _M1 = get_M1_tridiag(self.Nr)
-        self.M1r = mul_tridiag_and_diag(_M1, self.r_arr)
+        self.M1r = mul_tridiag_and_diag(_M1, _r_bound_arr[1:-1])
 
+
+    @property
+    def M2Hm(self):
+        """
+        The stack of `M2*H_m` of shape (Nm, 3, Nr), constructed on demand
+        """
+        return self.M2H0 + self.centrifugal_coefs[:,np.newaxis,np.newaxis] \
+                * self.M2_over_r_sq
     
             
     def propagate(self, wf, dt, Nt=1):
@@ -267,7 +337,7 @@ class Propagator_on_Uniform_Grid_Polar_Box_Over_r(object):
         Nt : int
             number of timesteps
         """
-        _wf = wf
+        _wf = np.reshape(wf, self.wf_shape)
         _wf_1d = np.ravel(wf)
         if _wf_1d.shape != (self.Nm * self.Nr,):
             _msg = ("Inconsistent wavefunction shape given: {}\n"
@@ -279,42 +349,36 @@ class Propagator_on_Uniform_Grid_Polar_Box_Over_r(object):
             raise ValueError(_msg.format(Nr))
         _Nt = int(Nt)
         
-        _FO = (-0.5j*dt/self.hbar) * self.M2Hm
-        _unitary_forward_half = self.M2 + _FO
-        _unitary_backward_half = self.M2 - _FO
-
-#        _unitary_shape = (3,)+_wf_1d.shape
-#        _unitary_forward_half = np.swapaxes(
-#                self.M2+_FO, 0, 1).reshape(_unitary_shape)
-#        _unitary_backward_half = np.swapaxes(
-#                self.M2-_FO, 0, 1).reshape(_unitary_shape)
-        
         _FO1 = (-0.25j*dt/self.hbar) * self.M1rH1
         _uni1_forward_half_half = self.M1r + _FO1
-        _uni1_backward_half_half = self.M1r - _FO1
-        
-        
-        
-        # Iterate over time
-        _wf_1d_half = np.empty_like(_wf_1d, dtype=complex)
+        _uni1_backward_half_half = tridiag_factorize(self.M1r - _FO1)
+
+        # The channels are not coupled with each other, thus each channel
+        # is propagated over all timesteps in turn, with its operators
+        # constructed and factorized in reusable workspaces
+        _coef = -0.5j*dt/self.hbar
+        _Uf0 = self.M2 + _coef * self.M2H0
+        _Ub0 = self.M2 - _coef * self.M2H0
+        _Uf, _Ub = (np.empty(_U0.shape, dtype=complex) for _U0 in (_Uf0, _Ub0))
         _wf_m_half = np.empty((self.Nr,), dtype=complex)
-        
-        for _it in range(_Nt):
-            
-            for _im in range(self.Nm):
-                tridiag_forward(_uni1_forward_half_half,_wf[_im],_wf_m_half)
-                tridiag_backward(_uni1_backward_half_half,_wf[_im],_wf_m_half)
-            
-            for _im in range(self.Nm):
-                tridiag_forward(_unitary_forward_half[_im], _wf[_im], _wf_m_half)
-                tridiag_backward(_unitary_backward_half[_im], _wf[_im], _wf_m_half)
-
-#            tridiag_forward(_unitary_forward_half, _wf_1d, _wf_1d_half)
-#            tridiag_backward(_unitary_backward_half, _wf_1d, _wf_1d_half)
-            
-            for _im in range(self.Nm):
-                tridiag_forward(_uni1_forward_half_half,_wf[_im],_wf_m_half)
-                tridiag_backward(_uni1_backward_half_half,_wf[_im],_wf_m_half)
+        _mask = self.absorbing_layer.mask
+        _mask_steps = self.absorbing_layer.count_mask_steps(_Nt)
+        
+        for _wf_m, _c_m in zip(_wf, self.centrifugal_coefs):
+            np.add(_Uf0, (_coef * _c_m) * self.M2_over_r_sq, out=_Uf)
+            np.subtract(_Ub0, (_coef * _c_m) * self.M2_over_r_sq, out=_Ub)
+            _Ub_factor = tridiag_factorize_inplace(_Ub)
+
+            for _it in range(_Nt):
+                tridiag_forward_batch(_uni1_forward_half_half, _wf_m, _wf_m_half)
+                tridiag_backward_factorized(
+                        _uni1_backward_half_half, _wf_m, _wf_m_half)
+                tridiag_forward_batch(_Uf, _wf_m, _wf_m_half)
+                tridiag_backward_factorized(_Ub_factor, _wf_m, _wf_m_half)
+                tridiag_forward_batch(_uni1_forward_half_half, _wf_m, _wf_m_half)
+                tridiag_backward_factorized(
+                        _uni1_backward_half_half, _wf_m, _wf_m_half)
+                if _mask_steps[_it]: _wf_m *= _mask
             
             
     def propagate_to_ground_state(self, wf, dt=None, max_Nt=20000, 
@@ -328,14 +392,15 @@ class Propagator_on_Uniform_Grid_Polar_Box_Over_r(object):
                 raise ValueError(_msg.format(_dt))
         _imag_dt = -1.0j * _dt  # imaginary time for propagating to ground state
         
-        self.wf_class.normalize(wf, self.dr)
+        _normalizer_args = (self.r_weights, self.r_arr)
+        self.wf_class.normalize(wf, *_normalizer_args)
         _wf_prev = wf.copy()
         
         _max_iter = int(max_Nt / Nt_per_iter) + 1
         for _i in range(_max_iter):
             self.propagate(wf, _imag_dt, Nt=Nt_per_iter)
-            self.wf_class.normalize(wf, self.dr)
-            _norm = self.wf_class.norm_sq(wf - _wf_prev, self.dr)
+            self.wf_class.normalize(wf, *_normalizer_args)
+            _norm = self.wf_class.norm_sq(wf - _wf_prev, *_normalizer_args)
             if _norm < norm_thres: break
             _wf_prev = wf.copy()
         if _i >= _max_iter-1: raise Exception("Maximum iteration exceeded")
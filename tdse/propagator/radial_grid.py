@@ -0,0 +1,97 @@
+"""Nonuniform (mapped) radial grids for the polar and spherical boxes"""
+
+from numbers import Integral
+
+import numpy as np
+from scipy.optimize import brentq
+
+
+def check_r_arr(r_arr, Nr):
+    """
+    Return the given radial grid as an array after checking that
+    it consists of `Nr` strictly increasing positive points
+    """
+    _r_arr = np.array(r_arr, dtype=float)
+    if _r_arr.shape != (Nr,):
+        _msg = "`r_arr` should be of shape ({},). Given shape: {}"
+        raise ValueError(_msg.format(Nr, _r_arr.shape))
+    if not (_r_arr[0] > 0) or np.any(np.diff(_r_arr) <= 0):
+        raise ValueError("`r_arr` should be positive and strictly increasing")
+    return _r_arr
+
+
+def get_r_weights(r_bound_arr):
+    """
+    Return the quadrature weights `(r[i+1] - r[i-1]) / 2` of the radial grid
+    for functions vanishing at the boundaries
+
+    Parameters
+    ----------
+    r_bound_arr : (Nr+2,) array-like
+        the radial grid points including `r=0` and `r=r_max`
+    """
+    _r = np.asarray(r_bound_arr, dtype=float)
+    return 0.5 * (_r[2:] - _r[:-2])
+
+
+def get_sinh_r_arr(Nr, r_max, dr_min):
+    """
+    Return the radial grid `r_i = a*sinh(b*i)` for `i = 1, ..., Nr`
+    with `r_{Nr+1} = r_max`, i.e. `dr` of the returned grid is
+    `r_max - r_arr[-1]`
+
+    The spacing is about `dr_min = a*b` near the origin and grows
+    exponentially at `r >> a`.
+
+    Parameters
+    ----------
+    dr_min : float
+        the spacing near the origin.
+        should satisfy: `dr_min * (Nr+1) < r_max`
+    """
+    if not isinstance(Nr, Integral) or not (Nr > 1):
+        _msg = "`Nr` should be an integer larger than 1. Given: {}"
+        raise ValueError(_msg.format(Nr))
+    _N_total = Nr + 1
+    if not (0 < dr_min * _N_total < r_max):
+        _msg = ("It should be `0 < dr_min*(Nr+1) < r_max`, otherwise "
+                "use the uniform grid. Given: dr_min={}, Nr={}, r_max={}")
+        raise ValueError(_msg.format(dr_min, Nr, r_max))
+    # Solve (dr_min/b) * sinh(b*(Nr+1)) = r_max for b
+    _f = lambda _b: dr_min * np.sinh(_b * _N_total) / _b - r_max
+    _b_max = 1.0
+    while _f(_b_max) < 0: _b_max *= 2.
+    _b = brentq(_f, 1e-12, _b_max)
+    _a = dr_min / _b
+    _r_arr = _a * np.sinh(_b * np.arange(1, Nr+1))
+    return _r_arr
+
+
+def get_log_linear_r_arr(r_max, dr_min, dr_max, growth=1.05):
+    """
+    Return the radial grid whose spacing starts from `dr_min` near the origin,
+    grows geometrically by the factor `growth` (i.e. a logarithmic grid)
+    until it reaches `dr_max`, and then stays at `dr_max` (a linear grid)
+
+    The last spacing up to `r_max` is adjusted so that the grid ends
+    at the boundary `r_max` with `dr = r_max - r_arr[-1]`
+    between `0.5*dr_max` and `1.5*dr_max` in the linear part.
+
+    Returns
+    -------
+    r_arr : (Nr,) numpy.ndarray
+        the grid points, excluding `r=0` and `r=r_max`
+    """
+    if not (0 < dr_min <= dr_max < r_max):
+        _msg = ("It should be `0 < dr_min <= dr_max < r_max`. "
+                "Given: dr_min={}, dr_max={}, r_max={}")
+        raise ValueError(_msg.format(dr_min, dr_max, r_max))
+    if not (growth >= 1.0):
+        _msg = "`growth` should be a real number >= 1. Given: {}"
+        raise ValueError(_msg.format(growth))
+    _r_list, _r, _dr = [], 0.0, float(dr_min)
+    while _r + 1.5 * _dr < r_max:
+        _r += _dr
+        _r_list.append(_r)
+        _dr = min(_dr * growth, dr_max)
+    return np.array(_r_list, dtype=float)
@@ -3,6 +3,7 @@
 from numpy import pi, asarray
 
 from ._base import Wavefunction, _eval_f_and_derivs_by_FD
+from .radial_grid import check_r_arr, get_r_weights
 
 
 
@@ -65,12 +66,27 @@ class Wavefunction_on_Spherical_Box_with_single_m(Wavefunction):
     """
     A specification object for wavefunction defined on a spherical box
     with a single azimuthal quantum number `m`
+
+    The radial grid is uniform with spacing `dr` by default, or 
+    the given nonuniform grid `r_arr`, e.g. from `radial_grid` module.
     """
     
     dim = 3
 
-    def __init__(self, Nr, dr, m, lmax):
-        """Initialize"""
+    def __init__(self, Nr, dr, m, lmax, r_arr=None):
+        """
+        Initialize
+
+        Parameters
+        ----------
+        dr : float
+            the grid spacing of the uniform radial grid. 
+            If `r_arr` is given, the spacing between the last grid point 
+            and the boundary of the box, i.e. `r_max = r_arr[-1] + dr`
+        r_arr : (Nr,) array-like or None
+            strictly increasing positive radial grid points
+            of a nonuniform grid. If None, the uniform grid is used.
+        """
         
         # Check and set arguments as members
         if not isinstance(Nr, Integral) or not (Nr > 0):
@@ -99,9 +115,16 @@ class Wavefunction_on_Spherical_Box_with_single_m(Wavefunction):
         self.Nlm = _Nl
         self.lm = np.array([(l,self.m) for l in self.l], dtype=int)
         
-        self.r_arr = self.get_r_arr(self.Nr, self.dr)
+        self.uniform = r_arr is None
+        if self.uniform: self.r_arr = self.get_r_arr(self.Nr, self.dr)
+        else: self.r_arr = check_r_arr(r_arr, self.Nr)
         self.r_max = self.r_arr[-1] + dr
 
+        # Grid points including the boundaries and quadrature weights
+        self.r_bound_arr = np.concatenate(([0.0], self.r_arr, [self.r_max]))
+        if self.uniform: self.r_weights = self.dr
+        else: self.r_weights = get_r_weights(self.r_bound_arr)
+
         self.shape = (self.Nlm, self.Nr)
         
         # About spherical harmonics evaluation
@@ -123,16 +146,16 @@ class Wavefunction_on_Spherical_Box_with_single_m(Wavefunction):
         wf : (..., Nlm, Nr) array-like
             a single or an array of wavefunction arrays
             with each wavefunction of shape (Nlm, Nr)
-        dr : float
-            a grid spacing of the radial grid
+        dr : float or (Nr,) array-like
+            a grid spacing of the uniform radial grid,
+            or the quadrature weights `r_weights` of a nonuniform grid
         """
         _wf = asarray(wf)
-        _Nr = _wf.shape[-1]
-        _r_arr = cls.get_r_arr(_Nr, dr)
         _wf_abs_sq = np.real(_wf.conj() * _wf)
+        if np.ndim(dr) > 0: _wf_abs_sq *= asarray(dr)
         _norm_sq_lm = np.sum(_wf_abs_sq, axis=-1)
         _norm_sq_total = np.sum(_norm_sq_lm, axis=-1)
-        _norm_sq_total *= dr
+        if np.ndim(dr) == 0: _norm_sq_total *= dr
         return _norm_sq_total
 
     @classmethod
@@ -143,6 +166,36 @@ class Wavefunction_on_Spherical_Box_with_single_m(Wavefunction):
         _Nlm, _Nr = (1, _wf.size) if _wf.ndim == 1 else _wf.shape
         return _Nlm, _Nr
 
+    def interpolate_from(self, wf_spec, wf):
+        """
+        Interpolate the radial functions of the given wavefunction 
+        onto the radial grid of this object, channel by channel
+
+        Parameters
+        ----------
+        wf_spec : Wavefunction_on_Spherical_Box_with_single_m
+            specification object of the grid on which `wf` is defined.
+            It should have the same `m` and `lmax` with this object.
+        wf : (wf_spec.Nlm, wf_spec.Nr) array-like
+        """
+        if (wf_spec.m, wf_spec.lmax) != (self.m, self.lmax):
+            raise ValueError("`wf_spec` should have the same `m` and `lmax`")
+        _wf = asarray(wf)
+        if _wf.shape != wf_spec.shape:
+            _msg = "`wf` should be of shape {}. Given shape: {}"
+            raise ValueError(_msg.format(wf_spec.shape, _wf.shape))
+        _r_tot = wf_spec.r_bound_arr
+        _wf_tot = np.zeros((wf_spec.Nlm, 1+wf_spec.Nr+1), dtype=_wf.dtype)
+        _wf_tot[:,1:-1] = _wf
+        _interp = lambda _f: np.interp(self.r_arr, _r_tot, _f, right=0.0)
+        _wf_interp = np.empty(self.shape, dtype=_wf.dtype)
+        for _ilm in range(self.Nlm):
+            if np.iscomplexobj(_wf_tot):
+                _wf_interp[_ilm] = _interp(_wf_tot[_ilm].real) \
+                        + 1.j * _interp(_wf_tot[_ilm].imag)
+            else: _wf_interp[_ilm] = _interp(_wf_tot[_ilm])
+        return _wf_interp
+
     def wf2Rlm(self, wf):
         """
         Evaluate `Rlm = 1/r * wf` 
@@ -158,10 +211,40 @@ class Wavefunction_on_Spherical_Box_with_single_m(Wavefunction):
         _Rlm = np.empty(_Rlm_shape, dtype=_wf.dtype)
         _Rlm[:,[0,-1]] = 0.0
         _Rlm[:,1:-1] = _wf / self.r_arr
-        if self.m == 0:
+        if self.m == 0 and self.uniform:
             _Rlm[0,0] = 2.*_Rlm[0,1] - _Rlm[0,2]
+        elif self.m == 0:
+            _r1, _r2 = self.r_arr[:2]
+            _Rlm[0,0] = (_r2*_Rlm[0,1] - _r1*_Rlm[0,2]) / (_r2 - _r1)
             
         return _Rlm
+
+    def eval_Rlm_with_Rlm_deriv_at_r(self, r, Rlm):
+        """
+        Evaluate the radial functions and their radial derivatives
+        at the given radial coordinate `r`, for all channels at once
+
+        Parameters
+        ----------
+        r : float
+            should satisfy: `0 <= r < r_max`
+        Rlm : (Nlm, Nr+2) array-like
+            radial functions including the boundaries, e.g. from `wf2Rlm()`
+
+        Returns
+        -------
+        Rlm_r, dr_Rlm_r : (Nlm,) numpy.ndarray
+        """
+        if not (0 <= r < self.r_max):
+            _msg = "`r` is out of the box radius (={}). `r`={}"
+            raise ValueError(_msg.format(self.r_max, r))
+        _Rlm = asarray(Rlm)
+        _Nlm, _Nr_total = self.get_each_dimension_of_wf_array(_Rlm)
+        if _Nlm != self.Nlm or _Nr_total != 1+self.Nr+1:
+            raise ValueError("Inconsistent array shape for `Rlm`")
+        _Rlm_derivs = _eval_f_and_derivs_by_FD(r, _Rlm, self.dr,
+                _r_arr=None if self.uniform else self.r_bound_arr)
+        return _Rlm_derivs[0], _Rlm_derivs[1]
     
     def eval_wf_with_wf_deriv_at_q(self, q, Rlm):
         """
@@ -197,16 +280,8 @@ class Wavefunction_on_Spherical_Box_with_single_m(Wavefunction):
         assert _sin_theta >= 0.0 and _r >= 0.0
         _theta = np.arctan2(_sin_theta, _cos_theta)
 
-        if not (_r < self.r_max):
-            _msg = "`r` is out of the box radius (={}). `r`={}"
-            raise ValueError(_msg.format(self.r_max, _r))
-        
         # Evaluate Rlm and its derivatives
-        _Rlm = asarray(Rlm)
-        _Nlm, _Nr_total = self.get_each_dimension_of_wf_array(_Rlm)
-        if _Nlm != self.Nlm or _Nr_total != 1+self.Nr+1:
-            raise ValueError("Inconsistent array shape for `Rlm`")
-        _Rlm_derivs = _eval_f_and_derivs_by_FD(_r, _Rlm, self.dr)
+        _Rlm_derivs = self.eval_Rlm_with_Rlm_deriv_at_r(_r, Rlm)
 
         # Evaluate associated Legendre functions
         _Plm, _dtheta_Plm = Plm_and_dtheta_Plm_for_single_m(
@@ -252,15 +327,17 @@ class Wavefunction_on_Spherical_Box_with_single_m(Wavefunction):
         
 
 
-from numbers import Integral
-
-import numpy as np
-
 from ..evol import (get_M2_tridiag, get_D2_tridiag, 
-                       mul_tridiag_and_diag)
-from ..tridiag import tridiag_forward, tridiag_backward
+                       mul_tridiag_and_diag, get_M1_tridiag, get_D1_tridiag,
+                       get_M2_D2_tridiag_nonuniform, 
+                       get_M1_D1_tridiag_nonuniform,
+                       get_coulomb_corrected_M2_D2_first_diag)
+from ..tridiag import (tridiag_factorize, tridiag_backward_factorized,
+        tridiag_factorize_inplace, tridiag_forward_batch, tridiag_factorize_batch, 
+        tridiag_backward_factorized_batch)
 
 from ._base import Propagator
+from .absorber import Absorbing_Layer
 
 class Propagator_on_Spherical_Box_with_single_m(Propagator):
     """
@@ -269,60 +346,286 @@ class Propagator_on_Spherical_Box_with_single_m(Propagator):
     
     The wavefunction is expanded by a set of spherical harmonics.
     The radial functions are discretized on a uniform grid,
-    i.e. with a fixed grid spacing."""
+    i.e. with a fixed grid spacing, or on a given nonuniform grid
+    with the Numerov scheme generalized to nonuniform grids
+    (see `tdse.evol.get_M2_D2_tridiag_nonuniform()`).
+    On a nonuniform grid, the discretized Hamiltonian is not exactly 
+    symmetric with respect to the quadrature weights `r_weights`,
+    thus the norm is conserved only up to the discretization error.
+
+    The Hamiltonian of each channel, multiplied by `M2`, is stored as
+    a radial tridiagonal `M2H0` shared by all channels and
+    the centrifugal shift `centrifugal_coefs[il] * M2_over_r_sq`,
+    so that the operators take `O(Nr)` memory regardless of `lmax`."""
     
     wf_class = Wavefunction_on_Spherical_Box_with_single_m
+
+    # The maximum number of timesteps whose operators are kept factorized
+    _max_cached_operators = 8
     
-    def __init__(self, Nr, dr, m, lmax, Vr=0.0, hbar=1.0, mass=1.0):
+    def __init__(self, Nr, dr, m, lmax, Vr=0.0, hbar=1.0, mass=1.0,
+                 channels=None, cache_factorization=False, r_arr=None,
+                 coulomb_Z=None, absorber=None):
+        """
+        Initialize
+
+        Parameters
+        ----------
+        absorber : tdse.propagator.absorber.Absorber or None
+            If given, the absorbing layer at the outer boundary of the box,
+            e.g. `Polynomial_CAP`, `Mask_Absorber` or 
+            `Exterior_Complex_Scaling`.
+        r_arr : (Nr,) array-like or None
+            the nonuniform radial grid, if given.
+            See `Wavefunction_on_Spherical_Box_with_single_m`.
+        coulomb_Z : float or None
+            If given, the charge `Z` of the Coulomb singularity `-Z/r` 
+            of `Vr` at the origin, for which the first row of the Numerov 
+            scheme of the `l=0` channel is corrected 
+            (see `tdse.evol.get_coulomb_corrected_M2_D2_first_diag()`).
+            It reduces the error of the `l=0` states from `O(dr^2)` 
+            to `O(dr^4)`, allowing a coarser radial grid.
+        channels : slice or None
+            If given, the operators are constructed only for the channels
+            `l[channels]` and `propagate()` acts on the part `wf[channels]`
+            of the wavefunction, e.g. for a worker of
+            `Channel_Distributed_Propagator_on_Spherical_Box`.
+        cache_factorization : bool
+            If False (default), the operator of each channel is
+            factorized into a reusable workspace at every call of
+            `propagate()`, keeping the memory `O(Nr)`.
+            If True, the backward Crank-Nicolson operators of all channels
+            are kept factorized for each timestep used (up to
+            `_max_cached_operators` timesteps), which costs `O(Nlm*Nr)`
+            memory per timestep but saves the factorization for 
+            the calls of `propagate()` with a few steps.
+        """
 
         # Construct wavefunction object from parameters
-        self.wf = self.wf_class(Nr, dr, m, lmax)
+        self.wf = self.wf_class(Nr, dr, m, lmax, r_arr=r_arr)
 
         # Copy parameters
-        for _attr in ("Nr","dr","m","lmax","l","Nlm","lm","r_max","r_arr"):
+        for _attr in ("Nr","dr","m","lmax","l","Nlm","lm","r_max","r_arr",
+                      "uniform","r_bound_arr","r_weights"):
             setattr(self, _attr, getattr(self.wf, _attr))
 
         self.hbar, self.mass = hbar, mass
+
+        self.absorbing_layer = Absorbing_Layer(absorber, self.r_bound_arr)
         
-        if Vr == 0.0: self.Vr = np.zeros((self.Nr,), dtype=np.float)
+        if np.all(Vr == 0.0): self.Vr = np.zeros((self.Nr,), dtype=np.float)
         else:
             _Vr = asarray(Vr)
             if _Vr.shape != (self.Nr,):
                 _msg = "`Vr` should be of shape ({},). Given shape: {}"
                 raise ValueError(_msg.format(self.Nr, _Vr.shape))
             self.Vr = _Vr
+
+        if channels is None: channels = slice(None)
+        if not isinstance(channels, slice):
+            _msg = "`channels` should be a slice. Given: {}"
+            raise ValueError(_msg.format(channels))
+        self.channels = channels
         
-        _D2 = get_D2_tridiag(self.Nr, self.dr)
-        self.M2 = get_M2_tridiag(self.Nr)
-        
-        # Correction for Coulomb potential
-#         _D2[1,0] = 
-#         self.M2[1,0] = 
+        # The operators are built on the complex-scaled radial grid, if any
+        _r_bound_arr = self.absorbing_layer.scaled_bound_arr
+        if self.uniform and not self.absorbing_layer.scaled:
+            _D2 = get_D2_tridiag(self.Nr, self.dr)
+            self.M2 = get_M2_tridiag(self.Nr)
+        else: self.M2, _D2 = get_M2_D2_tridiag_nonuniform(_r_bound_arr)
         
-        _M2Hl_shape = (self.Nlm,) + self.M2.shape
-        self.M2Hl = np.empty(_M2Hl_shape, dtype=self.Vr.dtype)
+        # M2*H_l = M2H0 + centrifugal_coefs[il] * M2_over_r_sq
+        _l_arr = self.l[self.channels]
         _hbar_sq_over_2mass = self.hbar**2 / (2.*self.mass)
         _Kr = - _hbar_sq_over_2mass * _D2
-        _r_sq = np.square(self.r_arr)
-        for _il, _l in enumerate(self.l):
-            _Vl = _hbar_sq_over_2mass * _l * (_l+1) / _r_sq + self.Vr
-            _M2Vl = mul_tridiag_and_diag(self.M2, _Vl)
-            self.M2Hl[_il] = _Kr + _M2Vl
-            
+        _Vr = self.absorbing_layer.add_potential(self.Vr)
+        self.M2H0 = _Kr + mul_tridiag_and_diag(self.M2, _Vr)
+        self.M2_over_r_sq = mul_tridiag_and_diag(
+                self.M2, 1.0 / np.square(_r_bound_arr[1:-1]))
+        self.centrifugal_coefs = _hbar_sq_over_2mass * _l_arr * (_l_arr+1.)
+
+        # Correction for Coulomb potential, for the `l=0` channel only,
+        # kept as the shifts of the first diagonal elements `[1,0]`
+        # of `M2` and `M2*H_l` for each channel
+        self.coulomb_Z = None if coulomb_Z is None else float(coulomb_Z)
+        self.first_M2_shifts = np.zeros((_l_arr.size,), dtype=self.M2.dtype)
+        self.first_M2H_shifts = np.zeros((_l_arr.size,), dtype=self.M2H0.dtype)
+        self._il0, self._M2_l0_factor = None, None
+        if self.coulomb_Z is not None and _l_arr.size > 0 and _l_arr[0] == 0:
+            _M2_11, _D2_11 = get_coulomb_corrected_M2_D2_first_diag(
+                    self.r_bound_arr, self.coulomb_Z)
+            _dM2, _dD2 = _M2_11 - self.M2[1,0], _D2_11 - _D2[1,0]
+            self._il0 = 0
+            self.first_M2_shifts[0] = _dM2
+            self.first_M2H_shifts[0] = \
+                    - _hbar_sq_over_2mass * _dD2 + _dM2 * _Vr[0]
+            _M2_l0 = self.M2.copy()
+            _M2_l0[1,0] = _M2_11
+            self._M2_l0_factor = tridiag_factorize(_M2_l0, dtype=complex)
+
+        self.cache_factorization = bool(cache_factorization)
+        self._M2_factor = tridiag_factorize(self.M2, dtype=complex)
+
+        # Crank-Nicolson operators for each timestep used so far
+        self._cn_operators = {}
+
+    @property
+    def M2Hl(self):
+        """
+        The stack of `M2*H_l` of shape (Nlm, 3, Nr), constructed on demand
+        """
+        _M2Hl = self.M2H0 + self.centrifugal_coefs[:,np.newaxis,np.newaxis] \
+                * self.M2_over_r_sq
+        _M2Hl[:,1,0] += self.first_M2H_shifts
+        return _M2Hl
+
+    def _apply_M2Hl(self, wf, M2H_wf):
+        """Evaluate `M2*H_l * wf` for each channel into `M2H_wf`"""
+        tridiag_forward_batch(self.M2H0, wf, M2H_wf)
+        _M2_over_r_sq_wf = np.empty_like(M2H_wf)
+        tridiag_forward_batch(self.M2_over_r_sq, wf, _M2_over_r_sq_wf)
+        M2H_wf += self.centrifugal_coefs[:,np.newaxis] * _M2_over_r_sq_wf
+        if self._il0 is not None:
+            M2H_wf[...,self._il0,0] += \
+                    self.first_M2H_shifts[self._il0] * wf[...,self._il0,0]
+
+    def _get_cn_operators(self, dt):
+        """
+        Return the factorized backward Crank-Nicolson operators 
+        `M2 + i*dt/(2*hbar)*M2*H_l` of all channels for the given timestep
+
+        The operators of all channels are factorized together as a batch
+        for solving all channels at once (see `tridiag_factorize_batch`).
+        They are filled channel by channel into the concatenated array,
+        which is overwritten by the factors, without forming `M2Hl`.
+        """
+        _key = complex(dt)
+        if _key not in self._cn_operators:
+            if len(self._cn_operators) >= self._max_cached_operators:
+                self._cn_operators.pop(next(iter(self._cn_operators)))
+            _coef = -0.5j*dt/self.hbar
+            _Ub0 = self.M2 - _coef * self.M2H0
+            _Ub_half = np.empty((3, self.centrifugal_coefs.size, self.Nr), 
+                    dtype=complex)
+            for _il, (_c_l, _dM2, _dM2H) in enumerate(zip(
+                    self.centrifugal_coefs, self.first_M2_shifts, 
+                    self.first_M2H_shifts)):
+                _Ub_l = _Ub_half[:,_il]
+                np.subtract(_Ub0, (_coef * _c_l) * self.M2_over_r_sq, 
+                        out=_Ub_l)
+                _Ub_l[1,0] += _dM2 - _coef * _dM2H
+                _Ub_l[0,0], _Ub_l[2,-1] = 0.0, 0.0  # decouple the channels
+            self._cn_operators[_key] = tridiag_factorize_inplace(
+                    _Ub_half.reshape((3, -1)))
+        return self._cn_operators[_key]
+
+    def _propagate_in_workspace(self, wf, dt, Nt):
+        """
+        Propagate each channel in turn, with its Crank-Nicolson operators
+        constructed and factorized in reusable workspaces
+        """
+        _coef = -0.5j*dt/self.hbar
+        _Uf0 = self.M2 + _coef * self.M2H0
+        _Ub0 = self.M2 - _coef * self.M2H0
+        _Uf, _Ub = (np.empty(_U0.shape, dtype=complex) for _U0 in (_Uf0, _Ub0))
+        _wf_mid = np.empty((self.Nr,), dtype=complex)
+        _mask = self.absorbing_layer.mask
+        _mask_steps = self.absorbing_layer.count_mask_steps(Nt)
+        for _wf_l, _c_l, _dM2, _dM2H in zip(wf, self.centrifugal_coefs, 
+                self.first_M2_shifts, self.first_M2H_shifts):
+            np.add(_Uf0, (_coef * _c_l) * self.M2_over_r_sq, out=_Uf)
+            np.subtract(_Ub0, (_coef * _c_l) * self.M2_over_r_sq, out=_Ub)
+            _Uf[1,0] += _dM2 + _coef * _dM2H
+            _Ub[1,0] += _dM2 - _coef * _dM2H
+            _Ub_factor = tridiag_factorize_inplace(_Ub)
+            for _it in range(Nt):
+                tridiag_forward_batch(_Uf, _wf_l, _wf_mid)
+                tridiag_backward_factorized(_Ub_factor, _wf_l, _wf_mid)
+                if _mask_steps[_it]: _wf_l *= _mask
+
     def propagate(self, wf, dt, Nt=1):
         if Nt < 0: raise ValueError(
             "Nt should be a nonnegative integer. Given: {}".format(Nt))
-        _FO = (-0.5j*dt/self.hbar) * self.M2Hl
-        _Uf_half = self.M2 + _FO # unitary half timestep prop forward
-        _Ub_half = self.M2 - _FO # unitary half timestep prop backward
-        _wf_lm_mid = np.empty((self.Nr,), dtype=wf.dtype)
+        if not self.cache_factorization:
+            return self._propagate_in_workspace(wf, dt, Nt)
+        _Ub_half_factor = self._get_cn_operators(dt)
+        _coef = -0.5j*dt/self.hbar
+        _wf_mid, _M2H_wf = np.empty_like(wf), np.empty_like(wf)
         for _it in range(Nt):
-            for _ilm in range(self.Nlm):
-                tridiag_forward(_Uf_half[_ilm], wf[_ilm], _wf_lm_mid)
-                tridiag_backward(_Ub_half[_ilm], wf[_ilm], _wf_lm_mid)
+            self._apply_M2Hl(wf, _M2H_wf)
+            tridiag_forward_batch(self.M2, wf, _wf_mid)
+            _wf_mid[:,0] += self.first_M2_shifts * wf[:,0]
+            _wf_mid += _coef * _M2H_wf
+            tridiag_backward_factorized_batch(_Ub_half_factor, wf, _wf_mid)
+            self.absorbing_layer.apply_mask(wf)
+
+    def coarsened(self, factor=2):
+        """
+        Return a propagator of the same system on a radial grid
+        coarser by the given integer `factor`, spanning the same box
+
+        The coarse radial grid points are a subset of the fine grid,
+        from which the potential values are taken.
+        A nonuniform grid is coarsened in the same way.
+        """
+        if not isinstance(factor, Integral) or not (factor > 1):
+            _msg = "`factor` should be an integer larger than 1. Given: {}"
+            raise ValueError(_msg.format(factor))
+        _Nr = (self.Nr + 1) // factor - 1
+        if _Nr < 4:
+            _msg = "The grid with Nr={} is too small to be coarsened by {}"
+            raise ValueError(_msg.format(self.Nr, factor))
+        _Vr = self.Vr[factor-1::factor][:_Nr]
+        if self.uniform: _dr, _r_arr = self.dr * factor, None
+        else:
+            _r_bound_arr = self.r_bound_arr[::factor][:_Nr+2]
+            _dr = _r_bound_arr[-1] - _r_bound_arr[-2]
+            _r_arr = _r_bound_arr[1:-1]
+        return Propagator_on_Spherical_Box_with_single_m(_Nr, 
+                _dr, self.m, self.lmax, Vr=_Vr, 
+                hbar=self.hbar, mass=self.mass, 
+                cache_factorization=self.cache_factorization, r_arr=_r_arr,
+                coulomb_Z=self.coulomb_Z, 
+                absorber=self.absorbing_layer.absorber)
+
+    def _state_cache_key_params(self):
+        _params = (self.Nr, self.dr, self.m, self.lmax, self.Vr, 
+                self.hbar, self.mass)
+        if not self.uniform: _params += (self.r_arr,)
+        if self.coulomb_Z is not None: _params += ("coulomb", self.coulomb_Z)
+        return _params + self.absorbing_layer._key_params()
+
+    def apply_hamiltonian(self, wf):
+        """Evaluate `H * wf` for each channel, i.e. `M2^{-1} * M2Hl * wf`"""
+        _wf = asarray(wf, dtype=complex)
+        _M2H_wf = np.empty_like(_wf)
+        self._apply_M2Hl(_wf, _M2H_wf)
+        _H_wf = np.empty_like(_wf)
+        tridiag_backward_factorized(self._M2_factor, _H_wf.T, _M2H_wf.T)
+        if self._il0 is not None:
+            tridiag_backward_factorized(self._M2_l0_factor, 
+                    _H_wf[self._il0], _M2H_wf[self._il0])
+        return _H_wf
+
+    def eval_energy_and_variance(self, wf):
+        _H_wf = self.apply_hamiltonian(wf)
+        _norm_sq = self.wf_class.norm_sq(wf, self.r_weights)
+        _E = np.sum(wf.conj() * _H_wf * self.r_weights).real / _norm_sq
+        _H_sq = self.wf_class.norm_sq(_H_wf, self.r_weights) / _norm_sq
+        return _E, _H_sq - _E * _E
     
     def propagate_to_ground_state(self, wf=None, dt=None, max_Nt=20000,
-                                  Nt_per_iter=10, norm_thres=1e-13):
+                                  Nt_per_iter=10, norm_thres=1e-13,
+                                  adaptive=False, var_thres=1e-10, 
+                                  dt_max=None, cache=None, 
+                                  multigrid_levels=0):
+        """
+        Propagate the given wavefunction by the imaginary timestep
+        to get the lowest energy state
+
+        See `Propagator_on_1D_Box.propagate_to_ground_state()` 
+        for `adaptive`, `cache` and `multigrid_levels` options.
+        """
         _dt = dt
         if dt is None: _dt = self.dr / 4.
         
@@ -331,11 +634,231 @@ class Propagator_on_Spherical_Box_with_single_m(Propagator):
             _wf[:] = np.random.rand(*_wf.shape)
         else: _wf = np.asarray(wf)
             
-        _normalizer_args = (self.dr,)
-        super().propagate_to_ground_state(_wf, _dt, max_Nt,
-            _normalizer_args, Nt_per_iter, norm_thres)
+        _normalizer_args = (self.r_weights,)
+        def _solve():
+            if multigrid_levels > 0:
+                _coarse = self.coarsened(2)
+                _wf_coarse = _coarse.wf.interpolate_from(self.wf, _wf)
+                _coarse.propagate_to_ground_state(_wf_coarse, 
+                        None if dt is None else 2*dt, max_Nt, Nt_per_iter, 
+                        norm_thres, adaptive, var_thres, dt_max, 
+                        multigrid_levels=multigrid_levels-1)
+                _wf[:] = self.wf.interpolate_from(_coarse.wf, _wf_coarse)
+            if adaptive:
+                self.propagate_to_ground_state_adaptive(_wf, _dt, max_Nt,
+                    _normalizer_args, Nt_per_iter, var_thres=var_thres, 
+                    dt_max=dt_max)
+            else:
+                super(Propagator_on_Spherical_Box_with_single_m, self) \
+                    .propagate_to_ground_state(_wf, _dt, max_Nt,
+                        _normalizer_args, Nt_per_iter, norm_thres)
+        _convergence_params = self._convergence_key_params(_dt, max_Nt, 
+                Nt_per_iter, norm_thres, adaptive, var_thres, dt_max, 
+                multigrid_levels)
+        self._solve_with_state_cache(cache, _wf, _solve, 
+                "ground_state", *_convergence_params)
         
         if wf is None: return _wf
 
 
 
+class Propagator_on_Spherical_Box_with_single_m_and_field(
+        Propagator_on_Spherical_Box_with_single_m):
+    """
+    Propagator for a wavefunction on a spherical box with single `m`
+    in the presence of a field linearly polarized along the z-axis
+
+    The dipole interaction couples the channels `l` and `l+1` 
+    through the angular matrix element
+
+    .. math::
+
+        c_{l} = \\langle l+1,m|\\cos\\theta|l,m\\rangle 
+        = \\sqrt{\\frac{(l+1)^2-m^2}{(2l+1)(2l+3)}}
+
+    while `m` is conserved. The supported gauges are:
+
+    - 'length': :math:`H_{I} = -qE(t)z`
+    - 'velocity': :math:`H_{I} = -\\frac{q}{m}A(t)p_{z}` 
+      (the spatially uniform `A^2` term is dropped)
+
+    Each timestep is split as `UI(dt/2) U0(dt) UI(dt/2)`
+    where `U0` is the field-free radial Crank-Nicolson propagator
+    and `UI` is the interaction propagator, which is further split into 
+    the pairs of channels `(l,l+1)` with even and odd `l-m`, 
+    as `U_even(dt/4) U_odd(dt/2) U_even(dt/4)`.
+    Within each set, the pairs are disjoint and propagated at once:
+
+    - In the length gauge, the pair propagator is a 2x2 rotation
+      at each radial grid point, evaluated exactly.
+    - In the velocity gauge, `p_z` acting on the reduced radial functions
+      has the elements `<l|d/dz|l+1> = c_l (d/dr + (l+1)/r)` and
+      `<l+1|d/dz|l> = c_l (d/dr - (l+1)/r)`. The `1/r` part is 
+      a 2x2 rotation at each radial grid point, evaluated exactly, 
+      and the `d/dr` part is decoupled by the combinations 
+      `(g_l +- g_{l+1})/sqrt(2)` and propagated by the Crank-Nicolson
+      scheme with `d/dr = M1^{-1}*D1`, as batched tridiagonal solves.
+      On a uniform grid, the first and last diagonal elements of `M1` 
+      and `D1` are corrected to `(2+sqrt(3))/6` and `-+(2-sqrt(3))/(2*dr)`,
+      for which `M1^{-1}*D1` is anti-Hermitian and the propagator is
+      unitary; without the correction, the truncation at the boundaries 
+      loses the norm near `r=0`. The factorized operators of the last 
+      few `(tau, field)` are kept for the repeated half steps.
+
+    Thus, the cost of each timestep is `O(Nlm*Nr)`.
+
+    With `Exterior_Complex_Scaling`, `d/dr` and `1/r` of the velocity gauge
+    are taken on the scaled radial grid, while the length gauge uses
+    the real `r`, thus the velocity gauge is recommended.
+    """
+
+    gauges = ('length', 'velocity')
+
+    # The maximum number of the sets of pairs whose operators are kept 
+    # factorized, e.g. the even and odd sets within a timestep
+    _max_cached_pair_operators = 2
+
+    def __init__(self, Nr, dr, m, lmax, field, gauge='length', Vr=0.0, 
+                 q=-1.0, hbar=1.0, mass=1.0, channels=None,
+                 cache_factorization=False, r_arr=None, coulomb_Z=None,
+                 absorber=None):
+        """
+        Initialize
+
+        Parameters
+        ----------
+        field : callable of a single real number t (time)
+            the electric field `E(t)` for the length gauge or
+            the vector potential `A(t)` for the velocity gauge,
+            along the z-axis
+        gauge : 'length' or 'velocity'
+        q : float
+            charge of a particle described by the wavefunction
+        """
+        if not callable(field):
+            _msg = "`field` should be a callable. Given: {}"
+            raise ValueError(_msg.format(field))
+        self.field = field
+        if gauge not in self.gauges:
+            _msg = "`gauge` should be one of {}. Given: {}"
+            raise ValueError(_msg.format(self.gauges, gauge))
+        self.gauge = gauge
+        self.q = float(q)
+
+        super().__init__(Nr, dr, m, lmax, Vr=Vr, hbar=hbar, mass=mass,
+                channels=channels, cache_factorization=cache_factorization,
+                r_arr=r_arr, coulomb_Z=coulomb_Z, absorber=absorber)
+
+        # Angular coupling coefficients c_l for the pairs (l, l+1)
+        _l = self.l[:-1]
+        self.c_l = np.sqrt(((_l+1)**2 - self.m**2) / ((2.*_l+1)*(2.*_l+3)))
+
+        # Index of the lower channel of each pair, for even and odd `l-m`
+        self._pair_sets = tuple(
+                np.arange(_parity, self.Nlm-1, 2) for _parity in (0,1))
+
+        if self.gauge == 'velocity':
+            _r_bound_arr = self.absorbing_layer.scaled_bound_arr
+            self._r_scaled_arr = _r_bound_arr[1:-1]
+            if self.uniform and not self.absorbing_layer.scaled:
+                self.M1 = get_M1_tridiag(self.Nr)
+                self.D1 = get_D1_tridiag(self.Nr, self.dr)
+                _M1_corner = (2.0 + np.sqrt(3.0)) / 6.0
+                _D1_corner = (2.0 - np.sqrt(3.0)) / (2.0 * self.dr)
+                self.M1[1,0], self.M1[1,-1] = _M1_corner, _M1_corner
+                self.D1[1,0], self.D1[1,-1] = -_D1_corner, _D1_corner
+            else: 
+                self.M1, self.D1 = get_M1_D1_tridiag_nonuniform(_r_bound_arr)
+
+            # Crank-Nicolson operators of the `d/dr` part for each key 
+            # `(s, ilm_arr[0])`, i.e. for each set of pairs of a half step
+            self._pair_operators = {}
+
+
+    def _propagate_pairs(self, wf, tau, field_t, ilm_arr):
+        """
+        Propagate the given pairs of channels `(ilm, ilm+1)`
+        by the interaction Hamiltonian over `tau`, in-place
+        """
+        if ilm_arr.size == 0: return
+        _c = self.c_l[ilm_arr,np.newaxis]
+        _g0, _g1 = wf[ilm_arr], wf[ilm_arr+1]
+
+        if self.gauge == 'length':
+            # exp(-i*tau*a*sigma_x/hbar) with a = -q*E*r*c_l
+            _theta = (-tau * self.q * field_t / self.hbar) * _c * self.r_arr
+            _cos, _isin = np.cos(_theta), 1.j*np.sin(_theta)
+            wf[ilm_arr], wf[ilm_arr+1] = \
+                    _cos*_g0 - _isin*_g1, _cos*_g1 - _isin*_g0
+            return
+
+        # Velocity gauge: H_I = (i*hbar*q*A/m) * d/dz
+        _s = tau * self.q * field_t / self.mass
+        _l = self.l[ilm_arr,np.newaxis]
+
+        # Half of the 1/r part: exp(s*(l+1)*c_l/r * [[0,1],[-1,0]])
+        _theta = (0.5 * _s) * _c * (_l + 1) / self._r_scaled_arr
+        _cos, _sin = np.cos(_theta), np.sin(_theta)
+        _g0, _g1 = _cos*_g0 + _sin*_g1, _cos*_g1 - _sin*_g0
+        
+        # The d/dr part in the decoupled combinations (g0 +- g1)/sqrt(2)
+        _g_pm = np.concatenate((_g0 + _g1, _g0 - _g1)) * np.sqrt(0.5)
+        _key = (complex(_s), int(ilm_arr[0]))
+        if _key not in self._pair_operators:
+            if len(self._pair_operators) >= self._max_cached_pair_operators:
+                self._pair_operators.pop(next(iter(self._pair_operators)))
+            _coef = (0.5 * _s) * np.concatenate((_c, -_c))[:,:,np.newaxis]
+            _U_forward = self.M1 + _coef * self.D1
+            _U_backward = self.M1 - _coef * self.D1
+            self._pair_operators[_key] = (_U_forward, 
+                    tridiag_factorize_batch(_U_backward, dtype=complex))
+        _U_forward, _U_backward_factor = self._pair_operators[_key]
+        _g_pm_mid = np.empty_like(_g_pm)
+        tridiag_forward_batch(_U_forward, _g_pm, _g_pm_mid)
+        tridiag_backward_factorized_batch(_U_backward_factor, _g_pm, _g_pm_mid)
+        _Np = ilm_arr.size
+        _g0 = (_g_pm[:_Np] + _g_pm[_Np:]) * np.sqrt(0.5)
+        _g1 = (_g_pm[:_Np] - _g_pm[_Np:]) * np.sqrt(0.5)
+
+        # The other half of the 1/r part
+        _g0, _g1 = _cos*_g0 + _sin*_g1, _cos*_g1 - _sin*_g0
+        wf[ilm_arr], wf[ilm_arr+1] = _g0, _g1
+
+
+    def _propagate_interaction(self, wf, tau, field_t):
+        _even, _odd = self._pair_sets
+        self._propagate_pairs(wf, 0.5*tau, field_t, _even)
+        self._propagate_pairs(wf, tau, field_t, _odd)
+        self._propagate_pairs(wf, 0.5*tau, field_t, _even)
+
+
+    def propagate_with_field(self, wf, dt, t_start, Nt=1):
+        """Propagate the wavefunction in the presence of the field
+
+        Parameters
+        ----------
+        wf : (Nlm, Nr) numpy.ndarray of complex type
+            the wavefunction, propagated in-place
+
+        Returns
+        -------
+        t_final : float
+            time after the propagation ends
+        """
+        if not isinstance(wf, np.ndarray) or wf.dtype != complex:
+            raise ValueError("The wavefunction should be a complex type numpy array")
+        if wf.shape != self.wf.shape:
+            _msg = "The wavefunction should be of shape {}. Given: {}"
+            raise ValueError(_msg.format(self.wf.shape, wf.shape))
+        if not isinstance(Nt, Integral) or Nt <= 0:
+            raise ValueError("`Nt` should be a positive integer. Given: {}".format(Nt))
+        _dt, _t = float(dt), float(t_start)
+
+        for _it in range(Nt):
+            _field_t = self.field(_t + 0.5*_dt)
+            self._propagate_interaction(wf, 0.5*_dt, _field_t)
+            self.propagate(wf, _dt)
+            self._propagate_interaction(wf, 0.5*_dt, _field_t)
+            _t += _dt
+
+        return _t
@@ -0,0 +1,32 @@
+"""Composition schemes for higher-order time splitting"""
+
+def composition_coefficients(order):
+    """
+    Return the fractions of a timestep for the symmetric composition
+    of a second-order (symmetric) step into a step of the given order
+
+    The fourth- and sixth-order schemes are the triple-jump compositions
+    of Yoshida (and Suzuki), applied once and twice, respectively:
+    `S4(dt) = S2(w1*dt) S2(w0*dt) S2(w1*dt)` with
+    `w1 = 1/(2 - 2^(1/3))` and `w0 = 1 - 2*w1`, and similarly 
+    `S6(dt) = S4(z1*dt) S4(z0*dt) S4(z1*dt)` with the fifth root of 2.
+    Some of the fractions are negative.
+
+    Parameters
+    ----------
+    order : 2, 4 or 6
+
+    Returns
+    -------
+    coefs : tuple of float
+        fractions of the timestep for each second-order substep, 
+        in the order of application. They sum up to one.
+    """
+    if order not in (2, 4, 6):
+        raise ValueError("`order` should be 2, 4 or 6. Given: {}".format(order))
+    _coefs = (1.0,)
+    for _p in range(2, order, 2):
+        _w1 = 1.0 / (2.0 - 2.0**(1.0/(_p+1)))
+        _w0 = 1.0 - 2.0 * _w1
+        _coefs = tuple(_w * _c for _w in (_w1, _w0, _w1) for _c in _coefs)
+    return _coefs
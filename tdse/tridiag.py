@@ -1,5 +1,8 @@
+import numpy as np
+
 from .matrix import mat_vec_mul_tridiag, gaussian_elimination_tridiagonal
 
+
 def get_tridiag_shape(N):
     return (3, N)
 
@@ -41,3 +44,102 @@ def tridiag_backward_scipy_solve_banded(tridiag, v, b):
 
 tridiag_backward = tridiag_backward_scipy_solve_banded
 
+
+
+
+from scipy.linalg.lapack import get_lapack_funcs
+
+def tridiag_factorize(tridiag, dtype=None):
+    """
+    Factorize the given tridiagonal matrix by LU decomposition
+    with partial pivoting (LAPACK `?gttrf`)
+
+    The returned factorization can be passed to `tridiag_backward_factorized`
+    to solve linear systems of the same matrix repeatedly,
+    without redoing the elimination every time.
+
+    The diagonal elements should be tridiag[1,:],
+    the lower offdiagonal should be tridiag[0,1:],
+    the upper offdiagonal should be tridiag[2,:-1]
+    """
+    _trd = np.asarray(tridiag, dtype=dtype)
+    _gttrf, = get_lapack_funcs(('gttrf',), (_trd,))
+    _dl, _d, _du, _du2, _ipiv, _info = _gttrf(
+            _trd[0,1:], _trd[1,:], _trd[2,:-1])
+    if _info != 0:
+        _msg = "Failed to factorize the tridiagonal matrix (info={})"
+        raise np.linalg.LinAlgError(_msg.format(_info))
+    return _dl, _d, _du, _du2, _ipiv
+
+
+def tridiag_factorize_inplace(tridiag):
+    """
+    Factorize the given tridiagonal matrix as `tridiag_factorize` does,
+    overwriting `tridiag` with the LU factors
+
+    `tridiag` should be a C-contiguous (3, N) array of LAPACK type,
+    e.g. a workspace refilled for each of many matrices of the same size,
+    so that no memory is allocated for the factors but the pivots.
+    """
+    _gttrf, = get_lapack_funcs(('gttrf',), (tridiag,))
+    _dl, _d, _du, _du2, _ipiv, _info = _gttrf(
+            tridiag[0,1:], tridiag[1,:], tridiag[2,:-1],
+            overwrite_dl=1, overwrite_d=1, overwrite_du=1)
+    if _info != 0:
+        _msg = "Failed to factorize the tridiagonal matrix (info={})"
+        raise np.linalg.LinAlgError(_msg.format(_info))
+    return _dl, _d, _du, _du2, _ipiv
+
+
+def tridiag_backward_factorized(factor, v, b):
+    """
+    Solve `tridiag * v = b` for `v`
+    with `factor` obtained from `tridiag_factorize(tridiag)`
+
+    `b` may be of shape (N,) or (N, nrhs)
+    """
+    _gttrs, = get_lapack_funcs(('gttrs',), (factor[1], b))
+    _x, _info = _gttrs(*factor, b)
+    if _info != 0:
+        _msg = "Failed to solve the factorized tridiagonal system (info={})"
+        raise np.linalg.LinAlgError(_msg.format(_info))
+    v[:] = _x
+
+
+
+## Batched operations on a stack of tridiagonal matrices of shape (..., 3, N)
+def tridiag_forward_batch(tridiags, v, b):
+    """
+    Evaluate `b = tridiags * v` for each matrix in the stack
+    with `v` and `b` of shape (..., N), vectorized over the stack
+    """
+    b[:] = tridiags[...,1,:] * v
+    b[...,1:] += tridiags[...,0,1:] * v[...,:-1]
+    b[...,:-1] += tridiags[...,2,:-1] * v[...,1:]
+
+
+def tridiag_factorize_batch(tridiags, dtype=None):
+    """
+    Factorize a stack of tridiagonal matrices of shape (..., 3, N) at once
+
+    The matrices are concatenated into a single block-diagonal tridiagonal
+    matrix of size `B*N` (with `B` the number of matrices in the stack)
+    so that the factorization and the solution run in a single LAPACK call.
+    """
+    _trds = np.array(tridiags, dtype=dtype)
+    _N = _trds.shape[-1]
+    _trds = _trds.reshape((-1, 3, _N))
+    _trds[:,0,0], _trds[:,2,-1] = 0.0, 0.0  # decouple adjacent blocks
+    _trd_concat = np.ascontiguousarray(
+            _trds.transpose((1,0,2))).reshape((3, -1))
+    return tridiag_factorize(_trd_concat)
+
+
+def tridiag_backward_factorized_batch(factor, v, b):
+    """
+    Solve `tridiags * v = b` for `v` of shape (..., N) for each matrix 
+    in the stack, with `factor` from `tridiag_factorize_batch(tridiags)`
+    """
+    _v = np.empty(b.size, dtype=v.dtype)
+    tridiag_backward_factorized(factor, _v, np.ravel(b))
+    v[...] = _v.reshape(v.shape)
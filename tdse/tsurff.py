@@ -0,0 +1,281 @@
+"""Photoelectron spectra by the time-dependent surface flux (t-SURFF)"""
+
+from numbers import Integral
+
+import numpy as np
+from numpy import pi
+from scipy.special import spherical_jn
+
+from .volkov import eval_volkov_phase
+from .propagator.box1d import Wavefunction_Uniform_1D_Box
+from .propagator.spherical import (Wavefunction_on_Spherical_Box_with_single_m,
+        Plm_and_dtheta_Plm_for_single_m)
+
+
+class _TSURFF(object):
+    """
+    Base class of the t-SURFF accumulators
+
+    The momentum amplitude of the part of the wavefunction that has left
+    the region inside the surface is given by the time integral
+    of the flux through the surface, projected onto the Volkov states:
+
+    .. math::
+
+        b(\\mathbf{k}) = \\frac{i}{\\hbar}\\int{dt}\\oint{dS}\\,
+        \\chi_{\\mathbf{k}}^{*}\\left[-\\frac{\\hbar^2}{2m}
+        \\left(\\partial_{n}\\psi - \\frac{\\partial_{n}\\chi_{\\mathbf{k}}^{*}}
+        {\\chi_{\\mathbf{k}}^{*}}\\psi\\right)
+        + \\frac{iq\\hbar}{m}(\\mathbf{A}\\cdot\\hat{n})\\psi\\right]
+
+    where `chi_k` is the Volkov state of the velocity gauge Hamiltonian
+    with the `A^2` term dropped, as in the propagators.
+    It holds if the potential is negligible outside the surface.
+    The wavefunction has to be propagated in the velocity gauge,
+    until the slowest electron of interest has passed the surface.
+    Beyond the surface, the wavefunction may be absorbed, e.g. by
+    an absorber of `tdse.propagator.absorber` whose layer starts
+    outside the surface, so that the box can be much smaller
+    than the extent of the outgoing wavepacket.
+
+    Call `record()` with the wavefunction at each time, e.g. after each
+    timestep. The time integral is done by the trapezoidal rule,
+    thus the times need not be uniform.
+    """
+
+    def __init__(self, k_arr, A_t, q=-1.0, mass=1.0, hbar=1.0):
+        if not callable(A_t):
+            _msg = "`A_t` should be a callable. Given: {}"
+            raise ValueError(_msg.format(A_t))
+        self.A = A_t
+        self.k_arr = np.array(k_arr, dtype=float)
+        if self.k_arr.ndim != 1:
+            _msg = "`k_arr` should be a 1D array. Given shape: {}"
+            raise ValueError(_msg.format(self.k_arr.shape))
+        self.q, self.mass, self.hbar = float(q), float(mass), float(hbar)
+
+        self.t_start, self.t = None, None
+        self.int_A_t = 0.0
+        self._A_prev, self._flux_prev = None, None
+        self.amplitudes = None
+
+    def _eval_flux(self, wf, t, A_t):
+        """Return the integrand of the time integral at time `t`"""
+        raise NotImplementedError()
+
+    def record(self, wf, t):
+        """
+        Add the flux of the wavefunction `wf` at time `t` to the amplitudes
+
+        The times of the consecutive calls should be increasing.
+        The first call sets the origin of the Volkov phases.
+        """
+        _t, _A_t = float(t), self.A(t)
+        if self.t is None:
+            self.t_start = _t
+        else:
+            if not (_t > self.t):
+                _msg = "`t` should be larger than the last one ({}). Given: {}"
+                raise ValueError(_msg.format(self.t, t))
+            self.int_A_t += 0.5 * (_t - self.t) * (self._A_prev + _A_t)
+        _flux = self._eval_flux(wf, _t, _A_t)
+        if self.amplitudes is None: self.amplitudes = np.zeros_like(_flux)
+        else: self.amplitudes += 0.5 * (_t - self.t) * (self._flux_prev + _flux)
+        self.t, self._A_prev, self._flux_prev = _t, _A_t, _flux
+
+    def propagate_and_record(self, propagate_with_field, wf, dt, t_start,
+                             Nt=1):
+        """
+        Propagate `wf` in-place by `Nt` timesteps of `dt` from `t_start`
+        and record the wavefunction after each timestep
+
+        The wavefunction at `t_start` is also recorded
+        unless it has been recorded already.
+
+        Parameters
+        ----------
+        propagate_with_field : callable
+            with the signature `(wf, dt, t_start, Nt)`, e.g.
+            `Propagator_on_1D_Box_with_field.propagate_with_field`
+
+        Returns
+        -------
+        t_final : float
+            time after the propagation ends
+        """
+        if not isinstance(Nt, Integral) or Nt <= 0:
+            raise ValueError("`Nt` should be a positive integer. Given: {}".format(Nt))
+        _t = float(t_start)
+        if self.t is None or self.t < _t: self.record(wf, _t)
+        for _it in range(Nt):
+            propagate_with_field(wf, dt, _t, 1)
+            _t += dt
+            self.record(wf, _t)
+        return _t
+
+    def get_spectrum(self):
+        """Return the momentum distribution `|b(k)|^2`"""
+        if self.amplitudes is None:
+            raise ValueError("Nothing has been recorded yet")
+        return np.real(self.amplitudes.conj() * self.amplitudes)
+
+
+
+class TSURFF_on_1D_Box(_TSURFF):
+    """
+    t-SURFF accumulator for a wavefunction on a one-dimensional box
+    with the surfaces at the two points `x_surf`
+
+    The Volkov states are `exp(i*k*x - i*Phi_k(t)) / sqrt(2*pi)` and
+    the amplitudes `b(k)` of shape (Nk,) are normalized such that
+    `int |b(k)|^2 dk` is the probability outside the surfaces.
+    """
+
+    def __init__(self, wf_spec, k_arr, x_surf, A_t, q=-1.0, mass=1.0,
+                 hbar=1.0):
+        """
+        Initialize
+
+        Parameters
+        ----------
+        wf_spec : Wavefunction_Uniform_1D_Box
+            specification of the grid of the wavefunctions to be recorded
+        k_arr : (Nk,) array-like
+            the wave numbers at which the amplitudes are evaluated
+        x_surf : (2,) array-like
+            the left and right surface points inside the box
+        A_t : callable
+            the vector potential as a function of time
+        """
+        super().__init__(k_arr, A_t, q=q, mass=mass, hbar=hbar)
+        if not isinstance(wf_spec, Wavefunction_Uniform_1D_Box):
+            _msg = "`wf_spec` should be a `Wavefunction_Uniform_1D_Box`. Given: {}"
+            raise ValueError(_msg.format(wf_spec))
+        self.wf_spec = wf_spec
+        _x_surf = np.array(x_surf, dtype=float)
+        if _x_surf.shape != (2,) or not (
+                wf_spec.x0 < _x_surf[0] < _x_surf[1] < wf_spec.xmax):
+            _msg = ("`x_surf` should be a pair of increasing points "
+                    "inside the box ({},{}). Given: {}")
+            raise ValueError(_msg.format(wf_spec.x0, wf_spec.xmax, x_surf))
+        self.x_surf = _x_surf
+
+        # exp(-i*k*x)/sqrt(2*pi) at each surface, with the outward sign
+        self._chi_conj_x = np.exp(-1.j * np.outer(self.x_surf, self.k_arr)) \
+                * (np.array([-1.0, 1.0])[:,np.newaxis] / np.sqrt(2.*pi))
+        self._wf_tot = np.zeros((1+wf_spec.N+1,), dtype=complex)
+
+    def _eval_flux(self, wf, t, A_t):
+        self._wf_tot[1:-1] = wf
+        _hbar, _mass = self.hbar, self.mass
+        _flux = np.zeros(self.k_arr.shape, dtype=complex)
+        for _x, _chi_conj in zip(self.x_surf, self._chi_conj_x):
+            _wf_x, _dx_wf_x = self.wf_spec.eval_wf_with_wf_deriv_at_x(
+                    _x, self._wf_tot)
+            _flux += _chi_conj * (-0.5*_hbar*_hbar/_mass
+                    * (_dx_wf_x + 1.j*self.k_arr*_wf_x)
+                    + (1.j*self.q*_hbar*A_t/_mass) * _wf_x)
+        _phase = eval_volkov_phase(self.k_arr, t - self.t_start, self.int_A_t,
+                q=self.q, mass=_mass, hbar=_hbar)
+        return (1.j / _hbar) * np.exp(1.j*_phase) * _flux
+
+
+
+class TSURFF_on_Spherical_Box_with_single_m(_TSURFF):
+    """
+    t-SURFF accumulator for a wavefunction on a spherical box
+    with single `m` and a field linearly polarized along the z-axis,
+    with the surface at the radius `r_surf`
+
+    The Volkov plane waves are expanded in the partial waves
+    with the spherical Bessel functions `j_l(k*r_surf)`,
+    while the field-dependent part of their phases is evaluated
+    for each direction `theta_k` of the momentum:
+
+    .. math::
+
+        \\chi_{\\mathbf{k}}^{*}(\\mathbf{r}) = \\frac{4\\pi}{(2\\pi)^{3/2}}
+        e^{i\\Phi_{\\mathbf{k}}(t)}\\sum_{lm}(-i)^{l}j_{l}(kr)
+        Y_{lm}(\\hat{k})Y_{lm}^{*}(\\hat{r})
+
+    The amplitudes `b(k, theta_k)` of shape (Nk, Ntheta) are for the
+    azimuthal angle of the momentum `phi_k = 0`, on which `|b|` doesn't
+    depend, and normalized such that `int |b|^2 k^2 dk dOmega_k` is
+    the probability outside the surface.
+    The cost of each `record()` is `O(Nlm*Nk*Ntheta)`.
+    """
+
+    def __init__(self, wf_spec, k_arr, theta_k_arr, r_surf, A_t, q=-1.0,
+                 mass=1.0, hbar=1.0):
+        """
+        Initialize
+
+        Parameters
+        ----------
+        wf_spec : Wavefunction_on_Spherical_Box_with_single_m
+            specification of the grid of the wavefunctions to be recorded
+        k_arr : (Nk,) array-like
+            the magnitudes of the momenta (wave numbers)
+        theta_k_arr : (Ntheta,) array-like
+            the polar angles of the momenta
+        r_surf : float
+            the radius of the surface inside the box
+        A_t : callable
+            the vector potential along the z-axis as a function of time
+        """
+        super().__init__(k_arr, A_t, q=q, mass=mass, hbar=hbar)
+        if not isinstance(wf_spec, Wavefunction_on_Spherical_Box_with_single_m):
+            _msg = ("`wf_spec` should be a "
+                    "`Wavefunction_on_Spherical_Box_with_single_m`. Given: {}")
+            raise ValueError(_msg.format(wf_spec))
+        self.wf_spec = wf_spec
+        if not (0 < r_surf < wf_spec.r_max):
+            _msg = "`r_surf` should be inside the box (0,{}). Given: {}"
+            raise ValueError(_msg.format(wf_spec.r_max, r_surf))
+        self.r_surf = float(r_surf)
+        self.theta_k_arr = np.array(theta_k_arr, dtype=float)
+        if self.theta_k_arr.ndim != 1:
+            _msg = "`theta_k_arr` should be a 1D array. Given shape: {}"
+            raise ValueError(_msg.format(self.theta_k_arr.shape))
+
+        _l, _m = wf_spec.l, wf_spec.m
+        _kr = self.k_arr * self.r_surf
+        self._jl = spherical_jn(_l[:,np.newaxis], _kr)
+        self._k_djl = self.k_arr * spherical_jn(
+                _l[:,np.newaxis], _kr, derivative=True)
+        self._minus_i_pow_l = (-1.j)**_l[:,np.newaxis]
+
+        # Y_lm(theta_k, phi_k=0) of shape (Nlm, Ntheta)
+        if not wf_spec.have_sph_harm_coef: wf_spec._eval_sph_harm_coef()
+        _Plm = np.array([Plm_and_dtheta_Plm_for_single_m(_m, wf_spec.lmax,
+                _theta)[0] for _theta in self.theta_k_arr]).T
+        self._Ylm_k = wf_spec.sph_harm_coef_arr[:,np.newaxis] * _Plm
+
+        # <l+1,m|cos(theta)|l,m>
+        _l0 = _l[:-1]
+        self._c_l = np.sqrt(((_l0+1)**2 - _m**2) / ((2.*_l0+1)*(2.*_l0+3)))
+
+        self._k_cos_theta_k = np.outer(self.k_arr, np.cos(self.theta_k_arr))
+        self._prefactor = (1.j / self.hbar) * self.r_surf**2 \
+                * 4.*pi / (2.*pi)**1.5
+
+    def _eval_flux(self, wf, t, A_t):
+        _Rlm = self.wf_spec.wf2Rlm(wf)
+        _R, _dR = self.wf_spec.eval_Rlm_with_Rlm_deriv_at_r(self.r_surf, _Rlm)
+        _R, _dR = (_f[:,np.newaxis] for _f in (_R, _dR))
+        _cos_R = np.zeros_like(_R)
+        _cos_R[1:] += self._c_l[:,np.newaxis] * _R[:-1]
+        _cos_R[:-1] += self._c_l[:,np.newaxis] * _R[1:]
+
+        _hbar, _mass = self.hbar, self.mass
+        # (Nlm, Nk) partial wave components
+        _F_lk = self._minus_i_pow_l * (
+                (-0.5*_hbar*_hbar/_mass) * (self._jl*_dR - self._k_djl*_R)
+                + (1.j*self.q*_hbar*A_t/_mass) * self._jl * _cos_R)
+        _F = _F_lk.T.dot(self._Ylm_k)
+
+        _tau = t - self.t_start
+        _phase = (0.5*_hbar/_mass*_tau) * np.square(self.k_arr)[:,np.newaxis] \
+                - (self.q/_mass*self.int_A_t) * self._k_cos_theta_k
+        return self._prefactor * np.exp(1.j*_phase) * _F
+
@@ -3,37 +3,154 @@ import numpy as np
 from .integral import numerical_integral_trapezoidal as int_trapz
 
 def eval_volkov_phase_k_arr(k_arr, t_idx, t_arr, A_t_func):
-    _volkov_phase_k_arr = np.empty_like(k_arr, dtype=float)
-    if t_idx == 0:
-        _volkov_phase_k_arr[:] = 0
-        return _volkov_phase_k_arr
+    _volkov_phase_k_arr = np.zeros(np.shape(k_arr), dtype=float)
+    if t_idx == 0: return _volkov_phase_k_arr
     _t_arr_slice = t_arr[:(t_idx+1)]
-    _A_t_arr_slice = A_t_func(_t_arr_slice)
-    for k_idx in range(k_arr.size):
-        k = k_arr[k_idx]
-        _volkov_phase_k_arr[k_idx] = int_trapz(_t_arr_slice, 0.5 * (k*k + 2*k*_A_t_arr_slice))
+    _int_A_t = int_trapz(_t_arr_slice, A_t_func(_t_arr_slice))
+    _volkov_phase_k_arr[:] = eval_volkov_phase(k_arr, 
+            _t_arr_slice[-1] - _t_arr_slice[0], _int_A_t)
     return _volkov_phase_k_arr
 
 
-from .integral import numerical_integral_trapezoidal as int_trapz
-from .fourier import get_k_arr_at_Nyquist_limit
-from .fourier import fourier_forward
+def eval_volkov_phase(k_arr, t, int_A_t, q=-1.0, mass=1.0, hbar=1.0,
+                      int_A_sq_t=None):
+    """
+    Evaluate the Volkov phase for each momentum `k` (along the field),
+    given the time `t` and the integral `int_A_t` of the vector potential
+    over the same interval, i.e. 
+
+    .. math::
+
+        \\Phi_{k}(t) = \\frac{\\hbar k^2}{2m}t - \\frac{q}{m}k\\int{A(t')dt'}
+            + \\frac{q^2}{2m\\hbar}\\int{A^2(t')dt'}
+
+    such that the Volkov state is `exp(i*k*x - i*Phi_k(t))`.
+    The spatially uniform `A^2` term is dropped as in the propagators,
+    unless its integral `int_A_sq_t` is given.
+    With `q=-1` and `mass=hbar=1`, it is the same with
+    `eval_volkov_phase_k_arr()` for `t` and `int_A_t` from `t_arr[0]`.
+    """
+    _k = np.asarray(k_arr)
+    _phase = (0.5 * hbar / mass * t) * _k * _k - (q / mass * int_A_t) * _k
+    if int_A_sq_t is not None: 
+        _phase += 0.5 * q * q / (mass * hbar) * int_A_sq_t
+    return _phase
+
+
+from .fourier import get_fft_plan, _is_equidistanced
+
+
+class Free_Space_Volkov(object):
+    """
+    Volkov propagation of a one-dimensional wavefunction in free space,
+    i.e. in a spatially uniform vector potential `A(t)` without any 
+    other potential, on a uniform grid
+
+    The wavefunction is transformed to the wave-vector space once by FFT
+    on the grid `k_arr` at the Nyquist limit. Then, the state at each time 
+    is the inverse FFT of `psi(k,t0) * exp(-i*Phi_k(t))` with the Volkov 
+    phases `Phi_k(t)` of all `k` evaluated at once by `eval_volkov_phase()`,
+    which costs `O(N log N)` per time. As the FFT, the propagation is 
+    periodic over the grid, thus the grid should be large enough 
+    for the wavefunction not to reach its edges.
+    """
+
+    def __init__(self, x_arr, sf_x_t0_arr, q=-1.0, mass=1.0, hbar=1.0, 
+                 include_A_sq=False):
+        """
+        Parameters
+        ----------
+        x_arr : (N,) array-like
+            the equidistanced grid
+        sf_x_t0_arr : (..., N) array-like
+            the wavefunction(s) at the initial time
+        include_A_sq : bool
+            whether to include the phase of the `A^2` term, 
+            which is uniform in space
+        """
+        _x_arr = np.asarray(x_arr, dtype=float)
+        if _x_arr.ndim != 1 or _x_arr.size < 2 or not _is_equidistanced(_x_arr):
+            raise ValueError("`x_arr` should be an equidistanced 1D array")
+        _sf_x_t0_arr = np.asarray(sf_x_t0_arr)
+        if _sf_x_t0_arr.shape[-1:] != _x_arr.shape:
+            _msg = "`sf_x_t0_arr` should be of shape (..., {}). Given: {}"
+            raise ValueError(_msg.format(_x_arr.size, _sf_x_t0_arr.shape))
+        self.x_arr, self.N = _x_arr, _x_arr.size
+        self.dx = (_x_arr[-1] - _x_arr[0]) / (self.N - 1)
+        self.q, self.mass, self.hbar = q, mass, hbar
+        self.include_A_sq = include_A_sq
+
+        _dk = 2*np.pi / (self.N * self.dx)
+        self.k_arr = -np.pi/self.dx + _dk * np.arange(self.N)
+        self._plan = get_fft_plan((self.N,), (self.dx,))
+        self.sf_k_t0_arr = self._plan.forward(_sf_x_t0_arr)
+
+
+    def eval_phase(self, t, int_A_t=0.0, int_A_sq_t=0.0):
+        """Evaluate the Volkov phases of `k_arr` after the time `t` 
+        from the initial time, see `eval_volkov_phase()`"""
+        return eval_volkov_phase(self.k_arr, t, int_A_t, q=self.q, 
+                mass=self.mass, hbar=self.hbar, 
+                int_A_sq_t=int_A_sq_t if self.include_A_sq else None)
+
+
+    def at(self, t, int_A_t=0.0, int_A_sq_t=0.0, out=None):
+        """
+        Return the wavefunction after the time `t` from the initial time,
+        given the integrals of `A` and `A^2` over the same interval,
+        into `out` if given
+        """
+        _phase = self.eval_phase(t, int_A_t, int_A_sq_t)
+        if out is None: out = np.empty(self.sf_k_t0_arr.shape, dtype=complex)
+        np.multiply(self.sf_k_t0_arr, np.exp(-1.j * _phase), out=out)
+        return self._plan.backward(out, out=out)
+
+
+    def iter_states(self, t_arr, A_t_func=None):
+        """
+        Yield the wavefunction at each time of `t_arr`, 
+        with the initial wavefunction at `t_arr[0]`
+
+        The integrals of `A` and `A^2` are accumulated by the trapezoidal
+        rule over `t_arr` as the time proceeds.
+
+        Parameters
+        ----------
+        t_arr : (Nt,) array-like
+            the increasing times
+        A_t_func : callable or None
+            the vector potential `A(t)`, vectorized over an array of times.
+            If None, the propagation is field-free.
+
+        Yields
+        ------
+        sf_x_t_arr : (..., N) numpy.ndarray
+            a new array for each time
+        """
+        _t_arr = np.asarray(t_arr, dtype=float)
+        if _t_arr.ndim != 1 or np.any(np.diff(_t_arr) <= 0):
+            raise ValueError("`t_arr` should be an increasing 1D array")
+        _int_A_arr, _int_A_sq_arr = np.zeros_like(_t_arr), np.zeros_like(_t_arr)
+        if A_t_func is not None and _t_arr.size > 1:
+            _A_t_arr = np.asarray(A_t_func(_t_arr), dtype=float)
+            _half_dt_arr = 0.5 * np.diff(_t_arr)
+            _int_A_arr[1:] = np.cumsum(_half_dt_arr * (_A_t_arr[:-1] + _A_t_arr[1:]))
+            _A_sq_t_arr = _A_t_arr * _A_t_arr
+            _int_A_sq_arr[1:] = np.cumsum(
+                    _half_dt_arr * (_A_sq_t_arr[:-1] + _A_sq_t_arr[1:]))
+        for _t, _int_A_t, _int_A_sq_t in zip(_t_arr, _int_A_arr, _int_A_sq_arr):
+            yield self.at(_t - _t_arr[0], _int_A_t, _int_A_sq_t)
+
+
 
 def free_space_volkov(x_arr, sf_x_t0_arr, t_idx, t_arr, A_t_func):
     
     assert x_arr.size == sf_x_t0_arr.size
     
-    _sf_x_t_arr = np.empty_like(sf_x_t0_arr)
-    _k_arr = get_k_arr_at_Nyquist_limit(x_arr)
-    _sf_k_t0_arr = fourier_forward(sf_x_t0_arr, x_arr, _k_arr)
-    _volkov_phase_k_arr = eval_volkov_phase_k_arr(_k_arr, t_idx, t_arr, A_t_func)
-
-    _integrand = np.empty_like(_k_arr, dtype=complex)
-    for _x_idx, _x in enumerate(x_arr):
-        _x = x_arr[_x_idx]
-        _integrand = _sf_k_t0_arr * np.exp(1.0j * (_k_arr * _x - _volkov_phase_k_arr))
-        _sf_x_t_arr[_x_idx] = 1.0 / np.sqrt(2.0*np.pi) * int_trapz(_k_arr, _integrand)
+    _t_arr_slice = t_arr[:(t_idx+1)]
+    _int_A_t = 0.0
+    if t_idx > 0: _int_A_t = int_trapz(_t_arr_slice, A_t_func(_t_arr_slice))
+    _volkov = Free_Space_Volkov(x_arr, sf_x_t0_arr)
+    _sf_x_t_arr = _volkov.at(_t_arr_slice[-1] - _t_arr_slice[0], _int_A_t)
     
     return _sf_x_t_arr
-
-
@@ -1,8 +1,15 @@
+from numbers import Integral
+from copy import copy
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
+from scipy.linalg import solve_banded
 
 from ..integral import eval_norm_trapezoid
 from ..evol import get_D2_tridiag, get_M2_tridiag, mul_tridiag_and_diag
-from ..tridiag import tridiag_forward, tridiag_backward
+from ..tridiag import (tridiag_forward_batch, tridiag_factorize_batch, 
+        tridiag_backward_factorized)
+from ..parallel import get_mp_context
 
 
 def construct_E_arr_for_winop(E_min_in, E_max_in, gamma):
@@ -71,12 +78,541 @@ def winop_momentum_array(E_min_in, E_max_in, gamma, m=1.0):
 
 
 
+class WindowOperator(object):
+    """
+    Window operator of a one-dimensional Hamiltonian `H = -D2/2 + V(x)`
+    on a uniform grid, discretized by the Numerov scheme
+
+    .. math::
+
+        \\hat{W}_{\\gamma,n}(E) = 
+        \\frac{\\gamma^{2^n}}{(\\hat{H}-E)^{2^n}+\\gamma^{2^n}}
+
+    The spectrum at `E` is the norm of 
+    `chi_E = prod_m gamma/(H - E - gamma*phase_m) psi` over the
+    `2^(n-1)` phases `phase_m = exp(i*(2m-1)*pi/2^n)`, 
+    each factor of which is a tridiagonal solve 
+    `(M2H - (phase_m*gamma + E)*M2) * chi' = gamma*M2 * chi`.
+
+    The operators independent of the energy and the wavefunction,
+    i.e. `M2`, `M2H`, `gamma*M2` and `M2H - phase_m*gamma*M2`,
+    are constructed once and reused over the energies and the calls.
+    The energies are solved together as stacked systems
+    and several wavefunctions as multiple right-hand sides.
+    """
+
+    def __init__(self, x_arr, V_x_arr, gamma, winop_n, use_only_real_pot=True):
+        """
+        Initialize
+
+        Parameters
+        ----------
+        x_arr : (N,) array-like
+            equidistanced grid in position space
+        V_x_arr : (N,) array-like
+            potential values on `x_arr`
+        gamma : float
+            half width of the energy window
+        winop_n : int
+            order of the window operator, the window being sharper for 
+            a larger order at the cost of `2^(n-1)` solves per energy
+        """
+        _x_arr = np.asarray(x_arr, dtype=float)
+        if _x_arr.ndim != 1 or _x_arr.size < 3:
+            raise ValueError("`x_arr` should be a 1D array of size >= 3")
+        _V_x_arr = np.asarray(V_x_arr)
+        if _V_x_arr.shape != _x_arr.shape:
+            _msg = "`V_x_arr` should be of shape {}. Given shape: {}"
+            raise ValueError(_msg.format(_x_arr.shape, _V_x_arr.shape))
+        self.x_arr, self.N = _x_arr, _x_arr.size
+        self.dx = _x_arr[1] - _x_arr[0]
+        if use_only_real_pot: _V_x_arr = _V_x_arr.real
+        self.V_x_arr = _V_x_arr
+
+        self.M2 = get_M2_tridiag(self.N)
+        _D2 = get_D2_tridiag(self.N, self.dx)
+        self.M2H = -0.5*_D2 + mul_tridiag_and_diag(self.M2, _V_x_arr)
+        self._set_window(gamma, winop_n)
+
+
+    def _set_window(self, gamma, winop_n):
+        """Construct the operators depending on the window parameters"""
+        if not (gamma > 0):
+            _msg = "`gamma` should be a positive real number. Given: {}"
+            raise ValueError(_msg.format(gamma))
+        if not isinstance(winop_n, Integral) or winop_n < 1:
+            _msg = "`winop_n` should be a positive integer. Given: {}"
+            raise ValueError(_msg.format(winop_n))
+        self.gamma, self.winop_n = float(gamma), winop_n
+        self.gamma_M2 = self.gamma * self.M2
+
+        _num_of_factors = pow(2,winop_n-1)
+        self.phases = np.exp(1.0j * (2.0*np.arange(1, _num_of_factors+1) - 1)
+                / pow(2,winop_n) * np.pi)
+        _phases = self.phases.reshape((-1,) + (1,)*self.M2.ndim)
+        self._M2H_shifted = self.M2H - (_phases * self.gamma) * self.M2
+
+        _norm_const = np.sin(np.pi/pow(2,winop_n)) / (np.pi/pow(2,winop_n))
+        self.spectrum_const = 1.0 / (2.0 * self.gamma) * _norm_const
+
+
+    def _with_gamma(self, gamma):
+        """Return a window operator of the same system with `gamma`"""
+        _winop = copy(self)
+        _winop._set_window(gamma, self.winop_n)
+        return _winop
+
+
+    def apply(self, sf_arr, E_arr):
+        """
+        Return the states `chi_E` for each energy in `E_arr`
+        
+        Parameters
+        ----------
+        sf_arr : (..., N) array-like
+            a single or several wavefunctions
+        E_arr : float or (NE,) array-like
+
+        Returns
+        -------
+        chi_arr : (NE, ..., N) or (..., N) numpy.ndarray
+            the latter for a scalar `E_arr`
+        """
+        _sf_arr = np.asarray(sf_arr)
+        # Shape of the stack of operators, e.g. (Nc,) for channels
+        _op_shape = self.M2H.shape[:-2]
+        _wf_shape = _op_shape + (self.N,)
+        if _sf_arr.shape[_sf_arr.ndim-len(_wf_shape):] != _wf_shape:
+            _msg = "The last axes of `sf_arr` should be of shape {}. Given: {}"
+            raise ValueError(_msg.format(_wf_shape, _sf_arr.shape))
+        _E = np.asarray(E_arr, dtype=float)
+        _E_1d = np.atleast_1d(_E)
+        _NE, _Nwf = _E_1d.size, _sf_arr.size // int(np.prod(_wf_shape))
+        _E_stack = _E_1d.reshape((_NE,) + (1,)*self.M2.ndim)
+
+        _chi = np.empty((_NE, _Nwf) + _wf_shape, dtype=complex)
+        _chi[:] = _sf_arr.reshape((_Nwf,) + _wf_shape)
+        _right = np.empty_like(_chi)
+        _chi_cols = np.empty((_chi.size // _Nwf, _Nwf), dtype=complex)
+        for _M2H_shifted in self._M2H_shifted:
+            _factor = tridiag_factorize_batch(
+                    _M2H_shifted - _E_stack * self.M2)
+            tridiag_forward_batch(self.gamma_M2, _chi, _right)
+            # The wavefunctions as the right-hand sides of each block
+            _right_cols = np.ascontiguousarray(
+                    np.moveaxis(_right, 1, -1)).reshape((-1, _Nwf))
+            tridiag_backward_factorized(_factor, _chi_cols, _right_cols)
+            _chi[:] = np.moveaxis(
+                    _chi_cols.reshape((_NE,) + _wf_shape + (_Nwf,)), -1, 1)
+        return _chi.reshape(_E.shape + _sf_arr.shape)
+
+
+    def psi_E(self, sf_arr, E0):
+        """Return the state `chi_E` at the energy `E0`"""
+        return self.apply(sf_arr, float(E0))
+
+
+    def norms(self, sf_arr, E_arr, zero_x_index=None):
+        """
+        Return the norms of `chi_E` of shape (NE, ...) for the energies 
+        `E_arr`, or of shape (2, NE, ...) on `x <= 0` and `x >= 0` 
+        if the index `zero_x_index` of `x = 0` is given
+        """
+        _chi = self.apply(sf_arr, np.atleast_1d(E_arr))
+        _eval_norm = lambda _x, _f: eval_norm_trapezoid(
+                _x, _f.reshape((-1, _x.size)).T).reshape(_f.shape[:-1])
+        if zero_x_index is None: return _eval_norm(self.x_arr, _chi)
+        _i0 = zero_x_index
+        return np.array([_eval_norm(self.x_arr[:_i0+1], _chi[...,:_i0+1]),
+                         _eval_norm(self.x_arr[_i0:], _chi[...,_i0:])])
+
+
+    def spectrum(self, sf_arr, E_arr, batch_size=64, num_workers=1, 
+                 executor=None):
+        """
+        Evaluate the energy spectrum of the wavefunction(s) at `E_arr`
+
+        The energies are processed in batches of `batch_size`. 
+        The batches are independent and run in parallel 
+        by `executor` or by `num_workers` processes.
+
+        Parameters
+        ----------
+        sf_arr : (..., N) array-like
+            a single or several wavefunctions
+        E_arr : (NE,) array-like
+        batch_size : int
+            the number of energies solved at once. 
+            The memory of the stacked systems is `O(batch_size * N)`.
+        num_workers : int
+            the number of worker processes, used if `executor` is None.
+            If 1, the batches are evaluated serially in this process.
+        executor : concurrent.futures.Executor or None
+            If given, the batches are submitted to it, e.g. a thread pool
+            or a process pool shared over many calls.
+
+        Returns
+        -------
+        spectrum_E_arr : (..., NE) numpy.ndarray
+        """
+        _norms = self._eval_norms_in_batches(sf_arr, E_arr, batch_size, 
+                num_workers, executor)
+        return self.spectrum_const * np.moveaxis(_norms, 0, -1)
+
+
+    def adaptive_spectrum(self, sf_arr, E_min, E_max, dE_init=None,
+                          dE_min=None, rtol=1e-3, atol=0.0, max_num_E=None,
+                          screen=True, **spectrum_kwargs):
+        """
+        Evaluate the energy spectrum on an energy grid refined adaptively
+
+        The spectrum is evaluated first on a coarse grid of spacing about
+        `dE_init`. Then each interval is bisected and the spectrum at the
+        midpoint is compared with the linear interpolation of its ends.
+        Where they differ by more than `rtol * max(spectrum) + atol`,
+        i.e. where the spectrum changes quickly or has a peak,
+        both halves are bisected again, down to the spacing `dE_min`.
+        The midpoints of a round of bisection are evaluated together
+        by `spectrum()`. Thus, the number of solves scales with the
+        features of the spectrum, rather than the energy range.
+
+        A peak much narrower than `dE_init`, e.g. of a bound state, 
+        may fall between the points of the coarse grid and be missed 
+        by the bisection. If `screen` is True, the probability in each 
+        coarse interval is estimated beforehand by the window operator 
+        of width `dE/2` centered at the interval. The estimate is rough,
+        since the tails of the windows move some of the probability 
+        into the neighboring intervals, but a narrow peak shows up in
+        the interval containing it. The intervals are bisected regardless 
+        of the interpolation, and below `dE_min` down to `gamma/4`, 
+        until the trapezoidal integral of the spectrum over them reaches 
+        half of the estimate, if the estimate is larger than `rtol` 
+        times the largest one plus `atol*dE`.
+
+        Parameters
+        ----------
+        sf_arr : (..., N) array-like
+            a single or several wavefunctions. For several ones,
+            an interval is refined if it is so for any of them.
+        E_min, E_max : float
+            the energy range
+        dE_init : float or None
+            the spacing of the coarse grid. If None, `32*gamma`.
+        dE_min : float or None
+            the finest spacing of the bisection by the interpolation.
+            If None, `gamma/2`, which resolves the peaks of width `gamma`
+            of the spectrum, i.e. the convolution with the window.
+        rtol, atol : float
+            the relative and absolute tolerance of the linear interpolation
+        max_num_E : int or None
+            the maximum number of energies at which the spectrum is
+            evaluated. If reached, the refinement stops,
+            with the intervals at lower energies bisected first
+            in the last round.
+        screen : bool
+            whether to screen the coarse intervals for narrow peaks
+        spectrum_kwargs :
+            passed to `spectrum()`, e.g. `batch_size` and `num_workers`
+
+        Returns
+        -------
+        spectrum_E_arr : (..., NE) numpy.ndarray
+        E_arr : (NE,) numpy.ndarray
+            the increasing, non-equidistanced energy grid
+        """
+        if not (E_min < E_max):
+            _msg = "It should be `E_min < E_max`. Given: E_min={}, E_max={}"
+            raise ValueError(_msg.format(E_min, E_max))
+        if dE_min is None: dE_min = 0.5 * self.gamma
+        if dE_init is None: dE_init = max(32.0 * self.gamma, dE_min)
+        if not (0 < dE_min <= dE_init):
+            _msg = ("It should be `0 < dE_min <= dE_init`. "
+                    "Given: dE_min={}, dE_init={}")
+            raise ValueError(_msg.format(dE_min, dE_init))
+        if not (rtol >= 0 and atol >= 0):
+            _msg = "`rtol` and `atol` should be nonnegative. Given: {}, {}"
+            raise ValueError(_msg.format(rtol, atol))
+
+        _num_E_init = int(np.ceil((E_max - E_min) / dE_init)) + 1
+        _E_edges = np.linspace(E_min, E_max, _num_E_init)
+        _dE = _E_edges[1] - _E_edges[0]
+        _spec = self.spectrum(sf_arr, _E_edges, **spectrum_kwargs)
+        _batch_shape = _spec.shape[:-1]
+        _E_arr, _spec_arr = _E_edges, _spec.reshape((-1, _E_edges.size))
+
+        # Probability in each coarse interval from the wider window
+        _P_screen, _P_thres = None, None
+        if screen:
+            _screen_winop = self._with_gamma(0.5*_dE)
+            _P_screen = _dE * _screen_winop.spectrum(sf_arr, 
+                    0.5*(_E_edges[:-1] + _E_edges[1:]), **spectrum_kwargs)
+            _P_screen = _P_screen.reshape((-1, _E_edges.size-1))
+            _P_thres = rtol * np.max(_P_screen) + atol * _dE
+
+        # The left ends of the intervals to be bisected
+        _E_cand = _E_edges[:-1]
+        _dE_thres = 2.0 * dE_min * (1.0 - 1e-8)
+        # The finest spacing for the intervals missing probability
+        _dE_thres_screen = min(_dE_thres, 0.5 * self.gamma * (1.0 - 1e-8))
+        while True:
+            _E_left, _E_right = _E_arr[:-1], _E_arr[1:]
+            _spec_left, _spec_right = _spec_arr[:,:-1], _spec_arr[:,1:]
+            _dE_arr = _E_right - _E_left
+            _to_bisect = np.isin(_E_left, _E_cand) & (_dE_arr >= _dE_thres)
+            if screen:
+                # Bisect the intervals in the coarse ones missing probability
+                _i_coarse = np.searchsorted(_E_edges, 
+                        0.5*(_E_left + _E_right), side='right') - 1
+                _P_fine = np.zeros_like(_P_screen)
+                np.add.at(_P_fine, (slice(None), _i_coarse), 
+                        0.5 * (_spec_left + _spec_right) * (_E_right - _E_left))
+                _is_missing = np.any((_P_screen > _P_thres) 
+                        & (_P_fine < 0.5 * _P_screen), axis=0)
+                _to_bisect |= _is_missing[_i_coarse] \
+                        & (_dE_arr >= _dE_thres_screen)
+            _i_bisect = np.flatnonzero(_to_bisect)
+            if max_num_E is not None: 
+                _i_bisect = _i_bisect[:max(max_num_E - _E_arr.size, 0)]
+            if _i_bisect.size == 0: break
+
+            _E_mid = 0.5 * (_E_left[_i_bisect] + _E_right[_i_bisect])
+            _spec_mid = self.spectrum(sf_arr, _E_mid, **spectrum_kwargs)
+            _spec_mid = _spec_mid.reshape((-1, _E_mid.size))
+            _tol = rtol * max(np.max(_spec_arr), np.max(_spec_mid)) + atol
+            _err = np.abs(_spec_mid - 0.5 * (_spec_left[:,_i_bisect] 
+                    + _spec_right[:,_i_bisect]))
+            _to_refine = np.any(_err > _tol, axis=0)
+            _E_cand = np.concatenate(
+                    [_E_left[_i_bisect][_to_refine], _E_mid[_to_refine]])
+
+            _E_arr = np.concatenate([_E_arr, _E_mid])
+            _spec_arr = np.concatenate([_spec_arr, _spec_mid], axis=1)
+            _order = np.argsort(_E_arr)
+            _E_arr, _spec_arr = _E_arr[_order], _spec_arr[:,_order]
+
+        return _spec_arr.reshape(_batch_shape + (-1,)), _E_arr
+
+
+    def _eval_norms_in_batches(self, sf_arr, E_arr, batch_size=64, 
+                               num_workers=1, executor=None, 
+                               zero_x_index=None):
+        """Evaluate `norms()` in batches of energies, optionally in parallel"""
+        if not isinstance(batch_size, Integral) or batch_size < 1:
+            _msg = "`batch_size` should be a positive integer. Given: {}"
+            raise ValueError(_msg.format(batch_size))
+        if not isinstance(num_workers, Integral) or num_workers < 1:
+            _msg = "`num_workers` should be a positive integer. Given: {}"
+            raise ValueError(_msg.format(num_workers))
+        _E_arr = np.atleast_1d(np.asarray(E_arr, dtype=float))
+        _E_batches = [_E_arr[_i0:_i0+batch_size] 
+                for _i0 in range(0, _E_arr.size, batch_size)]
+        _own_executor = executor is None and num_workers > 1
+        if _own_executor:
+            executor = ProcessPoolExecutor(max_workers=num_workers, 
+                    mp_context=get_mp_context())
+        _kwargs = {} if zero_x_index is None else {'zero_x_index': zero_x_index}
+        try:
+            if executor is None:
+                _norms_list = [self.norms(sf_arr, _E_batch, **_kwargs) 
+                        for _E_batch in _E_batches]
+            else:
+                _futures = [executor.submit(self.norms, sf_arr, _E_batch, 
+                        **_kwargs) for _E_batch in _E_batches]
+                _norms_list = [_future.result() for _future in _futures]
+        finally:
+            if _own_executor: executor.shutdown()
+        return np.concatenate(_norms_list, axis=int(zero_x_index is not None))
+
+
+class WindowOperator_on_Channels(WindowOperator):
+    """
+    Window operators of the radial Hamiltonians of the channels, 
+    e.g. the `l`-channels of a spherical box or the `m`-channels
+    of a polar box, which are not coupled in the absence of a field
+
+    The radial functions of shape (Nc, Nr) are window-operated by 
+    the batched tridiagonal solves over the channels and the energies,
+    with the Numerov operators `M2` and `M2*H_c` of each channel `c`.
+    The spectrum of each channel is the norm of its radial function of 
+    `chi_E`, and the total spectrum is the sum over the channels.
+
+    If the Hamiltonians have the first-derivative term `M1^{-1} M1H`
+    common to the channels, as that of a polar box, each factor
+    `(H_c - z) chi' = gamma * chi` is solved with the auxiliary 
+    `u = M1^{-1} M1H chi'` as the system of the tridiagonal blocks
+
+    .. math::
+
+        (M2H_c - z M2) \\chi' + M2 u = \\gamma M2 \\chi, \\quad
+        -M1H \\chi' + M1 u = 0
+
+    whose unknowns `chi'` and `u` are interleaved into a banded system
+    of the bandwidth 3, at the cost of a few tridiagonal solves.
+
+    Use `from_propagator()` to construct it from a propagator.
+    """
+
+    def __init__(self, M2, M2H, weights, gamma, winop_n, M1=None, M1H=None):
+        """
+        Initialize
+
+        Parameters
+        ----------
+        M2, M2H : (3, Nr) or (Nc, 3, Nr) array-like
+            the Numerov operators of each channel, i.e. `H_c = M2^{-1} M2H[c]`
+        weights : float or (Nr,) array-like
+            the quadrature weights for the norm of a radial function
+        M1, M1H : (3, Nr) array-like or None
+            If given, the operators of the first-derivative term 
+            `M1^{-1} M1H` added to the Hamiltonian of each channel
+        """
+        _M2H = np.asarray(M2H)
+        if _M2H.ndim != 3 or _M2H.shape[1] != 3:
+            _msg = "`M2H` should be of shape (Nc, 3, Nr). Given shape: {}"
+            raise ValueError(_msg.format(_M2H.shape))
+        self.Nc, self.N = _M2H.shape[0], _M2H.shape[-1]
+        self.M2H = _M2H
+        self.M2 = np.array(np.broadcast_to(M2, _M2H.shape))
+        self.weights = weights
+        if (M1 is None) != (M1H is None):
+            raise ValueError("`M1` and `M1H` should be given together")
+        self.M1 = None if M1 is None else np.asarray(M1)
+        self.M1H = None if M1H is None else np.asarray(M1H)
+        self._set_window(gamma, winop_n)
+
+
+    @classmethod
+    def from_propagator(cls, propagator, gamma, winop_n):
+        """
+        Construct the window operators from the operators of 
+        a field-free `Propagator_on_Spherical_Box_with_single_m` or
+        `Propagator_on_Uniform_Grid_Polar_Box_Over_r`,
+        including the absorber of the propagator, if any
+
+        The Hamiltonian of the polar box for the wavefunction `r*R_m` 
+        is that of the propagator, `M2^{-1} M2Hm + M1r^{-1} M1rH1`,
+        with the first-derivative term, so that the spectrum is that of 
+        the states propagated by it.
+        """
+        if hasattr(propagator, 'M2Hl'):
+            _M2 = np.array(np.broadcast_to(propagator.M2, 
+                    propagator.M2Hl.shape), dtype=propagator.M2H0.dtype)
+            _M2[:,1,0] += propagator.first_M2_shifts
+            return cls(_M2, propagator.M2Hl, propagator.r_weights,
+                    gamma, winop_n)
+        elif hasattr(propagator, 'M2Hm'):
+            _weights = 2.0 * np.pi * propagator.r_weights / propagator.r_arr
+            return cls(propagator.M2, propagator.M2Hm, _weights, gamma, 
+                    winop_n, M1=propagator.M1r, M1H=propagator.M1rH1)
+        else:
+            _msg = ("`propagator` should be a field-free propagator "
+                    "of a spherical or polar box. Given: {}")
+            raise ValueError(_msg.format(propagator))
+
+
+    def apply(self, sf_arr, E_arr):
+        """
+        Return the states `chi_E` for each energy in `E_arr`
+
+        Parameters
+        ----------
+        sf_arr : (..., Nc, Nr) array-like
+            a single or several wavefunctions
+        E_arr : float or (NE,) array-like
+
+        Returns
+        -------
+        chi_arr : (NE, ..., Nc, Nr) or (..., Nc, Nr) numpy.ndarray
+            the latter for a scalar `E_arr`
+        """
+        if self.M1 is None: return super().apply(sf_arr, E_arr)
+        _sf_arr = np.asarray(sf_arr)
+        _wf_shape = (self.Nc, self.N)
+        if _sf_arr.shape[_sf_arr.ndim-2:] != _wf_shape:
+            _msg = "The last axes of `sf_arr` should be of shape {}. Given: {}"
+            raise ValueError(_msg.format(_wf_shape, _sf_arr.shape))
+        _E = np.asarray(E_arr, dtype=float)
+        _E_1d = np.atleast_1d(_E)
+        _NE, _Nwf = _E_1d.size, _sf_arr.size // (self.Nc * self.N)
+        _E_stack = _E_1d.reshape((_NE, 1, 1, 1))
+
+        # Banded storage of the interleaved system for each energy and channel
+        _ab = np.zeros((7, _NE, self.Nc, 2*self.N), dtype=complex)
+        self._fill_banded(_ab, self.M2, 0, 1)
+        self._fill_banded(_ab, -self.M1H, 1, 0)
+        self._fill_banded(_ab, self.M1, 1, 1)
+
+        _chi = np.empty((_NE, _Nwf) + _wf_shape, dtype=complex)
+        _chi[:] = _sf_arr.reshape((_Nwf,) + _wf_shape)
+        _M2_chi = np.empty_like(_chi)
+        _right = np.zeros((_NE, self.Nc, self.N, 2, _Nwf), dtype=complex)
+        for _M2H_shifted in self._M2H_shifted:
+            self._fill_banded(_ab, _M2H_shifted - _E_stack * self.M2, 0, 0)
+            tridiag_forward_batch(self.gamma_M2, _chi, _M2_chi)
+            _right[...,0,:] = np.moveaxis(_M2_chi, 1, -1)
+            _x = solve_banded((3,3), _ab.reshape((7,-1)), 
+                    _right.reshape((-1,_Nwf)), check_finite=False)
+            _x = _x.reshape((_NE, self.Nc, self.N, 2, _Nwf))
+            _chi[:] = np.moveaxis(_x[...,0,:], -1, 1)
+        return _chi.reshape(_E.shape + _sf_arr.shape)
+
+
+    @staticmethod
+    def _fill_banded(ab, tridiag, row, col):
+        """
+        Fill the block `(row, col)` of the interleaved system, i.e. 
+        the elements `(2*i+row, 2*j+col)` from the tridiagonal `(i, j)`, 
+        into the banded storage `ab` of shape (7, ..., 2*N)
+        """
+        _N = tridiag.shape[-1]
+        _row = 3 + row - col
+        ab[_row+2][...,col:2*_N-2:2] = tridiag[...,0,1:]
+        ab[_row][...,col::2] = tridiag[...,1,:]
+        ab[_row-2][...,2+col::2] = tridiag[...,2,:-1]
+
+
+    def norms(self, sf_arr, E_arr):
+        """
+        Return the norms of `chi_E` of each channel, 
+        of shape (NE, ..., Nc), for the energies `E_arr`
+        """
+        _chi = self.apply(sf_arr, np.atleast_1d(E_arr))
+        _chi_abs_sq = np.real(_chi.conj() * _chi)
+        if np.ndim(self.weights) > 0: 
+            return np.sum(_chi_abs_sq * self.weights, axis=-1)
+        return self.weights * np.sum(_chi_abs_sq, axis=-1)
+
+
+    def spectrum(self, sf_arr, E_arr, batch_size=64, num_workers=1, 
+                 executor=None):
+        """
+        Evaluate the energy spectrum of each channel at `E_arr`
+
+        See `WindowOperator.spectrum()` for the parameters.
+
+        Returns
+        -------
+        spectrum_cE_arr : (..., Nc, NE) numpy.ndarray
+            the spectra of the channels, 
+            whose sum over the channels is the total spectrum
+        """
+        return super().spectrum(sf_arr, E_arr, batch_size=batch_size, 
+                num_workers=num_workers, executor=executor)
+
+
+
 def eval_energy_spectrum_for_1D_hamil(
         sf_arr, x_arr, V_x_arr, E_min_in, E_max_in, winop_n, gamma, use_only_real_pot=True, 
-        eval_momentum=False, m=1.0, zero_thres=1e-13):
+        eval_momentum=False, m=1.0, zero_thres=1e-13, batch_size=64,
+        num_workers=1, executor=None):
     """
     Evaluate energy spectrum
 
+    The energies are processed in batches of `batch_size` 
+    and optionally in parallel. See `WindowOperator.spectrum()`.
+    For many calls on the same system, construct `WindowOperator`
+    once and call its methods instead.
+
     Argument
     ----------
     x_arr : (N,) numpy.ndarray
@@ -88,6 +624,18 @@ def eval_energy_spectrum_for_1D_hamil(
 
     m : float
         Particle mass
+
+    batch_size : int
+        the number of energies solved at once. 
+        The memory of the stacked systems is `O(batch_size * N)`.
+
+    num_workers : int
+        the number of worker processes, used if `executor` is None.
+        If 1, the batches are evaluated serially in this process.
+
+    executor : concurrent.futures.Executor or None
+        If given, the batches are submitted to it, e.g. a thread pool
+        or a process pool shared over many calls.
     """
 
     ## Check arguments
@@ -96,6 +644,7 @@ def eval_energy_spectrum_for_1D_hamil(
     assert E_min_in < E_max_in
 
 #    assert np.all(np.diff(E_arr) > 0)
+    _zero_x_index = None
     if eval_momentum:
         _min_abs_x_index = np.argmin(np.abs(x_arr))
         _min_abs_x = x_arr[_min_abs_x_index]
@@ -103,44 +652,20 @@ def eval_energy_spectrum_for_1D_hamil(
             raise Exception("The given `x_arr` doesn't seem to have a zero " \
                     + "as an element")
         _zero_x_index = _min_abs_x_index
-        _nega_x_arr = x_arr[:_zero_x_index+1]
-        _posi_x_arr = x_arr[_zero_x_index:]
-        assert (_nega_x_arr.size + _posi_x_arr.size) == x_arr.size + 1
-        assert _nega_x_arr[-1] == _posi_x_arr[0]
-#    if eval_momentum:
-#        _min_abs_E_index = np.argmin(np.abs(E_arr))
-#        _min_abs_E = E_arr[_min_abs_E_index]
-#        if abs(_min_abs_E) > zero_thres:
-#            raise Exception("The E_arr should contain zero")
 
     _E_arr = construct_E_arr_for_winop(E_min_in, E_max_in, gamma)
 
-    
-    ## Define some variables
-    _N_x = x_arr.size
-    _delta_x = x_arr[1] - x_arr[0]
-    _V_x_arr = V_x_arr
-    if use_only_real_pot: _V_x_arr = V_x_arr.real
-    
-    ## Allocate memory
-    # for output
-    spectrum_E_arr = np.empty_like(_E_arr, dtype=float)
-    # for intermediate result
-    right_arr = np.empty_like(x_arr, dtype=complex)
-
-    ## Evaluate constant components
-    D2 = get_D2_tridiag(_N_x, _delta_x)
-    M2 = get_M2_tridiag(_N_x)
-    M2V = mul_tridiag_and_diag(M2, _V_x_arr)
-
-    tridiag_shape = M2.shape
-    M2H = np.empty(tridiag_shape, dtype=float)
-    left_tridiag = np.empty(tridiag_shape, dtype=complex)
-    gamma_M2 = np.empty(tridiag_shape, dtype=complex)
-    gamma_M2[:] = gamma * M2 
-
-    _norm_const = np.sin(np.pi/pow(2,winop_n)) / (np.pi/pow(2,winop_n))
-    M2H[:] = -0.5*D2 + M2V
+    ## Evaluate norms of the window-operated states
+    _winop = WindowOperator(x_arr, V_x_arr, gamma, winop_n, 
+            use_only_real_pot=use_only_real_pot)
+    _norms = _winop._eval_norms_in_batches(sf_arr, _E_arr, batch_size, 
+            num_workers, executor, zero_x_index=_zero_x_index)
+
+
+    ## Evaluate energy spectrum
+    _const_E = _winop.spectrum_const
+    _norm_on_x = _norms if not eval_momentum else _norms[0] + _norms[1]
+    spectrum_E_arr = _const_E * _norm_on_x
 
 
     ## Construct arrays for momentum and its spectrum
@@ -148,86 +673,22 @@ def eval_energy_spectrum_for_1D_hamil(
         _posi_E_mask = _E_arr > 0
         _posi_E_arr = _E_arr[_posi_E_mask]
         _posi_p_arr = np.sqrt(2.0*m*_posi_E_arr)
-        _num_of_posi_E_val = _posi_E_arr.size
-        _num_of_posi_p_val = _num_of_posi_E_val
-#        _num_of_momentum = _num_of_posi_p_val + 1 + _num_of_posi_p_val
+        _num_of_posi_p_val = _posi_E_arr.size
         _num_of_momentum = 2 * _num_of_posi_p_val
         _p_arr = np.empty((_num_of_momentum,), dtype=float)
-        assert _num_of_posi_p_val == _num_of_momentum // 2
         _p_arr[:_num_of_momentum//2] = - np.flipud(_posi_p_arr)
-#        _p_arr[_num_of_momentum//2] = 0.0
         _p_arr[_num_of_momentum//2:] = _posi_p_arr
         # [NOTE] The probability density of momentum at E = 0 (thus, p = 0) 
         # .. is always zero since |dE/dp| = |p|/m = 0
-        _spectrum_p_arr = np.empty_like(_p_arr, dtype=float)
-#        _spectrum_p_arr[_num_of_momentum//2] = 0.0
-
-
-    ## Evaluate spectrum
-    _const_E = 1.0 / (2.0 * gamma) * _norm_const
-    for E_idx, E0 in enumerate(_E_arr):
-
-        ## Evaluate state function array for E0
-        _sf_arr = sf_arr.copy()
-        for _m in range(1,pow(2,winop_n-1)+1):
-            _phase = np.exp(1.0j * (2.0*_m-1)/pow(2,winop_n) * np.pi)
-            left_tridiag[:] = M2H - (_phase * gamma + E0) * M2
-
-            tridiag_forward(gamma_M2, _sf_arr, right_arr)
-            tridiag_backward(left_tridiag, _sf_arr, right_arr)
-
-        ## Evaluate norm on whole x range
-        ## .. with optional momentum spectrum
-        if eval_momentum and _posi_E_mask[E_idx]:
-
-            _p0 = np.sqrt(2.0*m*E0)
-            assert _p0 > 0  # should not be zero or negative
-
-            _E_posi_idx = E_idx - (_E_arr.size - _posi_E_arr.size)
-#            _p_posi_idx = _num_of_momentum // 2 + 1 + _E_posi_idx
-#            _p_nega_idx = _num_of_momentum // 2 - 1 - _E_posi_idx
-            _p_posi_idx = _num_of_momentum // 2 + _E_posi_idx
-            _p_nega_idx = _num_of_momentum // 2 - 1 - _E_posi_idx
-
-            if (_p0 != _p_arr[_p_posi_idx]) or (-_p0 != _p_arr[_p_nega_idx]):
-                _info_str = (
-                        "_p0 = {}, _p_arr[_p_posi_idx] = {}, "
-                        "_p_arr[_p_nega_idx] = {}, _p_arr = {}").format(
-                                _p0, _p_arr[_p_posi_idx], _p_arr[_p_nega_idx],
-                                _p_arr)
-                raise Exception("inconsistent momentum array: " + _info_str)
-
-            _norm_on_nega_x = eval_norm_trapezoid(
-                    _nega_x_arr, _sf_arr[:_zero_x_index+1]) 
-            _norm_on_posi_x = eval_norm_trapezoid(
-                    _posi_x_arr, _sf_arr[_zero_x_index:])
-
-            _norm_on_x = _norm_on_nega_x + _norm_on_posi_x
-            
-            ## [TO BE ERASED : START]
-            _norm_on_x_test = eval_norm_trapezoid(x_arr, _sf_arr)
-            if abs(_norm_on_x_test - _norm_on_x) > zero_thres:
-                _msg = ("norm_on_x = {}, _norm_on_nega_x = {}, "
-                        "_norm_on_posi_x = {}, "
-                        "_norm_on_nega_x + _norm_on_posi_x = {}").format(
-                                _norm_on_x, _norm_on_nega_x, _norm_on_posi_x, 
-                                _norm_on_nega_x + _norm_on_posi_x)
-                raise Exception(_msg)
-            ## [TO BE ERASED : END]
-
-            
-            ## Evaluate momentum spectrum
-            _abs_dE_dp = _p0  # positive because `_p0 == sqrt(2*m*E0) > 0`
-            _const_p = _const_E * _abs_dE_dp
-            _spectrum_p_arr[_p_nega_idx] = _const_p * _norm_on_nega_x
-            _spectrum_p_arr[_p_posi_idx] = _const_p * _norm_on_posi_x
-
-        else:
-            _norm_on_x = eval_norm_trapezoid(x_arr, _sf_arr)
-
         
-        ## Evaluate energy spectrum
-        spectrum_E_arr[E_idx] = _const_E * _norm_on_x
+        ## Evaluate momentum spectrum
+        # |dE/dp| is positive because `_p0 == sqrt(2*m*E0) > 0`
+        _const_p_arr = _const_E * _posi_p_arr
+        _norm_on_nega_x, _norm_on_posi_x = _norms[:,_posi_E_mask]
+        _spectrum_p_arr = np.empty_like(_p_arr, dtype=float)
+        _spectrum_p_arr[:_num_of_momentum//2] = \
+                np.flipud(_const_p_arr * _norm_on_nega_x)
+        _spectrum_p_arr[_num_of_momentum//2:] = _const_p_arr * _norm_on_posi_x
 
 
     ## Return results
@@ -237,41 +698,42 @@ def eval_energy_spectrum_for_1D_hamil(
 
 
 
+def eval_energy_spectrum_for_channels(sf_arr, propagator, E_min_in, E_max_in, 
+        winop_n, gamma, batch_size=64, num_workers=1, executor=None):
+    """
+    Evaluate the energy spectrum of the wavefunction of shape (Nc, Nr)
+    on a spherical or polar box, each channel of which is window-operated 
+    by the operators of the field-free `propagator` of the box
+
+    See `WindowOperator_on_Channels` and `WindowOperator.spectrum()`.
+
+    Returns
+    -------
+    spectrum_E_arr : (NE,) numpy.ndarray
+        the total spectrum, summed over the channels
+    spectrum_cE_arr : (Nc, NE) numpy.ndarray
+        the spectrum of each channel
+    E_arr : (NE,) numpy.ndarray
+    """
+    _E_arr = construct_E_arr_for_winop(E_min_in, E_max_in, gamma)
+    _winop = WindowOperator_on_Channels.from_propagator(
+            propagator, gamma, winop_n)
+    spectrum_cE_arr = _winop.spectrum(sf_arr, _E_arr, batch_size=batch_size, 
+            num_workers=num_workers, executor=executor)
+    spectrum_E_arr = np.sum(spectrum_cE_arr, axis=-2)
+    return spectrum_E_arr, spectrum_cE_arr, _E_arr
+
 
-from numpy import pi
 
 def eval_psi_E_x(sf_arr, dx, V_x_arr, E0, winop_n, gamma, use_only_real_pot=True):
+    """
+    Evaluate the window-operated state at the energy `E0`
 
+    For many energies or calls on the same system, 
+    construct `WindowOperator` once and call its `psi_E()` instead.
+    """
     assert V_x_arr.shape == sf_arr.shape
-
-    ## Define some variables
-    _N_x = sf_arr.size
-    _delta_x = dx
-    _V_x_arr = V_x_arr
-    if use_only_real_pot: _V_x_arr = V_x_arr.real
-
-    right_arr = np.empty_like(sf_arr, dtype=complex)
-
-    ## Evaluate constant components
-    D2 = get_D2_tridiag(_N_x, _delta_x)
-    M2 = get_M2_tridiag(_N_x)
-    M2V = mul_tridiag_and_diag(M2, _V_x_arr)
-
-    tridiag_shape = M2.shape
-    left_tridiag = np.empty(tridiag_shape, dtype=complex)
-    gamma_M2 = np.empty(tridiag_shape, dtype=complex)
-    gamma_M2[:] = gamma * M2 
-
-    M2H = np.empty(tridiag_shape, dtype=float)
-    M2H[:] = -0.5*D2 + M2V
-
-    ## Evaluate state function array for E0
-    _sf_arr = sf_arr.copy()
-    for _m in range(1,pow(2,winop_n-1)+1):
-        _phase = np.exp(1.0j * (2.0*_m-1)/pow(2,winop_n) * pi)
-        left_tridiag[:] = M2H - (_phase * gamma + E0) * M2
-
-        tridiag_forward(gamma_M2, _sf_arr, right_arr)
-        tridiag_backward(left_tridiag, _sf_arr, right_arr)
-    
-    return _sf_arr
+    _x_arr = dx * np.arange(sf_arr.size)
+    _winop = WindowOperator(_x_arr, V_x_arr, gamma, winop_n, 
+            use_only_real_pot=use_only_real_pot)
+    return _winop.psi_E(sf_arr, E0)